@@ -2,21 +2,64 @@ __author__ = "o-murphy"
 __credits__ = ["Dmytro Yaroshenko"]
 __copyright__ = ("",)
 
+import importlib
+
 from a7p.a7p import *
 from a7p import profedit_pb2
 from a7p.profedit_pb2 import *
 from a7p.factory import A7PFactory
+from a7p.tracking import TrackedPayload
+
+# Names imported on first access, so that importing a7p does not load the validation stack
+_LAZY_NAMES = {
+    'BatchResult': 'a7p.batch',
+    'load_many': 'a7p.batch',
+    'validate_many': 'a7p.batch',
+    'validate_batch': 'a7p.vectorized',
+}
+
+# Submodules imported on first access
+_LAZY_MODULES = frozenset((
+    'batch', 'cache', 'convert', 'exceptions', 'factory', 'lazy', 'logger', 'protovalidate', 'recover',
+    'scheduling', 'spec_validator', 'tracking', 'validation_plan', 'vectorized', 'walk', 'wire',
+))
+
+
+def __getattr__(name):
+    if name in _LAZY_NAMES:
+        value = getattr(importlib.import_module(_LAZY_NAMES[name]), name)
+    elif name in _LAZY_MODULES:
+        value = importlib.import_module(f'a7p.{name}')
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES) | _LAZY_MODULES)
+
 
 __all__ = (
     'loads',
     'dumps',
     'load',
+    'load_mmap',
+    'verify',
+    'peek',
+    'ProfileHeader',
     'dump',
     'from_json',
     'to_json',
     'from_dict',
+    'from_dicts',
     'to_dict',
     'validate',
+    'load_many',
+    'validate_many',
+    'validate_batch',
+    'BatchResult',
+    'TrackedPayload',
 
     'Payload',
     'Profile',
@@ -28,9 +71,19 @@ __all__ = (
 
     'A7PFactory',
 
+    'batch',
+    'cache',
+    'convert',
     'factory',
     'exceptions',
+    'lazy',
     'logger',
     'profedit_pb2',
+    'scheduling',
+    'tracking',
+    'validation_plan',
+    'vectorized',
+    'walk',
+    'wire',
     'recover',
 )
\ No newline at end of file
@@ -1,28 +1,42 @@
 import asyncio
+import logging
+import os
+import sqlite3
 import sys
+import tempfile
 from argparse import ArgumentParser
-from asyncio import Semaphore
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from importlib import metadata
+from itertools import chain, islice
 from pathlib import Path
+from typing import Iterable, Iterator
 
-from tqdm.asyncio import tqdm_asyncio
+from tqdm import tqdm
 
 import a7p
-from a7p import exceptions, profedit_pb2
+from a7p import exceptions, profedit_pb2, protovalidate
+from a7p.a7p import HASH_SIZE
+from a7p.cache import ValidationCache
 from a7p.exceptions import A7PValidationError
 from a7p.factory import DistanceTable
 from a7p.logger import logger, color_print, color_fmt
-from a7p.recover.recover_process import attempt_to_recover
+from a7p.tracking import TrackedPayload
+from a7p.walk import iter_profiles
 
 try:
     __version__ = metadata.version("a7p")
 except metadata.PackageNotFoundError:
     __version__ = "undefined version"
 
-# Define a global Semaphore with a maximum number of threads
-MAX_THREADS = 5  # Set the maximum number of threads
-semaphore = Semaphore(MAX_THREADS)
+# Maximum number of files sent to a worker process at once
+MAX_CHUNK_SIZE = 32
+
+# Maximum number of chunks processed or waiting to be reported per worker process
+MAX_PENDING_CHUNKS = 4
+
+# The cache of validation results of a worker process
+_worker_cache: ValidationCache | None = None
 
 DISTANCES = {
     'subsonic': DistanceTable.SUBSONIC.value,
@@ -33,12 +47,6 @@ DISTANCES = {
 }
 
 
-async def limited_to_thread(func, *args):
-    """Run a function in a thread, limited by the semaphore."""
-    async with semaphore:  # Acquire the semaphore
-        return await asyncio.to_thread(func, *args)
-
-
 class CustomArgumentParser(ArgumentParser):
     def error(self, message):
         """Override error method to show help message on argument errors."""
@@ -72,14 +80,25 @@ parser.add_argument('-F', '--force', action='store_true',
                     help="Force saving changes without confirmation.")
 parser.add_argument('--unsafe', action='store_true',
                     help="Skip data validation (use with caution).")
+parser.add_argument('--no-cache', action='store_true',
+                    help="Don't use the cache of validation results for unchanged files.")
+parser.add_argument('-j', '--jobs', action='store', type=int, default=os.cpu_count() or 1,
+                    help="Number of worker processes used to process a directory (default: the CPU count).")
+parser.add_argument('--include', action='append', metavar="PATTERN",
+                    help="Only process the files of a directory matching a glob pattern, "
+                         "matched against the path relative to the directory if it has a slash, "
+                         "else against the file name. Can be repeated.")
+parser.add_argument('--exclude', action='append', metavar="PATTERN",
+                    help="Skip the files and subdirectories of a directory matching a glob pattern. "
+                         "Can be repeated.")
+parser.add_argument('--recover', action='store_true',
+                    help="Attempt to recover from errors found in a file, or in every file of a directory. "
+                         "Recovered files are saved next to the originals with a '_recovered' suffix.")
 
 recover_group = parser.add_argument_group("Single file specific options")
 recover_group.add_argument('--verbose', action='store_true',
                            help="Enable verbose output for detailed logs. "
                                 "This option is only allowed for a single file.")
-recover_group.add_argument('--recover', action='store_true',
-                           help="Attempt to recover from errors found in a file. "
-                                "This option is only allowed for a single file.")
 
 # Distances group
 distances_group = parser.add_argument_group("Distances")
@@ -102,8 +121,21 @@ zeroing_exclusive_group.add_argument('-zo', '--zero-offset', action='store', nar
 # zeroing_exclusive_group.add_argument('-cs', '--clicks-switch', action='store', nargs=4, help="Switch clicks sizes",
 #                                      metavar=("CUR_X", "NEW_X", "CUR_Y", "NEW_Y"))
 
-
-# parser.add_argument('--max-threads', action='store', type=int, default=5)
+# Maintenance commands, run instead of processing a path when the first argument names one
+command_parser = CustomArgumentParser(
+    "a7p",
+    exit_on_error=True,
+)
+command_subparsers = command_parser.add_subparsers(dest="command", required=True)
+cache_parser = command_subparsers.add_parser("cache", help="Manage the cache of validation results.")
+cache_subparsers = cache_parser.add_subparsers(dest="cache_command", required=True)
+prune_parser = cache_subparsers.add_parser("prune",
+                                           help="Remove outdated entries from the cache of validation results.")
+prune_parser.set_defaults(func=lambda args: prune_cache(args.max_age, args.everything))
+prune_parser.add_argument('--max-age', action='store', type=float, default=30,
+                          help="Also remove entries not used for the specified number of days (default: 30).")
+prune_parser.add_argument('--all', action='store_true', dest='everything',
+                          help="Remove all entries.")
 
 
 @dataclass
@@ -117,7 +149,27 @@ class Result:
     distances: str = None
     zero_distance: str = None
     recover: bool = False
-    payload: profedit_pb2.Payload = None
+    payload: profedit_pb2.Payload | TrackedPayload = None
+    data: bytes = None
+    dirty: frozenset[str] | None = None
+
+    @property
+    def has_changes(self):
+        return bool(self.zero_distance or self.distances or self.zero_update or self.recover)
+
+    def compact(self):
+        """Drop the payload and the violations, keeping the serialized payload only if it has to be saved."""
+        if self.payload is not None and self.has_changes:
+            payload = self.payload
+            if isinstance(payload, TrackedPayload):
+                # keep the modified fields so that only their rules are checked on save
+                self.dirty = payload.dirty if payload.validated else None
+                self.data = payload.serialize()
+            else:
+                self.data = payload.SerializeToString()
+        self.payload = None
+        self.validation_error = None
+        return self
 
     def reset_errors(self):
         self.error = None
@@ -148,7 +200,7 @@ class Result:
                 color_print(violation.format(), levelname='WARNING')
 
     def save_changes(self, force=False):
-        if self.zero_distance or self.distances or self.zero_update or self.recover:
+        if self.has_changes:
             if not force:
                 yes_no = input(color_fmt("Do you want to save changes? (Y/N): ", levelname="LIGHT_YELLOW"))
                 if yes_no.lower() != "y":
@@ -156,23 +208,43 @@ class Result:
                     return
             try:
                 try:
+                    payload = self.payload
+                    if payload is None:
+                        payload = profedit_pb2.Payload.FromString(self.data)
+                        if self.dirty is not None:
+                            payload = TrackedPayload(payload, validated=True)
+                            payload.mark_dirty(*self.dirty)
                     # Serialize and validate the payload
-                    data = a7p.dumps(self.payload)
+                    data = a7p.dumps(payload)
 
                     # Write the validated data to the file
                     filepath = self.path.absolute()
                     if self.recover:
                         filepath = filepath.with_name(filepath.stem + "_recovered" + filepath.suffix)
 
-                    with open(filepath, 'wb') as fp:
-                        fp.write(data)
-                        logger.info(f"Changes have been saved successfully to {filepath}.")
+                    write_atomic(filepath, data)
+                    logger.info(f"Changes have been saved successfully to {filepath}.")
                 except exceptions.A7PDataError:
                     logger.warning("The data is invalid. Changes have not been saved.")
             except IOError as e:
                 logger.warning(f"An error occurred while saving: {e}")
 
 
+@dataclass
+class RecoverRecord:
+    """The outcome of the recovery of a file of a directory."""
+    path: Path
+    error: str | None = None
+    valid: bool = False
+    recovered: dict[str, int] = field(default_factory=dict)
+    skipped: dict[str, int] = field(default_factory=dict)
+    data: bytes | None = None
+
+    @property
+    def recovered_path(self) -> Path:
+        return self.path.with_name(self.path.stem + "_recovered" + self.path.suffix)
+
+
 def update_distances(payload, distances, zero_distance):
     if not zero_distance:
         cur_zero_distance = payload.profile.distances[payload.profile.c_zero_distance_idx]
@@ -223,6 +295,7 @@ def process_file(
         zero_sync=None,
         verbose=False,
         recover=False,
+        cache: ValidationCache = None,
 ):
     if path.suffix != ".a7p":
         return
@@ -232,15 +305,33 @@ def process_file(
         zero_distance=zero_distance,
         zero_update=any([zero_offset, zero_sync])
     )
+    fail_fast = verbose == False
+    # the cache only stands in for validation of unmodified files
+    if not (validate and not recover and not distances and not zero_distance and not result.zero_update):
+        cache = None
     try:
         with open(path, 'rb') as fp:
             data = fp.read()
+        md5_hash = data[:HASH_SIZE].decode(errors='replace') if cache and a7p.verify(data) else None
+        verdict = cache.get(md5_hash, fail_fast) if md5_hash else None
+        if verdict is not None:
+            header = a7p.peek(data)
+            result.zero = result.new_zero = (header.zero_x / 1000, header.zero_y / 1000)
+            if not verdict.valid:
+                result.error = "Validation error"
+                result.validation_error = verdict.error
+            return result
         try:
-            payload = a7p.loads(data, validate_=validate, fail_fast=verbose == False)
+            payload = a7p.loads(data, validate_=validate, fail_fast=fail_fast)
         except exceptions.A7PValidationError as err:
             result.error = "Validation error"
             result.validation_error = err
             payload = err.payload
+        if md5_hash:
+            cache.put(md5_hash, result.validation_error, fail_fast)
+        if validate and result.validation_error is None:
+            # only the rules of the fields changed below are rechecked on save
+            payload = TrackedPayload(payload, validated=True)
     except (IOError, exceptions.A7PDataError) as err:
         result.error = err
         return result
@@ -259,28 +350,133 @@ def process_file(
     return result
 
 
+def report_result(result: Result, verbose=False, force=False) -> bool:
+    """Print a result and save its changes, returns True if the file is invalid."""
+    result.print(verbose)
+    print()
+    result.save_changes(force)
+    return bool(result.error)
+
+
+def print_summary(checked: int, failed: int):
+    output_strings = [
+        f"Files checked: {checked}",
+        color_fmt(f"Ok: {checked - failed}", levelname="INFO"),
+        color_fmt(f"Failed: {failed}", levelname="ERROR"),
+    ]
+    print(", ".join(output_strings))
+
+
 async def print_results_and_save(results, verbose=False, force=False):
     count_errors = 0
     results = sorted(filter(lambda x: x is not None, results),
                      key=lambda x: x.error is not None, reverse=False)
     for result in results:
-        if result:
-            result.print(verbose)
-            print()
-            result.save_changes(force)
+        count_errors += report_result(result, verbose, force)
+    print_summary(len(results), count_errors)
+
+
+async def stream_results(chunks: Iterable[list[Path]], run, limit: int):
+    """
+    Yield the results of chunks of files as the chunks complete.
+
+    `run` starts the processing of a chunk and returns an awaitable of its results. Chunks are taken
+    from the iterable in a thread, only when one of the `limit` slots is free: at most `limit` chunks
+    are processed or waiting to be reported at once, so neither files nor results are accumulated.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    slots = asyncio.Semaphore(limit)
+    chunks = iter(chunks)
+
+    async def submit():
+        submitted = 0
+        while True:
+            await slots.acquire()
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return submitted
+            asyncio.ensure_future(run(chunk)).add_done_callback(queue.put_nowait)
+            submitted += 1
+
+    producer = asyncio.create_task(submit())
+    producer.add_done_callback(queue.put_nowait)
+    total = None
+    received = 0
+    try:
+        while total is None or received < total:
+            done = await queue.get()
+            if done is producer:
+                total = producer.result()
+                continue
+            received += 1
+            slots.release()
+            for result in done.result():
+                yield result
+    finally:
+        producer.cancel()
+
+
+def split_chunks(files: Iterable[Path], jobs: int) -> Iterator[list[Path]]:
+    """
+    Group files in chunks for the workers. Chunks grow from single files to MAX_CHUNK_SIZE,
+    so the files of a small directory are still spread over the workers.
+    """
+    files = iter(files)
+    size = 1
+    count = 0
+    while chunk := list(islice(files, size)):
+        yield chunk
+        count += 1
+        if jobs > 1 and count % jobs == 0:
+            size = min(size * 2, MAX_CHUNK_SIZE)
+
+
+async def run_pipeline(files: Iterable[Path], worker, args: tuple, jobs: int, cache: ValidationCache = None):
+    """
+    Process files with `worker(paths, *args, cache)` in a pool of worker processes, or in a thread if
+    `jobs` is 1, yielding the results as they complete.
+    """
+    loop = asyncio.get_running_loop()
+    files = iter(files)
+    head = list(islice(files, 2))
+    chunks = split_chunks(chain(head, files), jobs)
+    if jobs > 1 and len(head) > 1:
+        # compiled once here, forked workers inherit the rules
+        protovalidate.warmup()
+        with ProcessPoolExecutor(jobs, initializer=init_worker, initargs=(cache is not None,)) as pool:
+            async for result in stream_results(
+                    chunks, lambda chunk: loop.run_in_executor(pool, run_in_worker, worker, chunk, args),
+                    jobs * MAX_PENDING_CHUNKS):
+                yield result
+    else:
+        async for result in stream_results(
+                chunks, lambda chunk: asyncio.to_thread(worker, chunk, *args, cache), 1):
+            yield result
 
-            if result.error:
-                count_errors += 1
 
-    output_strings = [
-        f"Files checked: {len(results)}",
-        color_fmt(f"Ok: {len(results) - count_errors}", levelname="INFO"),
-        color_fmt(f"Failed: {count_errors}", levelname="ERROR"),
-    ]
-    print(", ".join(output_strings))
+def process_chunk(paths, options, cache: ValidationCache = None):
+    results = (process_file(path, *options, False, False, cache) for path in paths)
+    return [result.compact() for result in results if result]
+
+
+async def process_directory(files: Iterable[Path], options: tuple, jobs: int = 1, force: bool = False,
+                            cache: ValidationCache = None):
+    """Process the files of a directory, reporting and saving each result as it completes."""
+    checked = failed = 0
+    progress = tqdm(unit="file")
+    async for result in run_pipeline(files, process_chunk, (options,), jobs, cache):
+        progress.update()
+        checked += 1
+        # the bar is cleared while the result is printed and drawn again below it
+        with progress.external_write_mode():
+            failed += report_result(result, force=force)
+    progress.close()
+    print_summary(checked, failed)
 
 
 def recover_payload(result: Result):
+    from a7p.recover.recover_process import attempt_to_recover
+
     if result.validation_error:
         result.recover = True
 
@@ -296,6 +492,142 @@ def recover_payload(result: Result):
         logger.info("No violations found")
 
 
+def recover_file(path: Path, cache: ValidationCache = None) -> RecoverRecord | None:
+    """Recover a file of a directory without console output, keeping the recovered data if it is valid."""
+    from a7p.recover import recover_plan
+
+    if path.suffix != ".a7p" or path.stem.endswith("_recovered"):
+        return None
+    record = RecoverRecord(path)
+    try:
+        data = path.read_bytes()
+        md5_hash = data[:HASH_SIZE].decode(errors='replace') if cache and a7p.verify(data) else None
+        verdict = cache.get(md5_hash) if md5_hash else None
+        if verdict is not None and verdict.valid:
+            record.valid = True
+            return record
+        try:
+            a7p.loads(data, fail_fast=False)
+            error = None
+        except exceptions.A7PValidationError as err:
+            error = err
+        if md5_hash:
+            cache.put(md5_hash, error)
+        if error is None:
+            record.valid = True
+            return record
+        # the recover functions report the defaults they restore, keep the worker quiet
+        level = logger.level
+        logger.setLevel(logging.ERROR)
+        try:
+            plan, _, left = recover_plan.recover(error)
+        finally:
+            logger.setLevel(level)
+    except (IOError, exceptions.A7PDataError) as err:
+        record.error = str(err)
+        return record
+
+    record.recovered, record.skipped = plan.counts()
+    if left is None:
+        # already checked by the recovery
+        record.data = a7p.dumps(error.payload, validate_=False)
+    return record
+
+
+def recover_chunk(paths, cache: ValidationCache = None):
+    records = (recover_file(path, cache) for path in paths)
+    return [record for record in records if record]
+
+
+def print_recover_summary(recovered: dict[str, int], skipped: dict[str, int], counts: dict[str, int]):
+    rules = sorted(recovered.keys() | skipped.keys())
+    if rules:
+        print()
+        width = max(30, *map(len, rules))
+        print(f'{"Rule".ljust(width)} {"Recovered":>10} {"Skipped":>10}')
+        for rule in rules:
+            print(f'{rule.ljust(width)} '
+                  f'{color_fmt(str(recovered.get(rule, 0)).rjust(10), levelname="INFO")} '
+                  f'{color_fmt(str(skipped.get(rule, 0)).rjust(10), levelname="WARNING")}')
+        print()
+
+    output_strings = [
+        f"Files checked: {counts['checked']}",
+        color_fmt(f"Ok: {counts['valid']}", levelname="INFO"),
+        color_fmt(f"Recovered: {counts['recovered']}", levelname="LIGHT_BLUE"),
+        color_fmt(f"Failed: {counts['checked'] - counts['valid'] - counts['recovered']}", levelname="ERROR"),
+    ]
+    print(", ".join(output_strings))
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write a file through a temporary sibling renamed over it, so readers never see a partial file."""
+    fd, tmp = tempfile.mkstemp(prefix=path.name, suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def save_recovered(record: RecoverRecord) -> bool:
+    try:
+        write_atomic(record.recovered_path, record.data)
+        return True
+    except IOError as e:
+        logger.warning(f"An error occurred while saving {record.recovered_path}: {e}")
+        return False
+
+
+async def recover_files(files: Iterable[Path], jobs: int = 1, force: bool = False, cache: ValidationCache = None):
+    """
+    Recover the files of a directory, printing the files left invalid as they complete and one summary.
+    Recovered files are saved as they complete with `force`, else after a single confirmation.
+    """
+    recovered: dict[str, int] = {}
+    skipped: dict[str, int] = {}
+    counts = {'checked': 0, 'valid': 0, 'recovered': 0}
+    pending: list[RecoverRecord] = []
+    saved = 0
+    files = (item for item in files if not item.stem.endswith("_recovered"))
+    progress = tqdm(unit="file")
+    async for record in run_pipeline(files, recover_chunk, (), jobs, cache):
+        progress.update()
+        counts['checked'] += 1
+        for rule, count in record.recovered.items():
+            recovered[rule] = recovered.get(rule, 0) + count
+        for rule, count in record.skipped.items():
+            skipped[rule] = skipped.get(rule, 0) + count
+        if record.valid:
+            counts['valid'] += 1
+        elif record.data is not None:
+            counts['recovered'] += 1
+            if force:
+                saved += save_recovered(record)
+            else:
+                pending.append(RecoverRecord(record.path, data=record.data))
+        elif record.error:
+            progress.write(f'{color_fmt(f"Invalid ({record.error}):", levelname="ERROR")} '
+                           f'File: {record.path.absolute()}')
+        else:
+            progress.write(f'{color_fmt("Not recovered:", levelname="ERROR")} File: {record.path.absolute()}')
+    progress.close()
+
+    print_recover_summary(recovered, skipped, counts)
+
+    if pending:
+        yes_no = input(color_fmt(f"Do you want to save {len(pending)} recovered files? (Y/N): ",
+                                 levelname="LIGHT_YELLOW"))
+        if yes_no.lower() != "y":
+            logger.info("No changes have been saved.")
+            return
+        saved = sum(map(save_recovered, pending))
+    if counts['recovered']:
+        logger.info(f"{saved} recovered files have been saved.")
+
+
 async def process_files(
         path: Path = None,
         recursive: bool = False,
@@ -308,6 +640,10 @@ async def process_files(
         zero_offset: tuple[float, float] = None,
         zero_sync: Path = None,
         recover: bool = False,
+        no_cache: bool = False,
+        jobs: int = 1,
+        include: list[str] = None,
+        exclude: list[str] = None,
 ):
     if not Path.exists(path):
         parser.warning(f"The '{path}' is not a valid path")
@@ -317,11 +653,14 @@ async def process_files(
         logger.warning("Use the 'force' option cautiously, only if you are certain about its effects.")
 
     validate = unsafe is False
-    tasks = []
 
     if zero_sync:
         zero_sync = get_zero_to_sync(zero_sync, validate)
 
+    cache = None
+    if validate and not no_cache:
+        cache = open_validation_cache()
+
     if not path.is_dir():
         if path and recover:
 
@@ -338,34 +677,64 @@ async def process_files(
         results = [await asyncio.to_thread(process_file,
                                            path, validate, distances,
                                            zero_distance, zero_offset, zero_sync,
-                                           verbose, recover
+                                           verbose, recover, cache
                                            )]
     else:
-        if recover:
-            parser.warning("The '--recover' option is supported only when processing a single file.")
         if verbose:
             parser.warning("The '--verbose' option is supported only when processing a single file.")
 
-        if recursive:
-            item: Path
-            for item in path.rglob("*"):  # '*' matches all files and directories
-                if item.is_file():
-                    tasks.append(limited_to_thread(
-                        process_file, item, validate, distances,
-                        zero_distance, zero_offset, zero_sync))
+        # walked lazily, as the workers take the files
+        files = iter_profiles(path, recursive, include or (), exclude or ())
+
+        if recover:
+            if any([unsafe, distances, zero_distance, json, zero_offset, zero_sync]):
+                raise parser.error(f"The '--recover' option cannot be combined with data changes or '--unsafe'.")
+            await recover_files(files, jobs, force, cache)
         else:
-            for item in path.iterdir():
-                if item.is_file():
-                    tasks.append(limited_to_thread(process_file, item, validate, distances,
-                                                   zero_distance, zero_offset, zero_sync))
+            # results are reported and saved as they complete, only the counters are kept
+            options = (validate, distances, zero_distance, zero_offset, zero_sync)
+            await process_directory(files, options, jobs, force, cache)
+        if cache:
+            cache.close()
+        return
 
-        results: tuple[Result] | list[Result] = await tqdm_asyncio.gather(*tasks)
+    if cache:
+        cache.close()
 
     await print_results_and_save(results, verbose=verbose, force=force)
 
 
+def init_worker(use_cache: bool):
+    global _worker_cache
+    _worker_cache = open_validation_cache() if use_cache else None
+
+
+def run_in_worker(worker, paths, args):
+    return worker(paths, *args, _worker_cache)
+
+
+def open_validation_cache():
+    try:
+        return ValidationCache()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"The cache of validation results is unavailable: {e}")
+        return None
+
+
+def prune_cache(max_age: float = 30, everything: bool = False):
+    cache = open_validation_cache()
+    if cache:
+        removed = cache.prune(max_age * 24 * 60 * 60, everything=everything)
+        cache.close()
+        logger.info(f"Removed {removed} entries from {cache.path}.")
+
+
 def main():
     try:
+        if sys.argv[1:2] and sys.argv[1] in command_subparsers.choices:
+            args = command_parser.parse_args()
+            args.func(args)
+            sys.exit(0)
         args = parser.parse_args()
         asyncio.run(process_files(**args.__dict__))
     except NotImplementedError as e:
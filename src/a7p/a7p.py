@@ -5,35 +5,113 @@ as well as converting between various formats such as JSON and dictionaries.
 Functions:
     loads: Deserializes bytes data into a Payload object and validates it.
     load: Reads a file, deserializes the contents into a Payload object, and validates it.
+    load_mmap: Memory-maps a file, deserializes the contents into a Payload object, and validates it.
+    verify: Checks the MD5 hash of serialized data without parsing it.
+    peek: Reads a few Profile scalars from serialized data without parsing the whole Payload.
     dumps: Serializes a Payload object into bytes, including an MD5 hash.
     dump: Serializes a Payload object and writes it to a file.
     to_json: Converts a Payload object to a JSON string.
     from_json: Converts a JSON string to a Payload object.
     to_dict: Converts a Payload object to a dictionary.
     from_dict: Converts a dictionary to a Payload object.
+    from_dicts: Converts dictionaries to Payload objects.
     validate: Validates a Payload object against proto and spec validation rules.
 """
 
 import hashlib
-import json
-from typing import BinaryIO
-
-from google.protobuf.json_format import MessageToJson, MessageToDict, Parse
+import mmap
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, List, Union, TYPE_CHECKING
 
 from a7p import profedit_pb2
-from a7p import protovalidate
 from a7p import exceptions
-from a7p.spec_validator import validate_spec
+from a7p import wire
+from a7p.tracking import TrackedPayload
+
+# The JSON conversion and the validation stack are imported on first use, so importing a7p stays fast
+
+if TYPE_CHECKING:
+    from a7p.buf.validate import expression_pb2
+    from a7p.cache import PayloadCache
+
+# Any object supporting the buffer protocol
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# Length of the hex-encoded MD5 prefix
+HASH_SIZE = 32
+
+# Size of the chunks read from a file in streaming mode
+CHUNK_SIZE = 64 * 1024
+
+# Default upper bound for the payload body size in streaming mode
+MAX_BODY_SIZE = 1024 * 1024
+
+
+def _is_valid_checksum(view: memoryview) -> bool:
+    """
+    Checks the MD5 prefix of the serialized data against its body without copying the body.
+
+    Args:
+        view (memoryview): A byte view over the serialized data.
+
+    Returns:
+        bool: True if the MD5 prefix matches the body.
+    """
+    with view[HASH_SIZE:] as data:
+        md5_hash = hashlib.md5(data).hexdigest().encode()
+    return view[:HASH_SIZE] == md5_hash
+
+
+def _read_verified(file: BinaryIO, chunk_size: int, max_size: int | None) -> tuple[bytes, bytearray]:
+    """
+    Reads the MD5 prefix and the body from a file, hashing the body incrementally chunk by chunk.
+
+    Args:
+        file (BinaryIO): The file-like object to read from.
+        chunk_size (int): The number of bytes to read at once.
+        max_size (int | None): The maximum allowed body size in bytes, None for no limit.
+
+    Returns:
+        tuple[bytes, bytearray]: The MD5 hash and the verified payload body.
+
+    Raises:
+        A7PChecksumError: If the MD5 hash does not match the data.
+        A7PSizeError: If the body exceeds max_size.
+    """
+    md5_hash = b''
+    while len(md5_hash) < HASH_SIZE:
+        chunk = file.read(HASH_SIZE - len(md5_hash))
+        if not chunk:
+            raise exceptions.A7PChecksumError("Input data is missing for MD5 hashing")
+        md5_hash += chunk
+
+    hasher = hashlib.md5()
+    body = bytearray()
+    while chunk := file.read(chunk_size):
+        if max_size is not None and len(body) + len(chunk) > max_size:
+            raise exceptions.A7PSizeError(f"Payload body exceeds the maximum size of {max_size} bytes")
+        hasher.update(chunk)
+        body += chunk
+
+    if hasher.hexdigest().encode() != md5_hash:
+        raise exceptions.A7PChecksumError("Input data is missing for MD5 hashing")
+    return md5_hash, body
 
 
-def loads(string: bytes, validate_: bool = True, fail_fast: bool = False) -> profedit_pb2.Payload:
+def loads(string: Buffer, validate_: bool = True, fail_fast: bool = False,
+          cache: 'PayloadCache' = None) -> profedit_pb2.Payload:
     """
     Deserializes byte data into a Payload object and validates it.
 
+    The data may be any object supporting the buffer protocol (bytes, bytearray, memoryview, mmap),
+    the body is hashed and parsed in place, without an intermediate copy.
+
     Args:
-        string (bytes): The serialized byte data, with an MD5 hash as a prefix.
+        string (Buffer): The serialized byte data, with an MD5 hash as a prefix.
         validate_ (bool): Flag indicating whether to validate the payload. Default is True.
         fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure. Default is False.
+        cache (PayloadCache, optional): The cache of parsed payloads to use, keyed by the MD5 hash.
 
     Returns:
         profedit_pb2.Payload: The deserialized Payload object.
@@ -42,44 +120,187 @@ def loads(string: bytes, validate_: bool = True, fail_fast: bool = False) -> pro
         A7PChecksumError: If the MD5 hash does not match the data.
         A7PValidationError: If validation fails.
     """
-    data = string[32:]
-    md5_hash = hashlib.md5(data).hexdigest()
-    if md5_hash == string[:32].decode():
+    if cache is not None:
+        return cache.loads(string, validate_, fail_fast)
+    with memoryview(string).cast('B') as view:
+        if not _is_valid_checksum(view):
+            raise exceptions.A7PChecksumError("Input data is missing for MD5 hashing")
         payload = profedit_pb2.Payload()
-        payload.ParseFromString(data)
-        if validate_:
-            validate(payload, fail_fast)
-        return payload
-    else:
-        raise exceptions.A7PChecksumError("Input data is missing for MD5 hashing")
+        with view[HASH_SIZE:] as data:
+            payload.ParseFromString(data)
+    if validate_:
+        validate(payload, fail_fast)
+    return payload
 
 
-def load(file: BinaryIO, validate_: bool = True, fail_fast: bool = False) -> profedit_pb2.Payload:
+def load(file: BinaryIO, validate_: bool = True, fail_fast: bool = False,
+         stream: bool = False, chunk_size: int = CHUNK_SIZE,
+         max_size: int | None = MAX_BODY_SIZE, cache: 'PayloadCache' = None) -> profedit_pb2.Payload:
     """
     Reads a file, deserializes the contents into a Payload object, and validates it.
 
+    In streaming mode the body is read and hashed in chunks of `chunk_size` bytes,
+    so a corrupt or oversized file is rejected before the body is parsed.
+
     Args:
         file (BinaryIO): The file-like object to read from.
         validate_ (bool): Flag indicating whether to validate the payload. Default is True.
         fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure. Default is False.
+        stream (bool): Flag indicating whether to read and verify the file in chunks. Default is False.
+        chunk_size (int): The number of bytes to read at once in streaming mode. Default is CHUNK_SIZE.
+        max_size (int | None): The maximum allowed body size in streaming mode, None for no limit.
+            Default is MAX_BODY_SIZE.
+        cache (PayloadCache, optional): The cache of parsed payloads to use, keyed by the MD5 hash.
 
     Returns:
         profedit_pb2.Payload: The deserialized Payload object.
 
     Raises:
         A7PChecksumError: If the MD5 hash does not match the data.
+        A7PSizeError: If the body exceeds max_size in streaming mode.
         A7PValidationError: If validation fails.
     """
-    string = file.read()
-    return loads(string, validate_, fail_fast)
+    if not stream:
+        string = file.read()
+        return loads(string, validate_, fail_fast, cache)
+
+    md5_hash, body = _read_verified(file, chunk_size, max_size)
+    with memoryview(body) as data:
+        if cache is not None:
+            return cache._get(md5_hash, data, validate_, fail_fast)
+        payload = profedit_pb2.Payload()
+        payload.ParseFromString(data)
+    if validate_:
+        validate(payload, fail_fast)
+    return payload
+
+
+def load_mmap(path: Union[str, os.PathLike], validate_: bool = True, fail_fast: bool = False) -> profedit_pb2.Payload:
+    """
+    Memory-maps a file, deserializes the contents into a Payload object, and validates it.
+
+    Args:
+        path (str | os.PathLike): The path of the file to map.
+        validate_ (bool): Flag indicating whether to validate the payload. Default is True.
+        fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure. Default is False.
+
+    Returns:
+        profedit_pb2.Payload: The deserialized Payload object.
+
+    Raises:
+        A7PChecksumError: If the MD5 hash does not match the data.
+        A7PValidationError: If validation fails.
+    """
+    with open(path, 'rb') as fp:
+        # empty files can't be mapped
+        if os.fstat(fp.fileno()).st_size == 0:
+            return loads(b'', validate_, fail_fast)
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return loads(mm, validate_, fail_fast)
+
+
+def _read_source(source: Union[str, os.PathLike, Buffer]) -> Buffer:
+    """
+    Reads the serialized data from a path, or returns the data itself if a buffer is given.
+
+    Args:
+        source (str | os.PathLike | Buffer): The path of the file or the serialized data.
+
+    Returns:
+        Buffer: The serialized data.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fp:
+            return fp.read()
+    return source
+
+
+def verify(source: Union[str, os.PathLike, Buffer]) -> bool:
+    """
+    Checks the MD5 hash of serialized data without parsing or validating it.
+
+    Args:
+        source (str | os.PathLike | Buffer): The path of the file or the serialized data, with an MD5 hash as a prefix.
+
+    Returns:
+        bool: True if the MD5 hash matches the data.
+    """
+    with memoryview(_read_source(source)).cast('B') as view:
+        return _is_valid_checksum(view)
+
+
+@dataclass
+class ProfileHeader:
+    """
+    A few Profile scalars read directly from the serialized data.
+
+    Attributes:
+        profile_name (str): The profile name.
+        caliber (str): The caliber name.
+        zero_x (int): The zeroing h-clicks.
+        zero_y (int): The zeroing v-clicks.
+        c_muzzle_velocity (int): The muzzle velocity.
+    """
+    profile_name: str = ""
+    caliber: str = ""
+    zero_x: int = 0
+    zero_y: int = 0
+    c_muzzle_velocity: int = 0
+
+
+# Maps Profile field numbers to the ProfileHeader attributes
+_HEADER_FIELDS = {
+    profedit_pb2.Profile.DESCRIPTOR.fields_by_name[name].number: name
+    for name in ProfileHeader.__dataclass_fields__
+}
+_PAYLOAD_PROFILE_NUMBER = profedit_pb2.Payload.DESCRIPTOR.fields_by_name['profile'].number
+
+
+def peek(source: Union[str, os.PathLike, Buffer], verify_: bool = False) -> ProfileHeader:
+    """
+    Reads a few Profile scalars from serialized data by scanning the wire format,
+    the repeated fields (distances, coef_rows, switches) are skipped without being decoded.
 
+    Args:
+        source (str | os.PathLike | Buffer): The path of the file or the serialized data, with an MD5 hash as a prefix.
+        verify_ (bool): Flag indicating whether to check the MD5 hash first. Default is False.
+
+    Returns:
+        ProfileHeader: The Profile scalars.
 
-def dumps(payload: profedit_pb2.Payload, validate_: bool = True, fail_fast: bool = False) -> bytes:
+    Raises:
+        A7PChecksumError: If verify_ is set and the MD5 hash does not match the data.
+        A7PDataError: If the data is malformed.
+    """
+    header = ProfileHeader()
+    with memoryview(_read_source(source)).cast('B') as view:
+        if verify_ and not _is_valid_checksum(view):
+            raise exceptions.A7PChecksumError("Input data is missing for MD5 hashing")
+        for number, wire_type, _, start, end in wire.iter_fields(view, HASH_SIZE):
+            if number != _PAYLOAD_PROFILE_NUMBER or wire_type != wire.WIRE_LEN:
+                continue
+            for field_number, field_type, value, field_start, field_end in wire.iter_fields(view, start, end):
+                name = _HEADER_FIELDS.get(field_number)
+                if name is None:
+                    continue
+                if field_type == wire.WIRE_LEN:
+                    try:
+                        setattr(header, name, str(view[field_start:field_end], 'utf-8'))
+                    except UnicodeDecodeError as err:
+                        raise exceptions.A7PDataError(f"Malformed protobuf data: {err}") from err
+                elif field_type == wire.WIRE_VARINT:
+                    setattr(header, name, wire.to_int32(value))
+    return header
+
+
+def dumps(payload: Union[profedit_pb2.Payload, TrackedPayload], validate_: bool = True,
+          fail_fast: bool = False) -> bytes:
     """
     Serializes a Payload object into bytes, including an MD5 hash.
 
     Args:
-        payload (profedit_pb2.Payload): The Payload object to serialize.
+        payload (Union[profedit_pb2.Payload, TrackedPayload]): The Payload object to serialize,
+            a tracked payload is only checked against the rules depending on its modified fields.
         validate_ (bool): Flag indicating whether to validate the payload. Default is True.
         fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure. Default is False.
 
@@ -91,17 +312,18 @@ def dumps(payload: profedit_pb2.Payload, validate_: bool = True, fail_fast: bool
     """
     if validate_:
         validate(payload, fail_fast)
-    data = payload.SerializeToString()
+    data = payload.serialize() if isinstance(payload, TrackedPayload) else payload.SerializeToString()
     md5_hash = hashlib.md5(data).hexdigest().encode()
     return md5_hash + data
 
 
-def dump(payload: profedit_pb2.Payload, file: BinaryIO, validate_: bool = True, fail_fast: bool = False) -> None:
+def dump(payload: Union[profedit_pb2.Payload, TrackedPayload], file: BinaryIO, validate_: bool = True,
+         fail_fast: bool = False) -> None:
     """
     Serializes a Payload object and writes it to a file.
 
     Args:
-        payload (profedit_pb2.Payload): The Payload object to serialize.
+        payload (Union[profedit_pb2.Payload, TrackedPayload]): The Payload object to serialize.
         file (BinaryIO): The file-like object to write to.
         validate_ (bool): Flag indicating whether to validate the payload. Default is True.
         fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure. Default is False.
@@ -126,9 +348,9 @@ def to_json(payload: profedit_pb2.Payload) -> str:
     Returns:
         str: The JSON string representation of the Payload object.
     """
-    return MessageToJson(payload,
-                         including_default_value_fields=True,
-                         preserving_proto_field_name=True)
+    from a7p import convert
+
+    return convert.message_to_json(payload)
 
 
 def from_json(json_data: str) -> profedit_pb2.Payload:
@@ -141,6 +363,8 @@ def from_json(json_data: str) -> profedit_pb2.Payload:
     Returns:
         profedit_pb2.Payload: The deserialized Payload object.
     """
+    from google.protobuf.json_format import Parse
+
     return Parse(json_data, profedit_pb2.Payload())
 
 
@@ -154,9 +378,9 @@ def to_dict(payload: profedit_pb2.Payload) -> dict:
     Returns:
         dict: The dictionary representation of the Payload object.
     """
-    return MessageToDict(payload,
-                         including_default_value_fields=True,
-                         preserving_proto_field_name=True)
+    from a7p import convert
+
+    return convert.message_to_dict(payload)
 
 
 def from_dict(data: dict) -> profedit_pb2.Payload:
@@ -168,24 +392,49 @@ def from_dict(data: dict) -> profedit_pb2.Payload:
 
     Returns:
         profedit_pb2.Payload: The deserialized Payload object.
+
+    Raises:
+        ParseError: If the dictionary does not describe a Payload, e.g. it has unknown fields.
     """
-    return Parse(json.dumps(data), profedit_pb2.Payload())
+    from a7p import convert
 
+    return convert.dict_to_message(data, profedit_pb2.Payload())
 
-def validate(payload: profedit_pb2.Payload, fail_fast: bool = False) -> None:
+
+def from_dicts(data: Iterable[dict]) -> List[profedit_pb2.Payload]:
     """
-    Validates a Payload object against proto and spec validation rules.
+    Converts dictionaries to Payload objects.
 
     Args:
-        payload (profedit_pb2.Payload): The Payload object to validate.
-        fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure. Default is False.
+        data (Iterable[dict]): The dictionaries to convert.
 
     Returns:
-        None
+        List[profedit_pb2.Payload]: The deserialized Payload objects, in input order.
 
     Raises:
-        A7PProtoValidationError: If there are proto validation errors.
-        A7PSpecValidationError: If there are spec validation errors.
+        ParseError: If a dictionary does not describe a Payload, e.g. it has unknown fields.
+    """
+    from a7p import convert
+
+    to_message = convert.dict_to_message
+    payload_class = profedit_pb2.Payload
+    return [to_message(item, payload_class()) for item in data]
+
+
+def _raise_for_violations(payload: profedit_pb2.Payload, proto_violations: 'expression_pb2.Violations',
+                          spec_violations: List['exceptions.SpecViolation'], fail_fast: bool = False) -> None:
+    """
+    Raises the validation error of the proto and spec violations found in a payload, if any.
+
+    Args:
+        payload (profedit_pb2.Payload): The validated Payload object.
+        proto_violations (expression_pb2.Violations): The proto violations.
+        spec_violations (List[SpecViolation]): The spec violations.
+        fail_fast (bool): Whether to raise the error of the first kind of violations only. Default is False.
+
+    Raises:
+        A7PProtoValidationError: If there are proto violations and fail_fast is set.
+        A7PSpecValidationError: If there are spec violations and fail_fast is set.
         A7PValidationError: If there are any violations.
     """
     violations = {
@@ -194,13 +443,11 @@ def validate(payload: profedit_pb2.Payload, fail_fast: bool = False) -> None:
 
     is_errors = False
 
-    try:
-        protovalidate.validate(payload)
-    except protovalidate.ValidationError as err:
+    if proto_violations.violations:
         proto_error = exceptions.A7PProtoValidationError(
             "Proto validation error",
             payload,
-            err.violations
+            proto_violations
         )
         if fail_fast:
             raise proto_error
@@ -214,9 +461,8 @@ def validate(payload: profedit_pb2.Payload, fail_fast: bool = False) -> None:
             )
         )
 
-    try:
-        validate_spec(payload)
-    except exceptions.A7PSpecValidationError as err:
+    if spec_violations:
+        err = exceptions.A7PSpecValidationError("Spec Validation Error", payload, spec_violations)
         if fail_fast:
             raise err
         is_errors = True
@@ -240,14 +486,59 @@ def validate(payload: profedit_pb2.Payload, fail_fast: bool = False) -> None:
         )
 
 
+def validate(payload: Union[profedit_pb2.Payload, TrackedPayload], fail_fast: bool = False) -> None:
+    """
+    Validates a Payload object against proto and spec validation rules.
+
+    A tracked payload which passed validation before is only checked against the rules depending
+    on the fields modified since, and validated in full if any of them fails.
+
+    Args:
+        payload (Union[profedit_pb2.Payload, TrackedPayload]): The Payload object to validate.
+        fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure. Default is False.
+
+    Returns:
+        None
+
+    Raises:
+        A7PProtoValidationError: If there are proto validation errors.
+        A7PSpecValidationError: If there are spec validation errors.
+        A7PValidationError: If there are any violations.
+    """
+    from a7p import scheduling, validation_plan
+
+    tracked = None
+    if isinstance(payload, TrackedPayload):
+        if payload.check_changes():
+            return
+        tracked, payload = payload, payload.payload
+
+    if fail_fast:
+        # the rules run by expected cost until the first one reporting a violation
+        proto_violations, spec_violations = scheduling.first_violation(payload)
+    else:
+        # proto and spec rules are checked together in a single pass over the payload
+        proto_violations, spec_violations = validation_plan.check(payload)
+
+    _raise_for_violations(payload, proto_violations, spec_violations, fail_fast)
+
+    if tracked is not None:
+        tracked.mark_valid()
+
+
 __all__ = (
     'loads',
     'dumps',
     'load',
+    'load_mmap',
+    'verify',
+    'peek',
+    'ProfileHeader',
     'dump',
     'from_json',
     'to_json',
     'from_dict',
+    'from_dicts',
     'to_dict',
     'validate',
 )
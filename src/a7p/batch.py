@@ -0,0 +1,259 @@
+"""
+This module provides batch entry points loading and validating many .a7p payloads in parallel.
+
+Work is dispatched in chunks to a pool of worker processes (or threads). The validation rules are
+compiled before the pool starts, and each process warms them up once on start and reuses them
+for every chunk it gets.
+Payloads cross the process boundary in their serialized form.
+
+Classes:
+    BatchResult: The outcome of loading or validating a single payload.
+
+Functions:
+    load_many: Loads and optionally validates .a7p files in parallel.
+    validate_many: Validates Payload objects in parallel.
+
+Usage Example:
+    for result in a7p.load_many(paths, workers=8):
+        if result.error:
+            print(result.source, result.error)
+"""
+
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Literal, Tuple
+
+from google.protobuf.message import DecodeError
+
+from a7p import profedit_pb2, exceptions, protovalidate
+from a7p.a7p import load, validate
+from a7p.factory import A7PFactory
+
+ExecutorKind = Literal["process", "thread"]
+
+# Default number of payloads sent to a worker at once
+CHUNK_SIZE = 16
+
+# Errors reported per payload instead of being raised from the iterator
+_PAYLOAD_ERRORS = (OSError, DecodeError, exceptions.A7PError)
+
+# A worker result: the source, the payload (serialized when crossing a process boundary) and the error
+_Record = Tuple[Any, profedit_pb2.Payload | bytes | None, Exception | None]
+
+
+@dataclass
+class BatchResult:
+    """
+    The outcome of loading or validating a single payload.
+
+    Attributes:
+        source (Any): The file path for load_many, the input position for validate_many.
+        payload (profedit_pb2.Payload | None): The payload, None if it could not be loaded.
+        error (Exception | None): The error raised for the payload, None on success.
+    """
+    source: Any
+    payload: profedit_pb2.Payload | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        """
+        Returns True if the payload was loaded (and validated) without errors.
+
+        Returns:
+            bool: True on success.
+        """
+        return self.error is None
+
+
+def _warm_up() -> None:
+    """
+    Compiles the validation rules of the worker process by validating a default payload.
+    """
+    try:
+        validate(A7PFactory())
+    except exceptions.A7PValidationError:
+        pass
+
+
+def _load_chunk(paths: List[Any], validate_: bool, fail_fast: bool, serialize: bool) -> List[_Record]:
+    """
+    Loads a chunk of files in a worker.
+
+    Args:
+        paths (List[Any]): The file paths.
+        validate_ (bool): Flag indicating whether to validate the payloads.
+        fail_fast (bool): Flag indicating whether to stop validation on the first violation.
+        serialize (bool): Flag indicating whether to return the payloads serialized.
+
+    Returns:
+        List[_Record]: The results in input order.
+    """
+    records = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as fp:
+                payload = load(fp, validate_, fail_fast)
+        except _PAYLOAD_ERRORS as err:
+            records.append((path, None, err))
+        else:
+            records.append((path, payload.SerializeToString() if serialize else payload, None))
+    return records
+
+
+def _validate_chunk(items: List[Tuple[int, profedit_pb2.Payload | bytes]], fail_fast: bool) -> List[_Record]:
+    """
+    Validates a chunk of payloads in a worker.
+
+    Args:
+        items (List[Tuple[int, profedit_pb2.Payload | bytes]]): The input positions and the payloads,
+            serialized when crossing a process boundary.
+        fail_fast (bool): Flag indicating whether to stop validation on the first violation.
+
+    Returns:
+        List[_Record]: The results in input order, without the payloads.
+    """
+    records = []
+    for index, payload in items:
+        try:
+            if isinstance(payload, bytes):
+                payload = profedit_pb2.Payload.FromString(payload)
+            validate(payload, fail_fast)
+        except _PAYLOAD_ERRORS as err:
+            records.append((index, None, err))
+        else:
+            records.append((index, None, None))
+    return records
+
+
+def _create_executor(executor: ExecutorKind, workers: int) -> Executor:
+    """
+    Creates the worker pool.
+
+    Args:
+        executor (ExecutorKind): "process" or "thread".
+        workers (int): The number of workers.
+
+    Returns:
+        Executor: The worker pool.
+
+    Raises:
+        ValueError: If the executor kind is unknown.
+    """
+    if executor == "process":
+        # forked workers inherit the compiled rules, spawned ones load them from the compile cache
+        protovalidate.warmup()
+        return ProcessPoolExecutor(workers, initializer=_warm_up)
+    if executor == "thread":
+        return ThreadPoolExecutor(workers)
+    raise ValueError(f"Unknown executor: {executor!r}, expected 'process' or 'thread'")
+
+
+def _run_chunks(pool: Executor, func: Callable[..., List[_Record]], items: Iterable[Any],
+                chunk_size: int, max_pending: int, *args: Any) -> Iterator[_Record]:
+    """
+    Submits the items to the pool in chunks, keeping at most max_pending chunks in flight,
+    and yields the records as the chunks complete.
+
+    Args:
+        pool (Executor): The worker pool.
+        func (Callable[..., List[_Record]]): The chunk function.
+        items (Iterable[Any]): The items to process.
+        chunk_size (int): The number of items per chunk.
+        max_pending (int): The maximum number of chunks in flight.
+        *args (Any): Extra arguments of the chunk function.
+
+    Yields:
+        _Record: The worker results in completion order.
+    """
+    items = iter(items)
+    pending: set[Future] = set()
+    try:
+        while True:
+            while len(pending) < max_pending and (chunk := list(islice(items, chunk_size))):
+                pending.add(pool.submit(func, chunk, *args))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def load_many(paths: Iterable[str | os.PathLike], validate_: bool = True, fail_fast: bool = False,
+              workers: int = None, executor: ExecutorKind = "process",
+              chunk_size: int = CHUNK_SIZE) -> Iterator[BatchResult]:
+    """
+    Loads and optionally validates .a7p files in parallel.
+
+    Files are read in the workers, the results are yielded as soon as their chunk completes,
+    so their order may differ from the input order.
+
+    Args:
+        paths (Iterable[str | os.PathLike]): The file paths.
+        validate_ (bool): Flag indicating whether to validate the payloads. Default is True.
+        fail_fast (bool): Flag indicating whether to stop validation on the first violation. Default is False.
+        workers (int, optional): The number of workers. Default is the CPU count.
+        executor (ExecutorKind): "process" (default) or "thread".
+        chunk_size (int): The number of files sent to a worker at once. Default is CHUNK_SIZE.
+
+    Yields:
+        BatchResult: The result for every file, in completion order.
+
+    Raises:
+        ValueError: If the executor kind is unknown.
+    """
+    serialize = executor == "process"
+    workers = workers or os.cpu_count() or 1
+    with _create_executor(executor, workers) as pool:
+        max_pending = 2 * workers
+        for path, payload, error in _run_chunks(pool, _load_chunk, paths, chunk_size, max_pending,
+                                                validate_, fail_fast, serialize):
+            if isinstance(payload, bytes):
+                payload = profedit_pb2.Payload.FromString(payload)
+            yield BatchResult(path, payload, error)
+
+
+def validate_many(payloads: Iterable[profedit_pb2.Payload], fail_fast: bool = False,
+                  workers: int = None, executor: ExecutorKind = "process",
+                  chunk_size: int = CHUNK_SIZE) -> Iterator[BatchResult]:
+    """
+    Validates Payload objects in parallel.
+
+    Args:
+        payloads (Iterable[profedit_pb2.Payload]): The payloads to validate.
+        fail_fast (bool): Flag indicating whether to stop validation on the first violation. Default is False.
+        workers (int, optional): The number of workers. Default is the CPU count.
+        executor (ExecutorKind): "process" (default) or "thread".
+        chunk_size (int): The number of payloads sent to a worker at once. Default is CHUNK_SIZE.
+
+    Yields:
+        BatchResult: The result for every payload, in completion order,
+            with its position in the input as the source.
+
+    Raises:
+        ValueError: If the executor kind is unknown.
+    """
+    originals = {}
+
+    def items():
+        for index, payload in enumerate(payloads):
+            originals[index] = payload
+            yield index, payload.SerializeToString() if executor == "process" else payload
+
+    workers = workers or os.cpu_count() or 1
+    with _create_executor(executor, workers) as pool:
+        max_pending = 2 * workers
+        for index, _, error in _run_chunks(pool, _validate_chunk, items(), chunk_size, max_pending, fail_fast):
+            yield BatchResult(index, originals.pop(index), error)
+
+
+__all__ = (
+    'BatchResult',
+    'load_many',
+    'validate_many',
+)
@@ -0,0 +1,552 @@
+"""
+This module provides content-addressed caches for .a7p data.
+
+Every .a7p file carries the MD5 hash of its body in its first 32 bytes, the caches use
+that hash as the content key, so repeated loads of identical content skip parsing and
+reuse the validation outcome.
+
+Classes:
+    PayloadCache: An in-memory LRU cache of payload bodies and their validation outcomes.
+    CachedVerdict: A validation verdict restored from the on-disk cache.
+    ValidationCache: A persistent SQLite-backed cache of validation verdicts.
+
+Functions:
+    default_cache_dir: Returns the directory for the persistent caches.
+    rules_fingerprint: Returns a fingerprint of the proto and spec validation rules.
+
+Usage Example:
+    cache = PayloadCache(max_entries=1024, max_bytes=16 * 1024 * 1024)
+    payload = a7p.loads(data, cache=cache)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import types
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from importlib import metadata
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Set, Union
+
+from a7p import profedit_pb2, exceptions
+from a7p.a7p import Buffer, HASH_SIZE, _is_valid_checksum, validate
+from a7p.logger import logger
+
+try:
+    __version__ = metadata.version("a7p")
+except metadata.PackageNotFoundError:
+    __version__ = "undefined version"
+
+
+@dataclass
+class _CacheEntry:
+    """
+    A cached payload body.
+
+    Attributes:
+        data (bytes): The serialized payload body, parsed again for every load.
+        outcomes (Dict[bool, Optional[A7PValidationError]]): The validation outcomes by fail_fast flag,
+            the errors referring to no payload.
+        lock (threading.Lock): The lock held while an outcome is computed, so it is computed once.
+    """
+    data: bytes
+    outcomes: Dict[bool, Optional[exceptions.A7PValidationError]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def size(self) -> int:
+        """
+        Returns:
+            int: The size of the payload body in bytes.
+        """
+        return len(self.data)
+
+
+class PayloadCache:
+    """
+    An LRU cache of payload bodies keyed by the MD5 hash embedded in the serialized data,
+    evicting the least recently used entries above the entries count or the byte budget.
+
+    The verified body is kept and parsed again for every load, so callers always get their own
+    payload and are free to modify it, and the checksum and the validation are not run again.
+
+    Attributes:
+        max_entries (int): The maximum number of cached payloads.
+        max_bytes (int): The maximum total size of the cached payload bodies.
+        hits (int): The number of loads served from the cache.
+        misses (int): The number of loads that had to parse the data.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_entries (int): The maximum number of cached payloads. Default is 1024.
+            max_bytes (int): The maximum total size of the cached payload bodies. Default is 16 MiB.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, _CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._entries
+
+    @property
+    def size(self) -> int:
+        """
+        Returns:
+            int: The total size of the cached payload bodies.
+        """
+        return self._bytes
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def loads(self, string: Buffer, validate_: bool = True, fail_fast: bool = False) -> profedit_pb2.Payload:
+        """
+        Deserializes byte data into a Payload object and validates it, reusing the cached result for known content.
+
+        Args:
+            string (Buffer): The serialized byte data, with an MD5 hash as a prefix.
+            validate_ (bool): Flag indicating whether to validate the payload. Default is True.
+            fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure.
+                Default is False.
+
+        Returns:
+            profedit_pb2.Payload: A Payload object of its own.
+
+        Raises:
+            A7PChecksumError: If the MD5 hash does not match the data.
+            A7PValidationError: If validation fails.
+        """
+        with memoryview(string).cast('B') as view:
+            if not _is_valid_checksum(view):
+                raise exceptions.A7PChecksumError("Input data is missing for MD5 hashing")
+            with view[HASH_SIZE:] as data:
+                return self._get(bytes(view[:HASH_SIZE]), data, validate_, fail_fast)
+
+    def load(self, file: BinaryIO, validate_: bool = True, fail_fast: bool = False) -> profedit_pb2.Payload:
+        """
+        Reads a file, deserializes the contents into a Payload object and validates it,
+        reusing the cached result for known content.
+
+        Args:
+            file (BinaryIO): The file-like object to read from.
+            validate_ (bool): Flag indicating whether to validate the payload. Default is True.
+            fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure.
+                Default is False.
+
+        Returns:
+            profedit_pb2.Payload: A Payload object of its own.
+
+        Raises:
+            A7PChecksumError: If the MD5 hash does not match the data.
+            A7PValidationError: If validation fails.
+        """
+        return self.loads(file.read(), validate_, fail_fast)
+
+    def _get(self, key: bytes, data: memoryview, validate_: bool, fail_fast: bool) -> profedit_pb2.Payload:
+        """
+        Parses a verified body, caching it on a miss, and validates it or reuses its cached validation outcome.
+
+        Args:
+            key (bytes): The verified MD5 hash of the body.
+            data (memoryview): The payload body.
+            validate_ (bool): Flag indicating whether to validate the payload.
+            fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure.
+
+        Returns:
+            profedit_pb2.Payload: The parsed Payload object.
+
+        Raises:
+            A7PValidationError: If validation fails.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            else:
+                self.misses += 1
+
+        if entry is None:
+            entry = _CacheEntry(bytes(data))
+            self._put(key, entry)
+
+        payload = profedit_pb2.Payload.FromString(entry.data)
+
+        if validate_:
+            with entry.lock:
+                if fail_fast not in entry.outcomes:
+                    try:
+                        validate(payload, fail_fast)
+                    except exceptions.A7PValidationError as err:
+                        # the cached error must not keep the payload of this caller
+                        entry.outcomes[fail_fast] = exceptions._restore_error(
+                            type(err), err.args, {**err.__dict__, 'payload': None})
+                    else:
+                        entry.outcomes[fail_fast] = None
+                error = entry.outcomes[fail_fast]
+            if error is not None:
+                # the raised error refers to the payload of the caller
+                raise exceptions._restore_error(type(error), error.args, {**error.__dict__, 'payload': payload})
+        return payload
+
+    def _put(self, key: bytes, entry: _CacheEntry) -> None:
+        """
+        Stores an entry and evicts the least recently used ones above the limits.
+
+        Args:
+            key (bytes): The MD5 hash of the body.
+            entry (_CacheEntry): The entry to store.
+        """
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns the directory for the persistent caches, `$A7P_CACHE_DIR` if set,
+    otherwise `a7p` under `$XDG_CACHE_HOME` or `~/.cache`.
+
+    Returns:
+        Path: The cache directory.
+    """
+    if os.environ.get("A7P_CACHE_DIR"):
+        return Path(os.environ["A7P_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "a7p"
+
+
+def _hash_function(hasher: 'hashlib._Hash', func: Any, seen: Set[int]) -> None:
+    """
+    Feeds a validation function to a hasher: its code with the constants, the values of its closure,
+    its declared assertion, and the functions and validators of its module it uses, such as the
+    assertion helpers.
+    """
+    from a7p.spec_validator import SpecValidator
+
+    if id(func) in seen:
+        return
+    seen.add(id(func))
+    hasher.update(getattr(func, '__qualname__', repr(func)).encode())
+    assertion = getattr(func, 'assertion', None)
+    if assertion is not None:
+        _hash_value(hasher, assertion, seen)
+    code = getattr(func, '__code__', None)
+    if code is None:
+        hasher.update(repr(func).encode())
+        return
+    _hash_code(hasher, code)
+    for cell in func.__closure__ or ():
+        try:
+            _hash_value(hasher, cell.cell_contents, seen)
+        except ValueError:  # empty cell
+            pass
+    module = getattr(func, '__module__', None)
+    for name in _code_names(code):
+        value = func.__globals__.get(name)
+        if isinstance(value, SpecValidator):
+            _hash_validator(hasher, value, seen)
+        elif callable(value) and getattr(value, '__module__', None) == module:
+            _hash_function(hasher, value, seen)
+
+
+def _hash_validator(hasher: 'hashlib._Hash', validator: 'SpecValidator', seen: Set[int]) -> None:
+    """Feeds the criteria of a spec validator to a hasher, including the nested validators they use."""
+    if id(validator) in seen:
+        return
+    seen.add(id(validator))
+    for key, criterion in sorted(validator.criteria.items()):
+        hasher.update(key.encode())
+        _hash_function(hasher, criterion.validation_func, seen)
+
+
+def _hash_value(hasher: 'hashlib._Hash', value: Any, seen: Set[int]) -> None:
+    """Feeds a closure value or an assertion declaration to a hasher."""
+    if isinstance(value, tuple):
+        for item in value:
+            _hash_value(hasher, item, seen)
+    elif hasattr(value, '__code__'):
+        _hash_function(hasher, value, seen)
+    else:
+        hasher.update(repr(value).encode())
+
+
+def _hash_code(hasher: 'hashlib._Hash', code: types.CodeType) -> None:
+    """Feeds a code object to a hasher, with its constants and names, and its nested code objects."""
+    hasher.update(code.co_code)
+    hasher.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(hasher, const)
+        else:
+            hasher.update(repr(const).encode())
+
+
+def _code_names(code: types.CodeType) -> Iterator[str]:
+    """Yields the global names read by a code object and its nested code objects."""
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield from _code_names(const)
+
+
+def rules_fingerprint() -> str:
+    """
+    Returns a fingerprint of the validation rules, covering the proto constraints embedded in the
+    profedit descriptors and the registered spec criteria, so cached verdicts expire when either changes.
+
+    A criterion is fingerprinted by the code of its validation function, with the constants, the values
+    of the closure and the declared assertion, and by the functions and nested validators of its module
+    it uses.
+
+    Returns:
+        str: The hex-encoded fingerprint.
+    """
+    from a7p.spec_validator import _default_validator
+
+    hasher = hashlib.md5(profedit_pb2.DESCRIPTOR.serialized_pb)
+    _hash_validator(hasher, _default_validator, set())
+    return hasher.hexdigest()
+
+
+@dataclass
+class CachedVerdict:
+    """
+    A validation verdict restored from the on-disk cache.
+
+    Attributes:
+        valid (bool): Whether the payload passed validation.
+        error (A7PValidationError | None): The restored validation error, without a payload.
+    """
+    valid: bool
+    error: Optional[exceptions.A7PValidationError] = None
+
+
+# Violation kinds as stored in the on-disk cache
+_VIOLATION_KINDS = {
+    'violations': exceptions.Violation,
+    'proto_violations': exceptions.ProtoViolation,
+    'spec_violations': exceptions.SpecViolation,
+}
+
+# Seconds a stored access time is kept before a hit records it again
+_ACCESS_RESOLUTION = 60 * 60
+
+
+class ValidationCache:
+    """
+    A persistent SQLite-backed cache of validation verdicts and violation lists, keyed by
+    (MD5 hash, a7p version, rules fingerprint, fail_fast flag).
+
+    The instance can be shared between threads, every process should open its own instance.
+    The database is in WAL mode, so processes read it while another one writes. Database errors
+    in `get` and `put` are logged and handled as a cache miss.
+
+    Attributes:
+        path (Path): The path of the SQLite database.
+        version (str): The a7p version of the stored verdicts.
+        fingerprint (str): The rules fingerprint of the stored verdicts.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike] = None):
+        """
+        Opens or creates the cache database.
+
+        Args:
+            path (str | os.PathLike, optional): The path of the SQLite database.
+                Default is `validation.sqlite3` in the default cache directory.
+
+        Raises:
+            sqlite3.Error: If the database can't be opened.
+            OSError: If the cache directory can't be created.
+        """
+        self.path = Path(path) if path is not None else default_cache_dir() / "validation.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.version = __version__
+        self.fingerprint = rules_fingerprint()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "md5 TEXT NOT NULL, version TEXT NOT NULL, fingerprint TEXT NOT NULL, fail_fast INTEGER NOT NULL, "
+                "valid INTEGER NOT NULL, violations TEXT NOT NULL, accessed REAL NOT NULL, "
+                "PRIMARY KEY (md5, version, fingerprint, fail_fast))"
+            )
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def get(self, md5_hash: str, fail_fast: bool = False) -> Optional[CachedVerdict]:
+        """
+        Looks up the stored verdict for the payload with the given MD5 hash.
+
+        The access time of the verdict is only written when the stored one is older than an hour,
+        so most hits don't write to the database.
+
+        Args:
+            md5_hash (str): The verified MD5 hash of the payload body.
+            fail_fast (bool): The fail_fast flag the payload was validated with. Default is False.
+
+        Returns:
+            CachedVerdict | None: The stored verdict, or None if not cached or the database failed.
+        """
+        key = (md5_hash, self.version, self.fingerprint, int(fail_fast))
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT valid, violations, accessed FROM verdicts "
+                    "WHERE md5 = ? AND version = ? AND fingerprint = ? AND fail_fast = ?", key
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[2] > _ACCESS_RESOLUTION:
+                    self._conn.execute(
+                        "UPDATE verdicts SET accessed = ? "
+                        "WHERE md5 = ? AND version = ? AND fingerprint = ? AND fail_fast = ?", (now, *key)
+                    )
+        except sqlite3.Error as e:
+            logger.debug(f"The cached verdict of {md5_hash} is unavailable: {e}")
+            return None
+        valid, violations, _ = row
+        if valid:
+            return CachedVerdict(True)
+        return CachedVerdict(False, self._restore_error(json.loads(violations)))
+
+    def put(self, md5_hash: str, error: Optional[exceptions.A7PValidationError], fail_fast: bool = False) -> None:
+        """
+        Stores the verdict for the payload with the given MD5 hash.
+
+        Args:
+            md5_hash (str): The verified MD5 hash of the payload body.
+            error (A7PValidationError | None): The validation error, or None if the payload is valid.
+            fail_fast (bool): The fail_fast flag the payload was validated with. Default is False.
+                The verdict is not stored if the database fails.
+        """
+        violations = self._dump_error(error) if error is not None else {}
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (md5_hash, self.version, self.fingerprint, int(fail_fast),
+                     int(error is None), json.dumps(violations), time.time())
+                )
+        except sqlite3.Error as e:
+            logger.debug(f"The verdict of {md5_hash} was not cached: {e}")
+
+    def prune(self, max_age: float | None = None, everything: bool = False) -> int:
+        """
+        Removes the verdicts stored by other a7p versions or rules, and the stale ones.
+
+        Args:
+            max_age (float | None): Remove verdicts not accessed for this many seconds, None to keep them.
+            everything (bool): Remove all verdicts. Default is False.
+
+        Returns:
+            int: The number of removed verdicts.
+        """
+        with self._lock, self._conn:
+            if everything:
+                cursor = self._conn.execute("DELETE FROM verdicts")
+            else:
+                oldest = time.time() - max_age if max_age is not None else float("-inf")
+                cursor = self._conn.execute(
+                    "DELETE FROM verdicts WHERE version != ? OR fingerprint != ? OR accessed < ?",
+                    (self.version, self.fingerprint, oldest)
+                )
+            removed = cursor.rowcount
+        with self._lock:
+            self._conn.execute("VACUUM")
+        return removed
+
+    @staticmethod
+    def _dump_error(error: exceptions.A7PValidationError) -> dict:
+        """
+        Converts a validation error to JSON-compatible data.
+
+        Args:
+            error (A7PValidationError): The validation error.
+
+        Returns:
+            dict: The error class name, the error arguments and the violations by kind.
+        """
+        data = {'class': type(error).__name__, 'args': [str(arg) for arg in error.args]}
+        for kind in _VIOLATION_KINDS:
+            data[kind] = [
+                {
+                    'path': v.path.as_posix() if isinstance(v.path, Path) else v.path,
+                    'is_path': isinstance(v.path, Path),
+                    # only the values the violation can print are kept
+                    'value': v.value if isinstance(v.value, (str, int, float, bool)) else None,
+                    'reason': v.reason,
+                }
+                for v in getattr(error, kind)
+            ]
+        return data
+
+    @staticmethod
+    def _restore_error(data: dict) -> exceptions.A7PValidationError:
+        """
+        Restores a validation error from the stored data.
+
+        Args:
+            data (dict): The error class name, the error arguments and the violations by kind.
+
+        Returns:
+            A7PValidationError: The validation error of the stored class, without a payload.
+        """
+        cls = getattr(exceptions, data.get('class', ''), None)
+        if not (isinstance(cls, type) and issubclass(cls, exceptions.A7PValidationError)):
+            cls = exceptions.A7PValidationError
+        violations = {
+            kind: [
+                violation_class(Path(v['path']) if v['is_path'] else v['path'], v['value'], v['reason'])
+                for v in data.get(kind, [])
+            ]
+            for kind, violation_class in _VIOLATION_KINDS.items()
+        }
+        args = tuple(data.get('args', ("Validation error",)))
+        return exceptions._restore_error(cls, args, {'payload': None, **violations})
+
+
+__all__ = (
+    'PayloadCache',
+    'CachedVerdict',
+    'ValidationCache',
+    'default_cache_dir',
+    'rules_fingerprint',
+)
@@ -0,0 +1,513 @@
+"""
+This module provides specialized converters between protobuf messages and dictionaries or JSON.
+
+The converters are built once per message type from its descriptor and produce the same
+output as `google.protobuf.json_format.MessageToDict` / `MessageToJson` called with
+`including_default_value_fields=True` and `preserving_proto_field_name=True`,
+and accept the same input as `google.protobuf.json_format.ParseDict`,
+without walking the descriptors reflectively for every converted message.
+
+Functions:
+    message_to_dict: Converts a message to a dictionary.
+    message_to_json: Converts a message to a JSON string.
+    value_converter: Returns the converter of a single field value to its dictionary form.
+    list_converter: Returns the converter of a repeated field value to its dictionary form.
+    dict_to_message: Merges a dictionary into a message.
+"""
+
+import base64
+import json
+import math
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+from google.protobuf import descriptor, json_format, message as _message
+from google.protobuf.internal import type_checkers
+
+_Converter = Callable[[Any], Any]
+_FD = descriptor.FieldDescriptor
+
+_INT64_TYPES = (_FD.CPPTYPE_INT64, _FD.CPPTYPE_UINT64)
+_INT_TYPES = (_FD.CPPTYPE_INT32, _FD.CPPTYPE_UINT32, *_INT64_TYPES)
+_FLOAT_TYPES = (_FD.CPPTYPE_FLOAT, _FD.CPPTYPE_DOUBLE)
+
+# The largest finite 4 byte float
+_FLOAT_MAX = float.fromhex('0x1.fffffep+127')
+# The special float values json_format accepts as strings
+_FLOAT_NAMES = {'Infinity': math.inf, '-Infinity': -math.inf, 'NaN': math.nan}
+_UNPAIRED_SURROGATE = re.compile(r'[\ud800-\udbff](?![\udc00-\udfff])|(?<![\ud800-\udbff])[\udc00-\udfff]')
+
+# Field kinds of the dictionary parsers
+_SCALAR = 0
+_MESSAGE = 1
+_REPEATED_SCALAR = 2
+_REPEATED_MESSAGE = 3
+
+_converters: Dict[descriptor.Descriptor, Callable[[_message.Message], dict]] = {}
+
+# (field, kind, fast scalar converter) by JSON and proto field name
+_ParserField = Tuple[descriptor.FieldDescriptor, int, Callable[[Any], Any] | None]
+_parsers: Dict[descriptor.Descriptor, Dict[str, _ParserField] | None] = {}
+
+
+def _float_to_json(value: float, is_float: bool) -> Any:
+    """
+    Converts a floating point value the same way json_format does.
+
+    Args:
+        value (float): The value to convert.
+        is_float (bool): True for 4 byte float fields, False for doubles.
+
+    Returns:
+        Any: The converted value.
+    """
+    if math.isinf(value):
+        return '-Infinity' if value < 0.0 else 'Infinity'
+    if math.isnan(value):
+        return 'NaN'
+    if is_float:
+        return type_checkers.ToShortestFloat(value)
+    return value
+
+
+def _value_converter(field: descriptor.FieldDescriptor) -> _Converter | None:
+    """
+    Builds the converter of a single field value, None if the value is returned as is.
+
+    Args:
+        field (descriptor.FieldDescriptor): The field descriptor.
+
+    Returns:
+        _Converter | None: The converter.
+    """
+    cpp_type = field.cpp_type
+    if cpp_type == _FD.CPPTYPE_MESSAGE:
+        return lambda value: _get_converter(field.message_type)(value)
+    if cpp_type == _FD.CPPTYPE_ENUM:
+        if field.enum_type.full_name == 'google.protobuf.NullValue':
+            return lambda value: None
+        names = {v.number: v.name for v in field.enum_type.values}
+        return lambda value: names.get(value, value)
+    if field.type == _FD.TYPE_BYTES:
+        return lambda value: base64.b64encode(value).decode('utf-8')
+    if cpp_type == _FD.CPPTYPE_BOOL:
+        return bool
+    if cpp_type in _INT64_TYPES:
+        return str
+    if cpp_type == _FD.CPPTYPE_FLOAT:
+        return lambda value: _float_to_json(value, True)
+    if cpp_type == _FD.CPPTYPE_DOUBLE:
+        return lambda value: _float_to_json(value, False)
+    return None
+
+
+def _build_converter(desc: descriptor.Descriptor) -> Callable[[_message.Message], dict]:
+    """
+    Builds the converter of a message type from its descriptor.
+
+    Set fields come first in field number order, then the unset ones in declaration order,
+    as json_format lists them.
+
+    Args:
+        desc (descriptor.Descriptor): The message descriptor.
+
+    Returns:
+        Callable[[Message], dict]: The converter.
+    """
+    if desc.GetOptions().map_entry or desc.full_name.startswith('google.protobuf.'):
+        # well-known types and maps have special JSON mappings, leave them to json_format
+        from google.protobuf.json_format import MessageToDict
+        return lambda message: MessageToDict(message,
+                                             including_default_value_fields=True,
+                                             preserving_proto_field_name=True)
+
+    # (name, presence, is_repeated, value converter) in field number order
+    fields: List[Tuple[str, bool, bool, _Converter | None]] = []
+    for field in sorted(desc.fields, key=lambda f: f.number):
+        if field.message_type is not None and field.message_type.GetOptions().map_entry:
+            raise NotImplementedError(f"map field {field.full_name} is not supported")
+        is_repeated = field.label == _FD.LABEL_REPEATED
+        presence = not is_repeated and (field.cpp_type == _FD.CPPTYPE_MESSAGE or field.containing_oneof is not None)
+        fields.append((field.name, presence, is_repeated, _value_converter(field)))
+
+    # (name, default value) in declaration order, singular messages and oneofs have no defaults
+    defaults: List[Tuple[str, Any]] = []
+    for field in desc.fields:
+        if field.label == _FD.LABEL_REPEATED:
+            defaults.append((field.name, None))
+        elif field.cpp_type != _FD.CPPTYPE_MESSAGE and field.containing_oneof is None:
+            convert = _value_converter(field)
+            defaults.append((field.name, convert(field.default_value) if convert else field.default_value))
+
+    def converter(message: _message.Message) -> dict:
+        js = {}
+        for name, presence, is_repeated, convert in fields:
+            if presence:
+                if message.HasField(name):
+                    value = getattr(message, name)
+                    js[name] = convert(value) if convert else value
+                continue
+            value = getattr(message, name)
+            if not value:
+                continue
+            if is_repeated:
+                js[name] = [convert(v) for v in value] if convert else list(value)
+            else:
+                js[name] = convert(value) if convert else value
+        if len(js) < len(defaults):
+            for name, default in defaults:
+                if name not in js:
+                    js[name] = [] if default is None else default
+        return js
+
+    return converter
+
+
+def _get_converter(desc: descriptor.Descriptor) -> Callable[[_message.Message], dict]:
+    """
+    Returns the cached converter of a message type, building it on first use.
+
+    Args:
+        desc (descriptor.Descriptor): The message descriptor.
+
+    Returns:
+        Callable[[Message], dict]: The converter.
+    """
+    converter = _converters.get(desc)
+    if converter is None:
+        converter = _converters[desc] = _build_converter(desc)
+    return converter
+
+
+def value_converter(field: descriptor.FieldDescriptor) -> Callable[[Any], Any]:
+    """
+    Returns the converter of a single (non-repeated) field value to its dictionary form,
+    e.g. the name of an enum value.
+
+    Args:
+        field (descriptor.FieldDescriptor): The field descriptor.
+
+    Returns:
+        Callable[[Any], Any]: The converter.
+    """
+    convert = _value_converter(field)
+    return convert if convert is not None else lambda value: value
+
+
+def list_converter(field: descriptor.FieldDescriptor) -> Callable[[Any], list]:
+    """
+    Returns the converter of a repeated field value to its dictionary form, the list of the converted items.
+
+    Args:
+        field (descriptor.FieldDescriptor): The field descriptor.
+
+    Returns:
+        Callable[[Any], list]: The converter.
+    """
+    if field.cpp_type == _FD.CPPTYPE_MESSAGE:
+        return lambda values: [message_to_dict(value) for value in values]
+    convert = _value_converter(field)
+    if convert is None:
+        return list
+    return lambda values: [convert(value) for value in values]
+
+
+def message_to_dict(message: _message.Message) -> dict:
+    """
+    Converts a message to a dictionary, including default value fields and preserving proto field names.
+
+    Args:
+        message (Message): The message to convert.
+
+    Returns:
+        dict: The dictionary representation of the message.
+    """
+    return _get_converter(message.DESCRIPTOR)(message)
+
+
+def message_to_json(message: _message.Message, indent: int = 2) -> str:
+    """
+    Converts a message to a JSON string, including default value fields and preserving proto field names.
+
+    Args:
+        message (Message): The message to convert.
+        indent (int): The JSON indentation. Default is 2.
+
+    Returns:
+        str: The JSON representation of the message.
+    """
+    return json.dumps(message_to_dict(message), indent=indent)
+
+
+def _fast_scalar(field: descriptor.FieldDescriptor) -> Callable[[Any], Any] | None:
+    """
+    Builds the converter of the plain JSON values of a scalar field.
+
+    The converter returns the field value for the common JSON types of the field
+    (int for integers, str for strings, enum names for enums) and the field itself
+    for anything else, which is then converted by `_parse_scalar`.
+
+    Args:
+        field (descriptor.FieldDescriptor): The field descriptor.
+
+    Returns:
+        Callable[[Any], Any] | None: The converter, None if every value is converted by `_parse_scalar`.
+    """
+    if field.cpp_type in _INT_TYPES:
+        return lambda value: value if type(value) is int else field
+    if field.cpp_type == _FD.CPPTYPE_ENUM:
+        numbers = {v.name: v.number for v in field.enum_type.values}
+        return lambda value: numbers.get(value, field) if type(value) is str else field
+    return None
+
+
+def _parse_float(value: Any, field: descriptor.FieldDescriptor) -> float:
+    """
+    Converts a JSON number or string to a floating point value the same way json_format does.
+
+    Args:
+        value (Any): The JSON value.
+        field (descriptor.FieldDescriptor): The field descriptor.
+
+    Returns:
+        float: The field value.
+
+    Raises:
+        ParseError: If the value is not a number or is out of the range of the field.
+    """
+    if isinstance(value, float):
+        if math.isnan(value):
+            raise json_format.ParseError('Couldn\'t parse NaN, use quoted "NaN" instead')
+        if math.isinf(value):
+            if value > 0:
+                raise json_format.ParseError('Couldn\'t parse Infinity or value too large, '
+                                             'use quoted "Infinity" instead')
+            raise json_format.ParseError('Couldn\'t parse -Infinity or value too small, '
+                                         'use quoted "-Infinity" instead')
+        if field.cpp_type == _FD.CPPTYPE_FLOAT:
+            if value > _FLOAT_MAX:
+                raise json_format.ParseError('Float value too large')
+            if value < -_FLOAT_MAX:
+                raise json_format.ParseError('Float value too small')
+    if value == 'nan':
+        raise json_format.ParseError('Couldn\'t parse float "nan", use "NaN" instead')
+    try:
+        return float(value)
+    except ValueError as err:
+        if value in _FLOAT_NAMES:
+            return _FLOAT_NAMES[value]
+        raise json_format.ParseError('Couldn\'t parse float: {0}'.format(value)) from err
+
+
+def _parse_scalar(value: Any, field: descriptor.FieldDescriptor) -> Any:
+    """
+    Converts any JSON value of a scalar field the same way json_format.ParseDict does.
+
+    Args:
+        value (Any): The JSON value.
+        field (descriptor.FieldDescriptor): The field descriptor.
+
+    Returns:
+        Any: The field value.
+
+    Raises:
+        ParseError: If the value can't be converted to the field type.
+        ValueError: If an integer or enum number is given by an invalid string.
+    """
+    cpp_type = field.cpp_type
+    if cpp_type in _INT_TYPES:
+        if isinstance(value, float) and not value.is_integer():
+            raise json_format.ParseError('Couldn\'t parse integer: {0}'.format(value))
+        if isinstance(value, str) and ' ' in value:
+            raise json_format.ParseError('Couldn\'t parse integer: "{0}"'.format(value))
+        if isinstance(value, bool):
+            raise json_format.ParseError('Bool value {0} is not acceptable for integer field'.format(value))
+        return int(value)
+    if cpp_type in _FLOAT_TYPES:
+        return _parse_float(value, field)
+    if cpp_type == _FD.CPPTYPE_BOOL:
+        if not isinstance(value, bool):
+            raise json_format.ParseError('Expected true or false without quotes')
+        return value
+    if cpp_type == _FD.CPPTYPE_STRING:
+        if field.type == _FD.TYPE_BYTES:
+            encoded = value.encode('utf-8') if isinstance(value, str) else value
+            # the padding may be left out
+            return base64.urlsafe_b64decode(encoded + b'=' * (4 - len(encoded) % 4))
+        if _UNPAIRED_SURROGATE.search(value):
+            raise json_format.ParseError('Unpaired surrogate')
+        return value
+    # enums, by name or number
+    enum_type = field.enum_type
+    enum_value = enum_type.values_by_name.get(value)
+    if enum_value is not None:
+        return enum_value.number
+    try:
+        number = int(value)
+    except ValueError as err:
+        raise json_format.ParseError(
+            'Invalid enum value {0} for enum type {1}'.format(value, enum_type.full_name)) from err
+    if number not in enum_type.values_by_number and enum_type.is_closed:
+        raise json_format.ParseError('Invalid enum value {0} for enum type {1}'.format(value, enum_type.full_name))
+    return number
+
+
+def _get_parser(desc: descriptor.Descriptor) -> Dict[str, _ParserField] | None:
+    """
+    Returns the cached field lookup of a message type, building it on first use.
+
+    Args:
+        desc (descriptor.Descriptor): The message descriptor.
+
+    Returns:
+        Dict[str, _ParserField] | None: The field lookup, None if the message is left to json_format.
+    """
+    try:
+        return _parsers[desc]
+    except KeyError:
+        pass
+    parser = None
+    if not (desc.GetOptions().map_entry or desc.full_name.startswith('google.protobuf.')
+            or any(f.message_type is not None and f.message_type.GetOptions().map_entry for f in desc.fields)):
+        parser = {}
+        for field in desc.fields:
+            is_message = field.cpp_type == _FD.CPPTYPE_MESSAGE
+            if field.label == _FD.LABEL_REPEATED:
+                kind = _REPEATED_MESSAGE if is_message else _REPEATED_SCALAR
+            else:
+                kind = _MESSAGE if is_message else _SCALAR
+            parser[field.name] = (field, kind, None if is_message else _fast_scalar(field))
+        # JSON names take precedence over field names, as in json_format
+        for field in desc.fields:
+            parser[field.json_name] = parser[field.name]
+    _parsers[desc] = parser
+    return parser
+
+
+def _scalar(value: Any, field: descriptor.FieldDescriptor, fast: Callable[[Any], Any] | None, path: str) -> Any:
+    """
+    Converts a scalar JSON value, taking the fast path when possible.
+
+    Args:
+        value (Any): The JSON value.
+        field (descriptor.FieldDescriptor): The field descriptor.
+        fast (Callable[[Any], Any] | None): The fast converter of the field.
+        path (str): The value path for error messages.
+
+    Returns:
+        Any: The field value.
+
+    Raises:
+        ParseError: If the value can't be converted to the field type, with the value path.
+    """
+    if fast is not None:
+        converted = fast(value)
+        if converted is not field:
+            return converted
+    try:
+        return _parse_scalar(value, field)
+    except json_format.ParseError as err:
+        raise json_format.ParseError('{0} at {1}'.format(err, path)) from err
+
+
+def _merge(js: dict, message: _message.Message, path: str) -> None:
+    """
+    Merges a JSON object into a message.
+
+    Args:
+        js (dict): The JSON object.
+        message (Message): The message to merge into.
+        path (str): The message path for error messages.
+
+    Raises:
+        ParseError: On conversion problems.
+    """
+    parser = _get_parser(message.DESCRIPTOR)
+    if parser is None:
+        json_format.ParseDict(js, message)
+        return
+
+    oneofs = set()
+    for name in js:
+        entry = parser.get(name)
+        if entry is None:
+            desc = message.DESCRIPTOR
+            raise json_format.ParseError(
+                ('Message type "{0}" has no field named "{1}" at "{2}".\n'
+                 ' Available Fields(except extensions): "{3}"').format(
+                    desc.full_name, name, path, [f.json_name for f in desc.fields]))
+        field, kind, fast = entry
+        value = js[name]
+        try:
+            if field.containing_oneof is not None and value is not None:
+                if field.containing_oneof.name in oneofs:
+                    raise json_format.ParseError(
+                        'Message type "{0}" should not have multiple "{1}" oneof fields at "{2}".'.format(
+                            message.DESCRIPTOR.full_name, field.containing_oneof.name, path))
+                oneofs.add(field.containing_oneof.name)
+
+            if value is None:
+                message.ClearField(field.name)
+            elif kind == _SCALAR:
+                setattr(message, field.name, _scalar(value, field, fast, f'{path}.{name}'))
+            elif kind == _MESSAGE:
+                sub_message = getattr(message, field.name)
+                sub_message.SetInParent()
+                _merge(value, sub_message, f'{path}.{name}')
+            else:
+                message.ClearField(field.name)
+                if not isinstance(value, (list, tuple)):
+                    raise json_format.ParseError(
+                        'repeated field {0} must be in [] which is {1} at {2}'.format(name, value, path))
+                container = getattr(message, field.name)
+                if kind == _REPEATED_MESSAGE:
+                    for index, item in enumerate(value):
+                        if item is None:
+                            raise json_format.ParseError(
+                                'null is not allowed to be used as an element'
+                                ' in a repeated field at {0}.{1}[{2}]'.format(path, name, index))
+                        _merge(item, container.add(), f'{path}.{name}[{index}]')
+                elif fast is not None and all(type(item) is int for item in value) and field.cpp_type != _FD.CPPTYPE_ENUM:
+                    container.extend(value)
+                else:
+                    for index, item in enumerate(value):
+                        if item is None:
+                            raise json_format.ParseError(
+                                'null is not allowed to be used as an element'
+                                ' in a repeated field at {0}.{1}[{2}]'.format(path, name, index))
+                        container.append(_scalar(item, field, fast, f'{path}.{name}[{index}]'))
+        except json_format.ParseError as err:
+            if field.containing_oneof is None:
+                raise json_format.ParseError(f'Failed to parse {name} field: {err}.') from err
+            raise json_format.ParseError(str(err)) from err
+        except (ValueError, TypeError) as err:
+            raise json_format.ParseError(f'Failed to parse {name} field: {err}.') from err
+
+
+def dict_to_message(js: dict, message: _message.Message) -> _message.Message:
+    """
+    Merges a dictionary into a message, accepting the same input as json_format.ParseDict.
+
+    Fields may be given by their proto or JSON names, enums by their names or numbers.
+
+    Args:
+        js (dict): The dictionary to merge.
+        message (Message): The message to merge into.
+
+    Returns:
+        Message: The same message passed as argument.
+
+    Raises:
+        ParseError: On conversion problems, such as unknown fields or invalid values.
+    """
+    _merge(js, message, message.DESCRIPTOR.name)
+    return message
+
+
+__all__ = (
+    'message_to_dict',
+    'message_to_json',
+    'value_converter',
+    'list_converter',
+    'dict_to_message',
+)
@@ -11,6 +11,7 @@ Classes:
     A7PError: Base class for all A7P-related errors.
     A7PDataError: A subclass of A7PError related to data issues.
     A7PChecksumError: A subclass of A7PDataError for checksum-related errors.
+    A7PSizeError: A subclass of A7PDataError for data exceeding the allowed size.
     A7PValidationError: A subclass of A7PDataError for validation-related errors.
     A7PProtoValidationError: A subclass of A7PValidationError for protocol validation errors.
     A7PSpecValidationError: A subclass of A7PValidationError for specification validation errors.
@@ -106,6 +107,13 @@ class A7PChecksumError(A7PDataError):
     pass
 
 
+class A7PSizeError(A7PDataError):
+    """
+    A subclass of A7PDataError for errors related to data exceeding the allowed size.
+    """
+    pass
+
+
 class A7PValidationError(A7PDataError):
     """
     A subclass of A7PDataError for errors related to validation issues.
@@ -138,6 +146,19 @@ class A7PValidationError(A7PDataError):
         self.proto_violations = proto_violations or []
         self.spec_violations = spec_violations or []
 
+    def __reduce__(self):
+        """
+        Makes the error copyable and picklable despite its required constructor arguments,
+        the payload is carried in its serialized form.
+
+        Returns:
+            tuple: The callable and arguments restoring the error.
+        """
+        state = dict(self.__dict__)
+        payload = state.pop('payload', None)
+        data = payload.SerializeToString() if payload is not None else None
+        return _restore_validation_error, (type(self), self.args, data, state)
+
     @property
     def all_violations(self) -> list[Violation]:
         """
@@ -218,6 +239,42 @@ class A7PSpecTypeError(A7PDataError):
         super().__init__(self.message, self.expected_types, self.actual_type)
 
 
+def _restore_error(cls: Type[A7PError], args: tuple, state: dict) -> A7PError:
+    """
+    Restores an error instance without calling its constructor.
+
+    Args:
+        cls (Type[A7PError]): The error class.
+        args (tuple): The exception arguments.
+        state (dict): The instance attributes.
+
+    Returns:
+        A7PError: The restored error.
+    """
+    error = cls.__new__(cls, *args)
+    error.args = args
+    error.__dict__.update(state)
+    return error
+
+
+def _restore_validation_error(cls: Type[A7PValidationError], args: tuple,
+                              data: bytes | None, state: dict) -> A7PValidationError:
+    """
+    Restores a validation error instance, parsing its serialized payload.
+
+    Args:
+        cls (Type[A7PValidationError]): The error class.
+        args (tuple): The exception arguments.
+        data (bytes | None): The serialized payload.
+        state (dict): The other instance attributes.
+
+    Returns:
+        A7PValidationError: The restored error.
+    """
+    payload = profedit_pb2.Payload.FromString(data) if data is not None else None
+    return _restore_error(cls, args, {**state, 'payload': payload})
+
+
 def _extract_violation(violation: expression_pb2.Violation) -> ProtoViolation:
     """
     Extracts a violation from an expression_pb2.Violation object.
@@ -286,6 +343,7 @@ __all__ = [
     'A7PError',
     'A7PDataError',
     'A7PChecksumError',
+    'A7PSizeError',
     'A7PValidationError',
     'A7PProtoValidationError',
     'A7PSpecValidationError',
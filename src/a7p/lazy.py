@@ -0,0 +1,155 @@
+"""
+This module provides a lazy read-only view over serialized .a7p data.
+
+The view indexes the field offsets of the serialized `Profile` in a single pass over
+the wire format, scalar fields are decoded on first access and the repeated fields
+(`distances`, `coef_rows`, `switches`) are decoded only if they are accessed.
+
+Classes:
+    ProfileView: A lazy view over the Profile of serialized .a7p data.
+
+Usage Example:
+    view = ProfileView(data)
+    print(view.profile_name, view.zero_x)
+    payload = view.to_payload()
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from google.protobuf import descriptor
+
+from a7p import profedit_pb2, exceptions, wire
+from a7p.a7p import Buffer, HASH_SIZE, _is_valid_checksum, validate
+
+_PROFILE_FIELDS = profedit_pb2.Profile.DESCRIPTOR.fields_by_name
+_PAYLOAD_PROFILE_NUMBER = profedit_pb2.Payload.DESCRIPTOR.fields_by_name['profile'].number
+
+# Field span as indexed from the wire format: wire type, decoded value, start and end positions
+_Span = Tuple[int, int, int, int]
+
+
+class ProfileView:
+    """
+    A lazy read-only view over the Profile of serialized .a7p data.
+
+    Profile fields are available as attributes with the same names and values as on
+    `profedit_pb2.Profile`, except that repeated fields are returned as tuples.
+    The underlying buffer must not be modified or released while the view is in use.
+
+    Attributes:
+        data (memoryview): The serialized payload body, without the MD5 prefix.
+    """
+
+    def __init__(self, data: Buffer, verify_: bool = True):
+        """
+        Indexes the field offsets of the serialized data.
+
+        Args:
+            data (Buffer): The serialized byte data, with an MD5 hash as a prefix.
+            verify_ (bool): Flag indicating whether to check the MD5 hash. Default is True.
+
+        Raises:
+            A7PChecksumError: If verify_ is set and the MD5 hash does not match the data.
+            A7PDataError: If the data is malformed.
+        """
+        view = memoryview(data).cast('B')
+        if verify_ and not _is_valid_checksum(view):
+            raise exceptions.A7PChecksumError("Input data is missing for MD5 hashing")
+        self.data = view[HASH_SIZE:]
+        self._spans: Dict[int, List[_Span]] = {}
+        for number, wire_type, _, start, end in wire.iter_fields(self.data):
+            if number != _PAYLOAD_PROFILE_NUMBER or wire_type != wire.WIRE_LEN:
+                continue
+            for field in wire.iter_fields(self.data, start, end):
+                self._spans.setdefault(field[0], []).append(field[1:])
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Decodes a Profile field on first access and caches it on the instance.
+
+        Args:
+            name (str): The Profile field name.
+
+        Returns:
+            Any: The field value.
+
+        Raises:
+            AttributeError: If the Profile has no such field.
+        """
+        field = _PROFILE_FIELDS.get(name)
+        if field is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        value = self._decode(field, self._spans.get(field.number, ()))
+        self.__dict__[name] = value
+        return value
+
+    def __dir__(self):
+        return [*super().__dir__(), *_PROFILE_FIELDS]
+
+    def _decode(self, field: descriptor.FieldDescriptor, spans: List[_Span]) -> Any:
+        """
+        Decodes a field value from its indexed spans.
+
+        Args:
+            field (descriptor.FieldDescriptor): The Profile field descriptor.
+            spans (List[_Span]): The spans of the field occurrences in wire order.
+
+        Returns:
+            Any: The field value.
+        """
+        if field.label == descriptor.FieldDescriptor.LABEL_REPEATED:
+            if field.type == descriptor.FieldDescriptor.TYPE_MESSAGE:
+                message_class = getattr(profedit_pb2, field.message_type.name)
+                return tuple(message_class.FromString(self.data[start:end]) for _, _, start, end in spans)
+            values = []
+            for wire_type, value, start, end in spans:
+                if wire_type == wire.WIRE_LEN:
+                    values.extend(wire.decode_packed_varints(self.data, start, end))
+                else:
+                    values.append(wire.to_int32(value))
+            return tuple(values)
+
+        if not spans:
+            return field.default_value
+        wire_type, value, start, end = spans[-1]
+        if field.type == descriptor.FieldDescriptor.TYPE_STRING:
+            try:
+                return str(self.data[start:end], 'utf-8')
+            except UnicodeDecodeError as err:
+                raise exceptions.A7PDataError(f"Malformed protobuf data: {err}") from err
+        return wire.to_int32(value)
+
+    def to_profile(self) -> profedit_pb2.Profile:
+        """
+        Parses the viewed data into a Profile object.
+
+        Returns:
+            profedit_pb2.Profile: The parsed Profile object.
+        """
+        return self.to_payload().profile
+
+    def to_payload(self, validate_: bool = False, fail_fast: bool = False) -> profedit_pb2.Payload:
+        """
+        Parses the viewed data into a Payload object.
+
+        Args:
+            validate_ (bool): Flag indicating whether to validate the payload. Default is False.
+            fail_fast (bool): Flag indicating whether to raise errors immediately on validation failure.
+                Default is False.
+
+        Returns:
+            profedit_pb2.Payload: The parsed Payload object.
+
+        Raises:
+            A7PValidationError: If validation fails.
+        """
+        payload = profedit_pb2.Payload()
+        payload.ParseFromString(self.data)
+        if validate_:
+            validate(payload, fail_fast)
+        return payload
+
+
+__all__ = (
+    'ProfileView',
+)
@@ -23,4 +23,23 @@ _validator = Validator()
 validate = _validator.validate
 collect_violations = _validator.collect_violations
 
-__all__ = ["Validator", "CompilationError", "ValidationError", "Violations", "validate", "collect_violations"]
+
+def warmup(*descriptors) -> None:
+    """
+    Compiles the constraints of message types and their validation plans ahead of the first validation.
+
+    Call it before forking worker processes, so they inherit the compiled constraints.
+    The compiled CEL parser and expressions are saved to the compile cache file on first use,
+    so later processes load them instead of compiling them.
+
+    Parameters:
+        *descriptors: The descriptors of the message types, the a7p Payload if none is given.
+    """
+    from a7p import profedit_pb2, validation_plan  # pylint: disable=import-outside-toplevel
+
+    for desc in descriptors or (profedit_pb2.Payload.DESCRIPTOR,):
+        validation_plan.get_plan(desc)
+
+
+__all__ = ["Validator", "CompilationError", "ValidationError", "Violations", "validate", "collect_violations",
+           "warmup"]
@@ -0,0 +1,203 @@
+"""
+Persistent cache of the compiled CEL constraints.
+
+Building the tables of the CEL parser and parsing the CEL expressions of the constraints take most of
+the first validation in a process. Both are saved to a cache file on first use and loaded from it by
+the following processes. The file is keyed by a fingerprint of the standard rules descriptor and by
+the versions of the package, of the CEL libraries and of Python, so it is rebuilt whenever any of them
+changes. Parsed expressions are stored by their source text, so a cache file holds the expressions of
+every validated message type.
+
+Cache files of other keys are left alone, as they may belong to another interpreter sharing the cache
+directory, and only removed once they were not used for `STALE_AGE` seconds.
+
+Unreadable cache files are ignored and failures to write one are not reported, validation then
+compiles the constraints as usual. Loading a cache file unpickles it, so on POSIX systems files not
+owned by the current user or writable by its group or by others are ignored as well, anyone else
+able to write them could run code in the processes loading them.
+"""
+
+import hashlib
+import io
+import os
+import pickle
+import stat
+import sys
+import tempfile
+import time
+import typing
+from importlib import metadata
+from pathlib import Path
+
+import celpy
+import lark
+from celpy.celparser import CELParser
+
+from a7p.buf.validate import validate_pb2  # type: ignore
+
+# Bumped when the layout of the cache file changes
+_FORMAT = 1
+
+# Cache files of other keys not used for this many seconds are removed
+STALE_AGE = 30 * 24 * 60 * 60
+
+# The use of a cache file is recorded by updating its modification time once it is this old
+_TOUCH_AGE = 24 * 60 * 60
+
+
+def _version(distribution: str) -> str:
+    """Returns the installed version of a distribution."""
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return "undefined version"
+
+
+def cache_key(version: str) -> str:
+    """
+    Returns the key of the cache file, a fingerprint of the standard rules descriptor
+    and of the versions of the package, of the CEL libraries and of Python.
+
+    Args:
+        version: The package version.
+
+    Returns:
+        str: The hex-encoded key.
+    """
+    hasher = hashlib.md5(validate_pb2.DESCRIPTOR.serialized_pb)
+    for part in (_FORMAT, version, _version("cel-python"), lark.__version__, sys.version_info[:2]):
+        hasher.update(repr(part).encode())
+    return hasher.hexdigest()
+
+
+def _is_trusted(st: os.stat_result) -> bool:
+    """
+    Checks that a cache file is owned by the current user and not writable by its group or by others.
+
+    Args:
+        st: The status of the file.
+
+    Returns:
+        bool: True if the file can be unpickled, always True where files have no POSIX owner.
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    return st.st_uid == os.getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class CompileCache:
+    """
+    The compiled CEL parser and the parsed CEL expressions, loaded from and saved to a cache file.
+    """
+
+    def __init__(self, path: typing.Optional[Path] = None):
+        """
+        Args:
+            path: The cache file, `cel-<key>.pickle` under the a7p cache directory if None.
+        """
+        self._path = path
+        self._parser: typing.Optional[bytes] = None
+        self._asts: dict[str, lark.Tree] = {}
+        self._loaded = False
+        self._changed = False
+
+    @property
+    def path(self) -> Path:
+        """The cache file."""
+        if self._path is None:
+            from a7p.cache import __version__, default_cache_dir  # pylint: disable=import-outside-toplevel
+
+            self._path = default_cache_dir() / f"cel-{cache_key(__version__)}.pickle"
+        return self._path
+
+    def load(self) -> None:
+        """
+        Loads the cache file once, ignoring it if it is missing or unreadable.
+
+        On POSIX systems the file is also ignored if it is not owned by the current user or if its group
+        or others may write it, as unpickling it would run any code someone else put in it.
+        """
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "rb") as fp:
+                if not _is_trusted(os.fstat(fp.fileno())):
+                    return
+                data = pickle.load(fp)
+            parser, asts = data["parser"], data["asts"]
+        except Exception:  # noqa: BLE001, any broken cache file is rebuilt
+            return
+        if isinstance(parser, bytes) and isinstance(asts, dict):
+            self._parser = parser
+            self._asts.update(asts)
+            try:
+                if self.path.stat().st_mtime < time.time() - _TOUCH_AGE:
+                    os.utime(self.path)  # records the use, so the file is not pruned as stale
+            except OSError:
+                pass
+
+    def environment(self) -> celpy.Environment:
+        """
+        Returns a new CEL environment, installing the cached parser first.
+
+        Returns:
+            celpy.Environment: The environment.
+        """
+        self.load()
+        if CELParser.CEL_PARSER is None and self._parser is not None:
+            try:
+                CELParser.CEL_PARSER = lark.Lark.load(io.BytesIO(self._parser))
+            except Exception:  # noqa: BLE001
+                self._parser = None
+        env = celpy.Environment()  # builds the parser if it is still missing
+        if self._parser is None:
+            buffer = io.BytesIO()
+            CELParser.CEL_PARSER.save(buffer)
+            self._parser = buffer.getvalue()
+            self._changed = True
+        return env
+
+    def compile(self, env: celpy.Environment, expression: str) -> lark.Tree:
+        """
+        Parses a CEL expression, reusing the cached tree of the same source.
+
+        Args:
+            env: The CEL environment.
+            expression: The CEL source.
+
+        Returns:
+            lark.Tree: The parsed expression, shared by every constraint with the same source.
+        """
+        ast = self._asts.get(expression)
+        if ast is None:
+            ast = self._asts[expression] = env.compile(expression)
+            self._changed = True
+        return ast
+
+    def save(self) -> None:
+        """Writes the cache file if anything was compiled since it was loaded, removing stale cache files."""
+        if not self._changed or self._parser is None:
+            return
+        self._changed = False
+        path = self.path
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=path.name, dir=path.parent)
+            try:
+                with os.fdopen(fd, "wb") as fp:
+                    pickle.dump({"parser": self._parser, "asts": self._asts}, fp, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            expired = time.time() - STALE_AGE
+            for stale in path.parent.glob("cel-*.pickle"):
+                if stale != path and stale.stat().st_mtime < expired:
+                    stale.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+# The cache shared by the constraint factories
+default_cache = CompileCache()
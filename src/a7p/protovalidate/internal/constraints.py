@@ -21,7 +21,7 @@ from google.protobuf import any_pb2, descriptor, message
 
 from a7p.buf.validate import expression_pb2, validate_pb2  # type: ignore
 from a7p.buf.validate.priv import private_pb2  # type: ignore
-from a7p.protovalidate.internal import string_format
+from a7p.protovalidate.internal import compile_cache, native, string_format
 
 
 class CompilationError(Exception):
@@ -95,6 +95,9 @@ _TYPE_TO_CTOR = {
     descriptor.FieldDescriptor.TYPE_SFIXED64: celtypes.IntType,
 }
 
+# The values of these fields may be NaN, which has no order
+_FLOATING_TYPES = frozenset((descriptor.FieldDescriptor.CPPTYPE_FLOAT, descriptor.FieldDescriptor.CPPTYPE_DOUBLE))
+
 
 def _scalar_field_value_to_cel(val: typing.Any, field: descriptor.FieldDescriptor) -> celtypes.Value:
     ctor = _TYPE_TO_CTOR.get(field.type)
@@ -249,7 +252,9 @@ class ConstraintRules:
 class CelConstraintRules(ConstraintRules):
     """A constraint that has rules written in CEL."""
 
-    _runners: list[typing.Tuple[celpy.Runner, expression_pb2.Constraint | private_pb2.Constraint]]
+    _runners: list[
+        typing.Tuple[celpy.Runner, expression_pb2.Constraint | private_pb2.Constraint, native.NativeCheck | None]
+    ]
     _rules_cel: celtypes.Value = None
 
     def __init__(self, rules: message.Message | None):
@@ -258,11 +263,17 @@ class CelConstraintRules(ConstraintRules):
             self._rules_cel = _msg_to_cel(rules)
 
     def _validate_cel(
-        self, ctx: ConstraintContext, field_name: str, activation: dict[str, typing.Any], *, for_key: bool = False
+        self,
+        ctx: ConstraintContext,
+        field_name: str,
+        activation: dict[str, typing.Any],
+        *,
+        for_key: bool = False,
+        runners: list | None = None,
     ):
         activation["rules"] = self._rules_cel
         activation["now"] = celtypes.TimestampType(datetime.datetime.now(tz=datetime.timezone.utc))
-        for runner, constraint in self._runners:
+        for runner, constraint, _ in self._runners if runners is None else runners:
             result = runner.evaluate(activation)
             if isinstance(result, celtypes.BoolType):
                 if not result:
@@ -273,15 +284,31 @@ class CelConstraintRules(ConstraintRules):
             elif isinstance(result, Exception):
                 raise result
 
+    def _validate_value_cel(
+        self,
+        ctx: ConstraintContext,
+        field_name: str,
+        val: typing.Any,
+        to_cel: typing.Callable[[typing.Any, descriptor.FieldDescriptor], celtypes.Value],
+        field: descriptor.FieldDescriptor,
+        *,
+        for_key: bool = False,
+    ):
+        # rules whose native check passes can't be violated, run the CEL programs of the others only
+        runners = [runner for runner in self._runners if runner[2] is None or runner[2](val)]
+        if runners:
+            self._validate_cel(ctx, field_name, {"this": to_cel(val, field)}, for_key=for_key, runners=runners)
+
     def add_rule(
         self,
         env: celpy.Environment,
         funcs: dict[str, celpy.CELFunction],
         rules: expression_pb2.Constraint | private_pb2.Constraint,
+        check: native.NativeCheck | None = None,
     ):
-        ast = env.compile(rules.expression)
+        ast = compile_cache.default_cache.compile(env, rules.expression)
         prog = env.program(ast, functions=funcs)
-        self._runners.append((prog, rules))
+        self._runners.append((prog, rules, check))
 
 
 class MessageConstraintRules(CelConstraintRules):
@@ -322,12 +349,15 @@ class FieldConstraintRules(CelConstraintRules):
         type_case = field_level.WhichOneof("type")
         if type_case is not None:
             rules = getattr(field_level, type_case)
+            # Wrapper messages are unwrapped for CEL only, native checks apply to plain values
+            with_native = type_case == "repeated" or self._field.type != descriptor.FieldDescriptor.TYPE_MESSAGE
             # For each set field in the message, look for the private constraint
             # extension.
             for field, _ in rules.ListFields():
                 if private_pb2.field in field.GetOptions().Extensions:
                     for cel in field.GetOptions().Extensions[private_pb2.field].cel:
-                        self.add_rule(env, funcs, cel)
+                        check = native.native_check(cel.id, rules) if with_native else None
+                        self.add_rule(env, funcs, cel, check)
         for cel in field_level.cel:
             self.add_rule(env, funcs, cel)
 
@@ -351,11 +381,68 @@ class FieldConstraintRules(CelConstraintRules):
                 return
         val = getattr(message, self._field.name)
         self._validate_value(ctx, self._field.name, val)
-        self._validate_cel(ctx, self._field.name, {"this": _field_value_to_cel(val, self._field)})
+        self._validate_value_cel(ctx, self._field.name, val, _field_value_to_cel, self._field)
 
     def validate_item(self, ctx: ConstraintContext, field_path: str, val: typing.Any, *, for_key: bool = False):
         self._validate_value(ctx, field_path, val, for_key=for_key)
-        self._validate_cel(ctx, field_path, {"this": _scalar_field_value_to_cel(val, self._field)}, for_key=for_key)
+        self._validate_value_cel(ctx, field_path, val, _scalar_field_value_to_cel, self._field, for_key=for_key)
+
+    def native_checks(self) -> list[native.NativeCheck] | None:
+        """Returns the pre-checks of the rules on plain values, None if some rule has none or more checks apply."""
+        if type(self) not in (FieldConstraintRules, EnumConstraintRules):
+            return None
+        checks = [check for _, _, check in self._runners]
+        if None in checks:
+            return None
+        return checks
+
+    def value_checks(self) -> list[native.NativeCheck] | None:
+        """
+        Returns the pre-checks of every rule `validate` applies to the field value, so the value is valid
+        if it passes them all, None if some rule has none or the field is required.
+        """
+        if self._required:
+            return None
+        return self.native_checks()
+
+    def failing_items(self, values: typing.Sequence[typing.Any]) -> typing.Sequence[int]:
+        """
+        Returns the indices of the values `validate_item` may report a violation for, in order.
+
+        Args:
+            values: The items of a repeated field.
+
+        Returns:
+            A superset of the indices of the failing items.
+        """
+        checks = self.native_checks()
+        if checks is None:
+            return range(len(values))
+        return native.failing_indices(checks, values, self._field.cpp_type not in _FLOATING_TYPES)
+
+    def failing_messages(self, messages: typing.Sequence[message.Message]) -> typing.Sequence[int]:
+        """
+        Returns the indices of the messages `validate` may report a violation for, in order.
+
+        Args:
+            messages: The items of a repeated message field, of the message type the rules apply to.
+
+        Returns:
+            A superset of the indices of the failing messages.
+        """
+        checks = self.native_checks()
+        field = self._field
+        if (
+            checks is None
+            or self._required
+            or getattr(self, "_defined_only", False)
+            or field.label == descriptor.FieldDescriptor.LABEL_REPEATED
+            or field.type == descriptor.FieldDescriptor.TYPE_MESSAGE
+        ):
+            return range(len(messages))
+        name = field.name
+        values = [getattr(item, name) for item in messages]
+        return native.failing_indices(checks, values, field.cpp_type not in _FLOATING_TYPES)
 
     def _validate_value(self, ctx: ConstraintContext, field_path: str, val: typing.Any, *, for_key: bool = False):
         pass
@@ -414,6 +501,11 @@ class EnumConstraintRules(FieldConstraintRules):
         if field_level.enum.defined_only:
             self._defined_only = True
 
+    def value_checks(self) -> list[native.NativeCheck] | None:
+        if self._defined_only:
+            return None
+        return super().value_checks()
+
     def validate(self, ctx: ConstraintContext, message: message.Message):
         super().validate(ctx, message)
         if ctx.done:
@@ -445,13 +537,24 @@ class RepeatedConstraintRules(FieldConstraintRules):
         if item_rules is not None:
             self._item_rules = item_rules
 
+    def value_checks(self) -> list[native.NativeCheck] | None:
+        """Returns the pre-checks of the rules on the list, None if the items have rules or some rule has none."""
+        if self._required or self._item_rules is not None:
+            return None
+        checks = [check for _, _, check in self._runners]
+        if None in checks:
+            return None
+        return checks
+
     def validate(self, ctx: ConstraintContext, message: message.Message):
         super().validate(ctx, message)
         if ctx.done:
             return
         value = getattr(message, self._field.name)
         if self._item_rules is not None:
-            for i, item in enumerate(value):
+            # the items are checked in one pass, the contexts are created for the failing ones only
+            for i in self._item_rules.failing_items(value):
+                item = value[i]
                 sub_ctx = ctx.sub_context()
                 self._item_rules.validate_item(sub_ctx, "", item)
                 if sub_ctx.has_errors():
@@ -519,21 +622,25 @@ class OneofConstraintRules(ConstraintRules):
 class ConstraintFactory:
     """Factory for creating and caching constraints."""
 
-    _env: celpy.Environment
+    _env: celpy.Environment | None
     _funcs: dict[str, celpy.CELFunction]
     _cache: dict[descriptor.Descriptor, list[ConstraintRules] | Exception]
 
     def __init__(self, funcs: dict[str, celpy.CELFunction]):
-        self._env = celpy.Environment()
+        # created on first use, with the parser loaded from the compile cache
+        self._env = None
         self._funcs = funcs
         self._cache = {}
 
     def get(self, descriptor: descriptor.Descriptor) -> list[ConstraintRules]:
         if descriptor not in self._cache:
+            if self._env is None:
+                self._env = compile_cache.default_cache.environment()
             try:
                 self._cache[descriptor] = self._new_constraints(descriptor)
             except Exception as e:
                 self._cache[descriptor] = e
+            compile_cache.default_cache.save()
         result = self._cache[descriptor]
         if isinstance(result, Exception):
             raise result
@@ -784,17 +891,35 @@ class RepeatedMsgConstraint(ConstraintRules):
         self._factory = factory
         self._field = field
 
+    def item_constraints(self) -> list[ConstraintRules]:
+        """Returns the constraints of the message type of the items."""
+        return self._factory.get(self._field.message_type)
+
     def validate(self, ctx: ConstraintContext, message: message.Message):
         val = getattr(message, self._field.name)
         if not val:
             return
-        constraints = self._factory.get(self._field.message_type)
-        if constraints is None:
+        constraints = self.item_constraints()
+        if not constraints:
             return
-        for idx, item in enumerate(val):
+        for idx in _failing_messages(constraints, val):
+            item = val[idx]
             sub_ctx = ctx.sub_context()
             for constraint in constraints:
                 constraint.validate(sub_ctx, item)
             if sub_ctx.has_errors():
                 sub_ctx.add_path_prefix(f"{self._field.name}[{idx}]")
                 ctx.add_errors(sub_ctx)
+
+
+def _failing_messages(constraints: list[ConstraintRules], messages: typing.Sequence[message.Message]) -> typing.Sequence[int]:
+    """Returns the indices of the messages some of the constraints may report a violation for, in order."""
+    failing: set[int] = set()
+    for constraint in constraints:
+        if not isinstance(constraint, FieldConstraintRules):
+            return range(len(messages))
+        indices = constraint.failing_messages(messages)
+        if len(indices) == len(messages):
+            return range(len(messages))
+        failing.update(indices)
+    return sorted(failing)
@@ -0,0 +1,183 @@
+"""
+Native Python pre-checks for the standard protovalidate rules.
+
+A pre-check tells whether the CEL expression of a standard rule may report a violation for
+a value. Values passing the pre-check are known to be valid and the CEL program is not run,
+otherwise the CEL program is evaluated as usual, so reported violations do not change.
+
+Covered rules are the numeric ranges (`lt`, `lte`, `gt`, `gte` and their combinations),
+the string lengths (`len`, `min_len`, `max_len`, `len_bytes`, `min_bytes`, `max_bytes`)
+and the repeated `min_items`/`max_items`.
+
+Every pre-check has a `bounds` attribute describing the tested bounds, so the same check
+can be evaluated over many values at once, see `failing_indices`.
+"""
+
+import dataclasses
+import typing
+
+from google.protobuf import message
+
+# Returns True if the rule may be violated by the value
+NativeCheck = typing.Callable[[typing.Any], bool]
+
+
+@dataclasses.dataclass(frozen=True)
+class Bounds:
+    """
+    The bounds tested by a pre-check.
+
+    Attributes:
+        measure: What is bounded: "value", "len" (code points), "len_bytes" (UTF-8 bytes) or "items".
+        low: The lower bound, None if unbounded.
+        low_strict: Whether the lower bound is excluded (`gt`).
+        high: The upper bound, None if unbounded.
+        high_strict: Whether the upper bound is excluded (`lt`).
+        inside: Whether the measure must be within the bounds, or outside of them for the exclusive ranges.
+        nan: Whether NaN violates the rule.
+    """
+    measure: str
+    low: typing.Any = None
+    low_strict: bool = False
+    high: typing.Any = None
+    high_strict: bool = False
+    inside: bool = True
+    nan: bool = False
+
+
+def _with_bounds(check: NativeCheck, bounds: Bounds) -> NativeCheck:
+    check.bounds = bounds
+    return check
+
+_NUMERIC_TYPES = frozenset((
+    "int32", "int64", "uint32", "uint64", "sint32", "sint64",
+    "fixed32", "fixed64", "sfixed32", "sfixed64", "float", "double",
+))
+
+
+def _never(_value: typing.Any) -> bool:
+    return False
+
+
+_never.bounds = Bounds("value")
+
+
+def _range_check(rules: message.Message, lower: str, upper: str) -> NativeCheck:
+    """Builds the pre-check of a `<lower>_<upper>` rule such as `gte_lte`, rejecting NaN as CEL does for floats."""
+    if not rules.HasField(upper):
+        return _never
+    low, high = getattr(rules, lower), getattr(rules, upper)
+    low_ok = (lambda v: v > low) if lower == "gt" else (lambda v: v >= low)
+    high_ok = (lambda v: v < high) if upper == "lt" else (lambda v: v <= high)
+    bounds = Bounds("value", low, lower == "gt", high, upper == "lt", high >= low, nan=True)
+    if high >= low:
+        return _with_bounds(lambda v: v != v or not (low_ok(v) and high_ok(v)), bounds)
+    return _with_bounds(lambda v: v != v or not (low_ok(v) or high_ok(v)), bounds)
+
+
+def _bound_check(rules: message.Message, bound: str, opposite: tuple[str, str]) -> NativeCheck:
+    """Builds the pre-check of a single `lt`, `lte`, `gt` or `gte` rule, which only applies without an opposite bound."""
+    if any(rules.HasField(name) for name in opposite):
+        return _never
+    limit = getattr(rules, bound)
+    if bound == "lt":
+        return _with_bounds(lambda v: v != v or v >= limit, Bounds("value", high=limit, high_strict=True, nan=True))
+    if bound == "lte":
+        return _with_bounds(lambda v: v != v or v > limit, Bounds("value", high=limit, nan=True))
+    if bound == "gt":
+        return _with_bounds(lambda v: v != v or v <= limit, Bounds("value", low=limit, low_strict=True, nan=True))
+    return _with_bounds(lambda v: v != v or v < limit, Bounds("value", low=limit, nan=True))
+
+
+def _numeric_check(name: str, rules: message.Message) -> NativeCheck | None:
+    if name in ("lt", "lte"):
+        return _bound_check(rules, name, ("gt", "gte"))
+    if name in ("gt", "gte"):
+        return _bound_check(rules, name, ("lt", "lte"))
+    lower, _, upper = name.partition("_")
+    if lower in ("gt", "gte") and upper in ("lt", "lte", "lt_exclusive", "lte_exclusive"):
+        # exclusive variants are the same range with the bounds swapped, _range_check tells them apart
+        return _range_check(rules, lower, upper.removesuffix("_exclusive"))
+    return None
+
+
+def _string_check(name: str, rules: message.Message) -> NativeCheck | None:
+    limit = getattr(rules, name, None)
+    if name == "len":
+        return _with_bounds(lambda v: len(v) != limit, Bounds("len", limit, high=limit))
+    if name == "min_len":
+        return _with_bounds(lambda v: len(v) < limit, Bounds("len", low=limit))
+    if name == "max_len":
+        return _with_bounds(lambda v: len(v) > limit, Bounds("len", high=limit))
+    if name == "len_bytes":
+        return _with_bounds(lambda v: len(v.encode()) != limit, Bounds("len_bytes", limit, high=limit))
+    if name == "min_bytes":
+        return _with_bounds(lambda v: len(v.encode()) < limit, Bounds("len_bytes", low=limit))
+    if name == "max_bytes":
+        return _with_bounds(lambda v: len(v.encode()) > limit, Bounds("len_bytes", high=limit))
+    return None
+
+
+def _repeated_check(name: str, rules: message.Message) -> NativeCheck | None:
+    if name == "min_items":
+        return _with_bounds(lambda v: len(v) < rules.min_items, Bounds("items", low=rules.min_items))
+    if name == "max_items":
+        return _with_bounds(lambda v: len(v) > rules.max_items, Bounds("items", high=rules.max_items))
+    return None
+
+
+def failing_indices(
+    checks: typing.Sequence[NativeCheck], values: typing.Sequence[typing.Any], nan_free: bool
+) -> list[int]:
+    """
+    Returns the indices of the values any of the pre-checks may report, in order.
+
+    The values passing a check within bounds form a range, so if the smallest and the largest
+    values pass it, every value does and the check is not applied to them one by one.
+
+    Args:
+        checks: The pre-checks.
+        values: The values, such as the items of a repeated field.
+        nan_free: Whether the values can't be NaN, which has no order, as for integers.
+
+    Returns:
+        The indices of the values some check may report.
+    """
+    if not values:
+        return []
+    remaining = []
+    smallest = largest = None
+    for check in checks:
+        bounds = check.bounds
+        if bounds.measure == "value" and bounds.inside and nan_free:
+            if smallest is None:
+                smallest, largest = min(values), max(values)
+            if not (check(smallest) or check(largest)):
+                continue
+        remaining.append(check)
+    if not remaining:
+        return []
+    return [i for i, value in enumerate(values) if any(check(value) for check in remaining)]
+
+
+def native_check(constraint_id: str, rules: message.Message) -> NativeCheck | None:
+    """
+    Builds the native pre-check of a standard rule.
+
+    Args:
+        constraint_id: The rule id, such as `int32.gte_lte` or `string.max_len`.
+        rules: The type specific rules message of the field, such as `Int32Rules`.
+
+    Returns:
+        The pre-check, None if the rule is not covered.
+    """
+    type_name, _, name = constraint_id.partition(".")
+    if type_name != rules.DESCRIPTOR.name.removesuffix("Rules").lower():
+        return None
+    if type_name in _NUMERIC_TYPES:
+        return _numeric_check(name, rules)
+    if type_name == "string":
+        return _string_check(name, rules)
+    if type_name == "repeated":
+        return _repeated_check(name, rules)
+    return None
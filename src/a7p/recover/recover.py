@@ -1,8 +1,10 @@
-from copy import deepcopy
+import re
+from collections.abc import Callable, MutableSequence
 from dataclasses import dataclass
+from operator import attrgetter
 from pathlib import Path
 
-from google._upb._message import RepeatedScalarContainer, RepeatedCompositeContainer
+from google.protobuf.message import Message
 from typing_extensions import Any
 
 from a7p import profedit_pb2, A7PFactory
@@ -10,11 +12,61 @@ from a7p.factory import Switches
 from a7p.logger import color_fmt, logger
 
 
+# getters of the field values of the message types, by descriptor
+_field_getters: dict = {}
+
+
+def _field_getter(desc) -> Callable[[Message], tuple]:
+    getter = _field_getters.get(desc)
+    if getter is None:
+        if any(f.message_type is not None for f in desc.fields):
+            def getter(message):
+                return tuple(_snapshot(getattr(message, f.name)) for f in desc.fields)
+        elif len(desc.fields) <= 1:
+            names = [f.name for f in desc.fields]
+            def getter(message):
+                return tuple(getattr(message, name) for name in names)
+        else:
+            getter = attrgetter(*(f.name for f in desc.fields))
+        _field_getters[desc] = getter
+    return getter
+
+
+def _snapshot(value: Any) -> Any:
+    # immutable copy of a field value: repeated fields as tuples, their messages as tuples of field values
+    if isinstance(value, MutableSequence):
+        if value and isinstance(value[0], Message):
+            return tuple(map(_field_getter(value[0].DESCRIPTOR), value))
+        return tuple(value)
+    if isinstance(value, Message):
+        return _field_getter(value.DESCRIPTOR)(value)
+    return value
+
+
+def _compile_accessor(parts: list) -> Callable[[Any], Any]:
+    # getter of the path parts naming fields of the payload, others are skipped
+    names = []
+    desc = profedit_pb2.Payload.DESCRIPTOR
+    for p in parts:
+        field = desc.fields_by_name.get(p) if desc is not None else None
+        if field is None:
+            continue
+        names.append(p)
+        desc = field.message_type if field.label != field.LABEL_REPEATED else None
+    if not names:
+        return lambda payload: payload
+    return attrgetter(".".join(names))
+
+
+# accessors of the paths, by path
+_accessors: dict[Path | str, Callable[[Any], Any]] = {}
+
+
 @dataclass
 class RecoverResult:
     recovered: bool
     path: Path | str
-    old_value: str | None = None
+    old_value: Any = None
     new_value: Any = None
 
     def print(self):
@@ -34,7 +86,7 @@ class RecoverResult:
             prefix = color_fmt("Skipped".ljust(10), levelname="WARNING")
 
         def truncate_list(_value: Any) -> str:
-            if isinstance(_value, (RepeatedScalarContainer, RepeatedCompositeContainer, list, tuple)):
+            if isinstance(_value, (list, tuple)):
                 _value = [str(v) for v in _value]
                 if len(_value) > 6:
                     _value = f'[ {", ".join(_value[:3])}, ... {", ".join(_value[-3:])} ]'
@@ -58,6 +110,7 @@ class RecoverResult:
 class Recover:
     def __init__(self):
         self.recover_funcs = {}
+        self._registered = {}
 
     def register(self, path, func):
         raise NotImplementedError("register not implemented as is abstract method")
@@ -66,25 +119,45 @@ class Recover:
     def split_path(path: Path | str) -> list:
         raise NotImplementedError("split_path not implemented as is abstract method")
 
+    @classmethod
+    def field_parts(cls, path: Path | str) -> list:
+        # path parts without the indices of the items
+        parts = (re.sub(r"\[\d+]", "", p) for p in cls.split_path(path))
+        return [p for p in parts if p]
+
+    def find(self, path: Path | str) -> Path | str | None:
+        # registered path of the field or of the nearest field holding it
+        if len(self._registered) != len(self.recover_funcs):
+            self._registered = {tuple(self.field_parts(k)): k for k in self.recover_funcs}
+        registered = self._registered
+        parts = self.field_parts(path)
+        for i in range(len(parts), 0, -1):
+            key = registered.get(tuple(parts[:i]))
+            if key is not None:
+                return key
+        return None
+
+    @classmethod
+    def get_value_by_path(cls, payload, path):
+        accessor = _accessors.get(path)
+        if accessor is None:
+            accessor = _accessors[path] = _compile_accessor(cls.split_path(path))
+        return _snapshot(accessor(payload))
+
     @classmethod
     def get_value_by_violation(cls, payload, violation):
-        # raise NotImplementedError("get_value_by_violation not implemented as is abstract method")
-        _value = payload
-        # _path = violation.path.split('.')
-        _path = cls.split_path(violation.path)
-        for p in _path:
-            if hasattr(_value, p):
-                _value = getattr(_value, p)
+        return cls.get_value_by_path(payload, violation.path)
 
-        return deepcopy(_value)
+    def apply(self, payload, path):
+        old_value = self.get_value_by_path(payload, path)
+        self.recover_funcs[path](payload)
+        new_value = self.get_value_by_path(payload, path)
+        return RecoverResult(True, path, old_value, new_value)
 
     def recover_one(self, payload, violation):
 
         if violation.path in self.recover_funcs:
-            old_value = self.get_value_by_violation(payload, violation)
-            self.recover_funcs[violation.path](payload)
-            new_value = self.get_value_by_violation(payload, violation)
-            return RecoverResult(True, violation.path, old_value, new_value)
+            return self.apply(payload, violation.path)
 
         return RecoverResult(False, violation.path, None, None)
 
@@ -168,7 +241,7 @@ def _recover_proto_c_zero_air_pressure(payload):
 
 
 def _recover_proto_c_zero_air_humidity(payload):
-    payload.profile.c_zero_air_pressure = 0
+    payload.profile.c_zero_air_humidity = 0
 
 
 def _recover_proto_c_zero_w_pitch(payload):
@@ -192,12 +265,12 @@ def _recover_proto_b_length(payload):
 
 
 def _recover_proto_twist_dir(payload):
-    payload.twist_dir = profedit_pb2.TwistDir.RIGHT
+    payload.profile.twist_dir = profedit_pb2.TwistDir.RIGHT
 
 
 def _recover_proto_bc_type(payload):
     logger.warning("Drag model restored to G7")
-    payload.bc_type = profedit_pb2.GType.G7
+    payload.profile.bc_type = profedit_pb2.GType.G7
 
 
 def _recover_proto_switches(payload):
@@ -208,12 +281,12 @@ def _recover_proto_switches(payload):
 def _recover_proto_coef_rows(payload):
     logger.warning("Drag model coefficients restored to 0.1")
     del payload.profile.coef_rows[:]
-    payload.profile.coef_rows.extend(
+    payload.profile.coef_rows.extend([
         profedit_pb2.CoefRow(
             bc_cd=round(0.1 * 10000),
             mv=round(0 * 10)
         )
-    )
+    ])
 
 
 def _recover_proto_distances(payload):
@@ -241,7 +314,7 @@ class RecoverProto(Recover):
 
 recover_proto = RecoverProto()
 
-recover_proto.register("profile.profile_name", _recover_proto_short_name_top)
+recover_proto.register("profile.profile_name", _recover_proto_profile_name)
 recover_proto.register("profile.cartridge_name", _recover_proto_cartridge_name)
 recover_proto.register("profile.bullet_name", _recover_proto_bullet_name)
 recover_proto.register("profile.user_note", _recover_proto_user_note)
@@ -363,7 +436,7 @@ def _recover_spec_c_zero_air_pressure(payload):
 
 
 def _recover_spec_c_zero_air_humidity(payload):
-    payload.profile.c_zero_air_pressure = 0
+    payload.profile.c_zero_air_humidity = 0
 
 
 def _recover_spec_c_zero_w_pitch(payload):
@@ -387,12 +460,12 @@ def _recover_spec_b_length(payload):
 
 
 def _recover_spec_twist_dir(payload):
-    payload.twist_dir = profedit_pb2.TwistDir.RIGHT
+    payload.profile.twist_dir = profedit_pb2.TwistDir.RIGHT
 
 
 def _recover_spec_bc_type(payload):
     logger.warning("Drag model restored to G7")
-    payload.bc_type = profedit_pb2.GType.G7
+    payload.profile.bc_type = profedit_pb2.GType.G7
 
 
 def _recover_spec_switches(payload):
@@ -403,12 +476,12 @@ def _recover_spec_switches(payload):
 def _recover_spec_coef_rows(payload):
     logger.warning("Drag model coefficients restored to 0.1")
     del payload.profile.coef_rows[:]
-    payload.profile.coef_rows.extend(
+    payload.profile.coef_rows.extend([
         profedit_pb2.CoefRow(
             bc_cd=round(0.1 * 10000),
             mv=round(0 * 10)
         )
-    )
+    ])
 
 
 def _recover_spec_distances(payload):
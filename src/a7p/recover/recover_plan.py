@@ -0,0 +1,239 @@
+"""
+This module provides the single-pass recovery planner of a payload failing validation.
+
+The proto and the spec violations of a validation error are mapped to the recover functions registered
+for their fields, or for the nearest field holding them, such as the table of an item. A fix is applied
+once however many violations point to it, the spec fixes before the proto ones, and the fixes replacing
+a table run before the fixes of the fields pointing into it. The payload is then only checked against the rules
+depending on the modified fields and on the fields of the violations, instead of being validated again
+in full. Violations revealed by that check are fixed in turn if their fields were not fixed yet.
+
+Classes:
+    RecoverPlan: The fixes of a list of violations, in the order they are applied.
+
+Functions:
+    recover: Fixes the violations of a validation error and checks the payload again.
+"""
+
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from a7p import exceptions, profedit_pb2
+from a7p.exceptions import A7PValidationError, Violation
+from a7p.recover.recover import Recover, RecoverResult, recover_proto, recover_spec
+from a7p.tracking import TrackedPayload
+
+if TYPE_CHECKING:
+    from a7p.buf.validate import expression_pb2
+
+_PROFILE_FIELDS = profedit_pb2.Profile.DESCRIPTOR.fields_by_name
+
+# The key of a fix, the registry holding it and the parts of the path of the fixed field
+_FixKey = Tuple[Recover, Tuple[str, ...]]
+
+# Fixes applied before the fix of a field, as the field points into the tables they replace
+_PREREQUISITES: Dict[Tuple[str, ...], Tuple[Tuple[str, ...], ...]] = {
+    ('profile', 'c_zero_distance_idx'): (('profile', 'distances'),),
+    ('profile', 'coef_rows'): (('profile', 'bc_type'),),
+}
+
+# Profile fields of the violations reported without a field path
+_VIOLATION_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "Distances": ("c_zero_distance_idx", "distances"),
+}
+
+
+class _Fix:
+    """
+    A recover function and the violations it fixes.
+
+    Attributes:
+        field (Tuple[str, ...]): The parts of the path of the fixed field.
+        path (Path | str): The registered path of the recover function.
+        recover (Recover): The registry holding the recover function.
+        count (int): The number of violations fixed.
+    """
+    __slots__ = ('field', 'path', 'recover', 'count')
+
+    @property
+    def key(self) -> _FixKey:
+        """Returns the registry holding the fix and the fixed field."""
+        return self.recover, self.field
+
+    def __init__(self, field: Tuple[str, ...], path: Path | str, recover: Recover):
+        self.field = field
+        self.path = path
+        self.recover = recover
+        self.count = 0
+
+
+def _profile_fields(violation: Violation) -> Optional[Tuple[str, ...]]:
+    """Returns the names of the profile fields a violation is about, None if they are not known."""
+    if isinstance(violation.path, str) and violation.path in _VIOLATION_FIELDS:
+        return _VIOLATION_FIELDS[violation.path]
+    registry = recover_spec if isinstance(violation.path, Path) else recover_proto
+    parts = registry.field_parts(violation.path)
+    if len(parts) >= 2 and parts[0] == 'profile' and parts[1] in _PROFILE_FIELDS:
+        return (parts[1],)
+    return None
+
+
+class RecoverPlan:
+    """
+    The fixes of a list of violations, deduplicated and in the order they are applied.
+
+    Attributes:
+        fixes (List[_Fix]): The fixes, prerequisites first.
+        skipped (List[Violation]): The violations without a recover function.
+        fields (Optional[FrozenSet[str]]): The profile fields of the violations,
+            None if a violation is not about a known field.
+    """
+
+    def __init__(self, violations: Sequence[Violation], exclude: FrozenSet[_FixKey] = frozenset()):
+        """
+        Maps violations to recover functions.
+
+        Args:
+            violations (Sequence[Violation]): The violations, spec ones first so their fixes run first.
+            exclude (FrozenSet[_FixKey]): The fixes not to apply again, by registry and field.
+        """
+        fixes: Dict[_FixKey, _Fix] = {}
+        self.skipped: List[Violation] = []
+        fields = set()
+        for violation in violations:
+            names = _profile_fields(violation)
+            if names is None:
+                fields = None
+            elif fields is not None:
+                fields.update(names)
+
+            registry = recover_spec if isinstance(violation.path, Path) else recover_proto
+            path = registry.find(violation.path)
+            if path is None:
+                self.skipped.append(violation)
+                continue
+            key = registry, tuple(registry.field_parts(path))
+            if key in exclude:
+                self.skipped.append(violation)
+                continue
+            fix = fixes.get(key)
+            if fix is None:
+                fix = fixes[key] = _Fix(key[1], path, registry)
+            fix.count += 1
+
+        self.fields = frozenset(fields) if fields is not None else None
+        self.fixes: List[_Fix] = []
+        for fix in fixes.values():
+            self._add(fix, fixes)
+
+    def _add(self, fix: _Fix, fixes: Dict[_FixKey, _Fix]) -> None:
+        """Appends a fix after the planned fixes of its prerequisites, of either registry."""
+        if fix in self.fixes:
+            return
+        for field in _PREREQUISITES.get(fix.field, ()):
+            for registry in (recover_spec, recover_proto):
+                if (registry, field) in fixes:
+                    self._add(fixes[registry, field], fixes)
+        self.fixes.append(fix)
+
+    def counts(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Returns the number of violations fixed and skipped by rule, the dotted path of the field
+        without the item indices, or the violation path if it is not a field.
+
+        Returns:
+            Tuple[Dict[str, int], Dict[str, int]]: The counts of the fixed and of the skipped violations.
+        """
+        recovered: Dict[str, int] = {}
+        for fix in self.fixes:
+            rule = ".".join(fix.field)
+            recovered[rule] = recovered.get(rule, 0) + fix.count
+        skipped: Dict[str, int] = {}
+        for violation in self.skipped:
+            registry = recover_spec if isinstance(violation.path, Path) else recover_proto
+            rule = ".".join(registry.field_parts(violation.path)) or str(violation.path)
+            skipped[rule] = skipped.get(rule, 0) + 1
+        return recovered, skipped
+
+    def apply(self, payload: TrackedPayload) -> List[RecoverResult]:
+        """
+        Applies the fixes to a payload.
+
+        Args:
+            payload (TrackedPayload): The payload, recording the modified fields.
+
+        Returns:
+            List[RecoverResult]: The result of every fix.
+        """
+        return [fix.recover.apply(payload, fix.path) for fix in self.fixes]
+
+
+def _check(payload: profedit_pb2.Payload, fields: Optional[FrozenSet[str]]) -> Tuple[
+        'expression_pb2.Violations', List[exceptions.SpecViolation], List[Violation]]:
+    """
+    Checks a payload against the rules depending on some profile fields, or against every rule if None.
+
+    Returns:
+        Tuple[expression_pb2.Violations, List[SpecViolation], List[Violation]]: The proto violations,
+            the spec violations, and both as a list of violations, spec ones first.
+    """
+    from a7p import tracking, validation_plan  # pylint: disable=import-outside-toplevel
+    from a7p.protovalidate.internal.constraints import ConstraintContext  # pylint: disable=import-outside-toplevel
+
+    if fields is None:
+        proto_violations, spec_violations = validation_plan.check(payload)
+    else:
+        ctx = ConstraintContext()
+        spec_violations = []
+        tracking._get_plan(fields).run(payload, ctx, spec_violations)  # pylint: disable=protected-access
+        proto_violations = ctx.violations
+    extracted = exceptions._extract_protovalidate_violations(proto_violations)  # pylint: disable=protected-access
+    return proto_violations, spec_violations, spec_violations + extracted
+
+
+def recover(validation_error: A7PValidationError) -> Tuple[RecoverPlan, List[RecoverResult],
+                                                           Optional[A7PValidationError]]:
+    """
+    Fixes the violations of a validation error in its payload and checks the payload again,
+    against the rules depending on the modified fields and on the fields of the violations only.
+
+    Args:
+        validation_error (A7PValidationError): The error of a full validation of the payload.
+
+    Returns:
+        Tuple[RecoverPlan, List[RecoverResult], Optional[A7PValidationError]]: The plan of the
+            violations of the error, the results of the fixes and of the skipped violations,
+            and the error of the violations left, None if the payload is valid.
+    """
+    from a7p import a7p  # pylint: disable=import-outside-toplevel
+
+    payload = validation_error.payload
+    plan = RecoverPlan(validation_error.spec_violations + validation_error.proto_violations)
+    tracked = TrackedPayload(payload)
+    results = plan.apply(tracked)
+    fixed = frozenset(fix.key for fix in plan.fixes)
+    fields = plan.fields
+
+    while True:
+        checked = fields | tracked.dirty if fields is not None else None
+        proto_violations, spec_violations, violations = _check(payload, checked)
+        # fixes may reveal violations of fields pointing into the replaced tables
+        followup = RecoverPlan(violations, fixed)
+        if not followup.fixes:
+            break
+        results += followup.apply(tracked)
+        fixed |= frozenset(fix.key for fix in followup.fixes)
+        fields = checked | followup.fields if checked is not None and followup.fields is not None else None
+
+    results += [RecoverResult(False, violation.path, None, None) for violation in plan.skipped]
+    try:
+        a7p._raise_for_violations(payload, proto_violations, spec_violations)  # pylint: disable=protected-access
+    except A7PValidationError as err:
+        return plan, results, err
+    return plan, results, None
+
+
+__all__ = (
+    'RecoverPlan',
+    'recover',
+)
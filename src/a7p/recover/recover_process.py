@@ -1,16 +1,13 @@
-from a7p import exceptions, validate
-from a7p.exceptions import A7PValidationError, Violation
-from a7p.recover import recover_spec, recover_proto, RecoverResult
+from a7p.exceptions import A7PValidationError
+from a7p.recover import recover_plan
 from a7p.logger import color_print, logger, color_fmt
 
 
-def _print_recover_results_count(violations: list[Violation], results: list[RecoverResult]):
-    total = len(violations)
-    recovered = sum(1 for r in results if r.recovered)
+def _print_recover_results_count(total: int, skipped: int):
     strings = [
         color_fmt(f"Total: {total}"),
-        color_fmt(f"Recovered: {recovered}", levelname="INFO"),
-        color_fmt(f"Skipped: {total - recovered}", levelname="WARNING"),
+        color_fmt(f"Recovered: {total - skipped}", levelname="INFO"),
+        color_fmt(f"Skipped: {skipped}", levelname="WARNING"),
     ]
     prefix = "RESULT".ljust(10)
     print(f'{color_fmt(prefix, levelname="LIGHT_BLUE")} : {", ".join(strings)}')
@@ -19,39 +16,21 @@ def _print_recover_results_count(violations: list[Violation], results: list[Reco
 def attempt_to_recover(validation_error: A7PValidationError):
     logger.info("Attempting to recover payload")
 
-    # trying to fix payload by spec
-    logger.info("Attempting to recover by spec violations")
-    results = recover_spec.recover(validation_error.payload, validation_error.spec_violations)
+    # fixing the proto and spec violations together, then checking the fixed fields only
+    plan, results, err = recover_plan.recover(validation_error)
 
     for r in results:
         r.print()
-    _print_recover_results_count(validation_error.spec_violations, results)
-
-    try:
-        # trying to validate fixed payload
-        validate(validation_error.payload, fail_fast=True)
-    except exceptions.A7PValidationError as err:
-
-        # if still got proto violations trying to fix them too
-        logger.info("Attempting to recover by proto violations")
-        results = recover_proto.recover(err.payload, err.proto_violations)
-
-        for r in results:
-            r.print()
-        _print_recover_results_count(err.proto_violations, results)
-
-        try:
-            # last validation for get fix results
-            logger.info("Final validation")
-            validate(err.payload, fail_fast=False)
-        except exceptions.A7PValidationError as err:
-            for v in err.all_violations:
-                color_print(v.format(), levelname="WARNING")
-            logger.warning("Violations still found")
-            logger.error("Can't recover the payload")
-            return err
-        else:
-            logger.info("No violations found")
-            logger.info("Payload completely recovered")
-
+    total = len(validation_error.spec_violations) + len(validation_error.proto_violations)
+    _print_recover_results_count(total, len(plan.skipped))
+
+    if err is not None:
+        for v in err.all_violations:
+            color_print(v.format(), levelname="WARNING")
+        logger.warning("Violations still found")
+        logger.error("Can't recover the payload")
+        return err
+
+    logger.info("No violations found")
+    logger.info("Payload completely recovered")
     return None
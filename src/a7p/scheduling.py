@@ -0,0 +1,281 @@
+"""
+This module provides the cost-ordered rule schedule of `fail_fast` validation.
+
+The checks of the validation plan are split into its independent rule units: the proto constraints of
+every field, the spec criterion of every field, the checks of the items of repeated message fields and
+the message-level proto constraints. Fail-fast validation runs them by expected cost to the first
+violation, cheap scalar checks first, then the repeated-field CEL and cross-field checks, and stops at
+the first rule reporting a violation, so the error only holds the violations of that rule.
+
+The order is seeded from the kind of every rule. `profile_rules` measures the cost and the failure
+rate of every rule on sample payloads and reorders the schedule by them, `seed_rules` restores
+statistics recorded before.
+
+Classes:
+    RuleStats: The recorded cost and failures of a rule.
+
+Functions:
+    first_violation: Checks a message until the first rule reporting a violation.
+    profile_rules: Records the cost and failures of every rule on sample payloads.
+    seed_rules: Reorders the schedule by recorded rule statistics.
+"""
+
+import copy
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from google.protobuf import descriptor, message as _message
+
+from a7p import validation_plan
+from a7p.validation_plan import RuleUnit
+from a7p.buf.validate import expression_pb2
+from a7p.exceptions import SpecViolation
+from a7p.protovalidate.internal.constraints import (ConstraintContext, ConstraintRules, FieldConstraintRules,
+                                                    RepeatedConstraintRules)
+
+# Seed costs of the rule kinds, in microseconds
+_COST_SCALAR = 1.0
+_COST_CEL = 10.0
+_COST_REPEATED = 5.0
+_COST_ITEMS = 25.0
+_COST_COMPOSITE = 30.0
+
+
+@dataclass
+class RuleStats:
+    """
+    The recorded cost and failures of a rule.
+
+    Attributes:
+        runs (int): The number of recorded runs.
+        seconds (float): The total time of the recorded runs passing. The time a failing rule takes
+            to report its violations is spent once whichever rule fails first, so it is left out.
+        failures (int): The number of recorded runs reporting a violation.
+    """
+    runs: int = 0
+    seconds: float = 0.0
+    failures: int = 0
+
+
+def _rule_cost(rule: ConstraintRules) -> float:
+    """Returns the seed cost of a proto constraint, scalar checks having native pre-checks being the cheapest."""
+    if isinstance(rule, RepeatedConstraintRules):
+        return _COST_REPEATED
+    if isinstance(rule, FieldConstraintRules):
+        checks = rule.native_checks()
+        if checks is not None:
+            return _COST_SCALAR * max(len(checks), 1)
+    return _COST_CEL
+
+
+def _unit_cost(unit: RuleUnit) -> float:
+    """Returns the seed cost of a rule unit, from its kind."""
+    if unit.kind == RuleUnit.MESSAGE:
+        return _COST_CEL * len(unit.proto_rules)
+    field_plan = unit.field_plan
+    if unit.kind == RuleUnit.PROTO:
+        cost = sum(map(_rule_cost, unit.proto_rules))
+        if field_plan.is_repeated and field_plan.is_message:
+            cost += _COST_ITEMS
+        return cost
+    if unit.kind == RuleUnit.ITEMS:
+        return _COST_ITEMS
+    func = field_plan.criterion.validation_func
+    if field_plan.is_message or hasattr(func, 'depends_on'):
+        return _COST_COMPOSITE
+    if field_plan.is_repeated:
+        return _COST_REPEATED
+    # a single assertion reports its violation without running CEL, unlike the proto constraints
+    return _COST_SCALAR / 2 if hasattr(func, 'predicate') else 2 * _COST_SCALAR
+
+
+class _Rule:
+    """
+    A rule unit of the schedule, with its cost.
+
+    Attributes:
+        unit (RuleUnit): The checks of the rule.
+        cost (float): The seed cost of the rule, in microseconds.
+        stats (RuleStats): The recorded cost and failures of the rule.
+    """
+    __slots__ = ('unit', 'cost', 'stats')
+
+    def __init__(self, unit: RuleUnit):
+        self.unit = unit
+        self.cost = _unit_cost(unit)
+        self.stats = RuleStats()
+
+    @property
+    def name(self) -> str:
+        """
+        Returns the rule name, the field path followed by the rule kind.
+
+        Returns:
+            str: The name of the rule unit.
+        """
+        return self.unit.name
+
+    @property
+    def priority(self) -> float:
+        """
+        Returns the expected cost of the rule per violation found, the lower the sooner it runs.
+
+        Returns:
+            float: The cost divided by the failure rate, with a uniform prior on the failure rate.
+        """
+        stats = self.stats
+        passes = stats.runs - stats.failures
+        cost = stats.seconds * 1e6 / passes if passes else self.cost
+        return cost * (stats.runs + 2) / (stats.failures + 1)
+
+
+class _Schedule:
+    """
+    The rules of a message type, in the order fail-fast validation runs them.
+    """
+
+    def __init__(self, plan: validation_plan.ValidationPlan, previous: Optional['_Schedule'] = None):
+        """
+        Splits a plan into rules.
+
+        Args:
+            plan (validation_plan.ValidationPlan): The validation plan of the message type.
+            previous (Optional[_Schedule]): The schedule of a previous plan of the message type,
+                to take the recorded statistics of the rules from.
+        """
+        self.plan = plan
+        self.rules = [_Rule(unit) for unit in plan.units()]
+        self._plan_order = {rule.name: index for index, rule in enumerate(self.rules)}
+        if previous is not None:
+            stats = {rule.name: rule.stats for rule in previous.rules}
+            for rule in self.rules:
+                rule.stats = stats.get(rule.name, rule.stats)
+        self.reorder()
+
+    def reorder(self) -> None:
+        """
+        Sorts the rules by their expected cost per violation found, keeping the plan order on ties.
+        """
+        self.rules.sort(key=lambda rule: (rule.priority, self._plan_order[rule.name]))
+
+    def first_violation(self, message: _message.Message) -> Tuple[expression_pb2.Violations, List[SpecViolation]]:
+        """
+        Runs the rules in order until the first one reporting a violation.
+
+        Args:
+            message (Message): The message to check.
+
+        Returns:
+            Tuple[expression_pb2.Violations, List[SpecViolation]]: The proto and the spec violations of the rule.
+        """
+        ctx = ConstraintContext()
+        violations: List[SpecViolation] = []
+        for rule in self.rules:
+            rule.unit.run(message, ctx, violations)
+            if violations:
+                return expression_pb2.Violations(), violations
+            if ctx.has_errors():
+                return ctx.violations, violations
+        return ctx.violations, violations
+
+    def profile(self, message: _message.Message) -> None:
+        """
+        Runs every rule on a message, recording its cost and whether it reported a violation.
+
+        Args:
+            message (Message): The message to check.
+        """
+        for rule in self.rules:
+            ctx = ConstraintContext()
+            violations: List[SpecViolation] = []
+            start = time.perf_counter()
+            rule.unit.run(message, ctx, violations)
+            elapsed = time.perf_counter() - start
+            stats = rule.stats
+            stats.runs += 1
+            if violations or ctx.has_errors():
+                stats.failures += 1
+            else:
+                stats.seconds += elapsed
+
+
+_schedules: Dict[descriptor.Descriptor, _Schedule] = {}
+
+
+def _get_schedule(desc: descriptor.Descriptor) -> _Schedule:
+    """Returns the cached schedule of a message type, building it on first use and when the plan is built again."""
+    plan = validation_plan.get_plan(desc)
+    schedule = _schedules.get(desc)
+    if schedule is None or schedule.plan is not plan:
+        schedule = _schedules[desc] = _Schedule(plan, schedule)
+    return schedule
+
+
+def first_violation(message: _message.Message) -> Tuple[expression_pb2.Violations, List[SpecViolation]]:
+    """
+    Checks a message against the proto and spec rules until the first rule reporting a violation,
+    running the rules by expected cost.
+
+    Args:
+        message (Message): The message to check.
+
+    Returns:
+        Tuple[expression_pb2.Violations, List[SpecViolation]]: The proto and the spec violations
+            of the first failing rule, both empty if the message is valid.
+    """
+    return _get_schedule(message.DESCRIPTOR).first_violation(message)
+
+
+def profile_rules(messages: Iterable[_message.Message]) -> Dict[str, RuleStats]:
+    """
+    Runs every rule on sample messages, recording its cost and failures, and reorders the schedule by them.
+
+    Statistics add up over calls. They are kept per rule name, so the returned mapping can be stored
+    and passed to `seed_rules` later.
+
+    Args:
+        messages (Iterable[Message]): The sample messages, of the same type.
+
+    Returns:
+        Dict[str, RuleStats]: The statistics of every rule of the message type, by rule name, in schedule order.
+    """
+    schedule = None
+    for message in messages:
+        if schedule is None:
+            schedule = _get_schedule(message.DESCRIPTOR)
+        schedule.profile(message)
+    if schedule is None:
+        return {}
+    schedule.reorder()
+    return {rule.name: rule.stats for rule in schedule.rules}
+
+
+def seed_rules(desc: descriptor.Descriptor, stats: Mapping[str, Union[RuleStats, Mapping[str, float]]]) -> None:
+    """
+    Replaces the statistics of the rules of a message type and reorders its schedule by them.
+
+    Args:
+        desc (descriptor.Descriptor): The message descriptor.
+        stats (Mapping[str, Union[RuleStats, Mapping[str, float]]]): The statistics by rule name,
+            as returned by `profile_rules` or as dictionaries of the `RuleStats` fields.
+            Rules missing from the mapping get their seed cost back, unknown names are ignored.
+    """
+    schedule = _get_schedule(desc)
+    for rule in schedule.rules:
+        rule_stats = stats.get(rule.name)
+        if rule_stats is None:
+            rule.stats = RuleStats()
+        elif isinstance(rule_stats, RuleStats):
+            rule.stats = copy.copy(rule_stats)
+        else:
+            rule.stats = RuleStats(**rule_stats)
+    schedule.reorder()
+
+
+__all__ = (
+    'RuleStats',
+    'first_violation',
+    'profile_rules',
+    'seed_rules',
+)
@@ -8,12 +8,15 @@ It includes the following components:
 
 2. **SpecValidator Class**:
    The `SpecValidator` class is responsible for managing the validation criteria. It allows registering validation functions for specific paths within the payload and provides a method to validate the entire payload based on these functions.
+   Criteria are looked up through an index compiled from the registry, where a "[*]" path part matches any list item (e.g. "~/profile/distances/[*]"), and subtrees no criterion can apply to are not visited.
+   Protobuf messages are validated with `validate_message`, which reads the values straight from the message through field accessors precomputed for the registered criteria, instead of walking the dictionary form of the message.
+   Composite validation functions may declare a batch form with `batch_form`, checks of the values below the message that can be evaluated over many messages at once, see `vectorized`.
 
 3. **_DefaultSpecValidator Class**:
    This subclass of `SpecValidator` automatically registers a predefined set of validation functions for the most common payload fields. It is used to simplify the validation process by providing out-of-the-box validation logic for a variety of fields.
 
 4. **validate_spec Function**:
-   The `validate_spec` function is the main entry point for validating a payload. It converts a protobuf message into a dictionary, then uses `_DefaultSpecValidator` to validate the data. If the data is invalid, an `A7PSpecValidationError` is raised, which includes details about the violations.
+   The `validate_spec` function is the main entry point for validating a payload. It uses `_DefaultSpecValidator` to validate the protobuf message. If the data is invalid, an `A7PSpecValidationError` is raised, which includes details about the violations.
 
 Key Features:
 - **Flexible Validation**: The validation functions are designed to be flexible, allowing for different kinds of validation checks, such as length checks, range checks, and type checks.
@@ -31,13 +34,15 @@ Module Dependencies:
 
 """
 
+import sys
 from dataclasses import dataclass
 from functools import wraps
 from pathlib import Path
-from typing import Callable, Any, Tuple, Type, Dict, Optional, Union, List
+from typing import Callable, Any, Tuple, Type, Dict, FrozenSet, Optional, Union, List
 
-import a7p
-from . import profedit_pb2
+from google.protobuf import descriptor, message as _message
+
+from . import convert, profedit_pb2
 from .exceptions import SpecViolation, A7PSpecTypeError, A7PSpecValidationError
 
 # Define a custom type for the return value
@@ -63,6 +68,16 @@ class SpecCriterion:
     path: Path
     validation_func: SpecFlexibleValidatorFunction
 
+    @property
+    def accepts_message(self) -> bool:
+        """
+        Returns True if the validation function accepts protobuf messages, see `accepts_message`.
+
+        Returns:
+            bool: True if message fields are passed to the validation function as they are.
+        """
+        return getattr(self.validation_func, 'accepts_message', False)
+
     def validate(self, data: Any, path: Union[Path, str], violations: List['SpecViolation']) -> SpecValidationResult:
         """
         Validates the given data and records violations if any.
@@ -118,6 +133,135 @@ def assert_spec_type(*expected_types: Type) -> Callable[[SpecFlexibleValidatorFu
     return decorator
 
 
+def accepts_message(func: SpecFlexibleValidatorFunction) -> SpecFlexibleValidatorFunction:
+    """
+    Decorator marking a validation function that accepts protobuf messages.
+
+    `SpecValidator.validate_message` passes message fields to such functions as they are
+    (a message or a repeated message field), and the dictionary form of the message field to
+    any other function. The function still gets dictionaries from `SpecValidator.validate`.
+
+    Parameters:
+        func (SpecFlexibleValidatorFunction): The validation function.
+
+    Returns:
+        SpecFlexibleValidatorFunction: The same function, marked.
+    """
+    func.accepts_message = True
+    return func
+
+
+def depends_on(*fields: str) -> Callable[[SpecFlexibleValidatorFunction], SpecFlexibleValidatorFunction]:
+    """
+    Decorator declaring the fields a validation function of a message reads, such as the fields
+    of a profile checked together, so the function is only rerun when one of them changes.
+
+    Parameters:
+        fields (str): The names of the fields of the message read by the function.
+
+    Returns:
+        Callable: A decorator recording the names in the `depends_on` attribute of the function.
+    """
+
+    def decorator(func: SpecFlexibleValidatorFunction) -> SpecFlexibleValidatorFunction:
+        func.depends_on = frozenset(fields)
+        return func
+
+    return decorator
+
+
+def single_assertion(assertion: SpecFlexibleValidatorFunction,
+                     *params: Any) -> Callable[[SpecFlexibleValidatorFunction], SpecFlexibleValidatorFunction]:
+    """
+    Decorator building a validation function that only applies an assertion with fixed parameters,
+    such as `assert_float_range(x, -200.0, 200.0, 1000)`, so the check can be evaluated over many values at once.
+
+    The decorated function only provides the name and the docstring, the assertion and its parameters
+    are declared once, by the decorator.
+
+    Parameters:
+        assertion (SpecFlexibleValidatorFunction): The assertion, e.g. `assert_float_range`.
+        params (Any): The parameters passed to the assertion after the value.
+
+    Returns:
+        Callable: A decorator returning the validation function, with the assertion recorded in its
+            `assertion` attribute.
+    """
+
+    def decorator(func: SpecFlexibleValidatorFunction) -> SpecFlexibleValidatorFunction:
+        @wraps(func)
+        def check(x: Any, *args: Any, **kwargs: Any) -> SpecValidationResult:
+            return assertion(x, *params)
+
+        check.assertion = (assertion, params)
+        check.predicate = _assertion_predicate(assertion, params)
+        return check
+
+    return decorator
+
+
+def _assertion_predicate(assertion: SpecFlexibleValidatorFunction,
+                         params: Tuple[Any, ...]) -> Optional[Callable[[Any], bool]]:
+    """Returns a predicate telling if a value passes an assertion, including its type check, None if not known."""
+    if assertion is assert_float_range:
+        min_value, max_value, divisor = (params + (1,))[:3]
+        return lambda x: isinstance(x, (float, int)) and min_value <= x / divisor <= max_value
+    if assertion is assert_int_range:
+        min_value, max_value = params
+        return lambda x: isinstance(x, int) and min_value <= x <= max_value
+    if assertion is assert_shorter_le:
+        max_len, = params
+        return lambda x: isinstance(x, str) and len(x) <= max_len
+    if assertion is assert_choice:
+        keys, = params
+        return lambda x: x in keys
+    if assertion is assert_items_count:
+        min_count, max_count = params
+        return lambda x: isinstance(x, (tuple, list)) and min_count <= len(x) <= max_count
+    return None
+
+
+@dataclass(frozen=True)
+class BatchCheck:
+    """
+    A check of the values at some paths below the message passed to a composite validation function,
+    part of the batch form of the function, see `batch_form`.
+
+    Attributes:
+        paths (Tuple[str, ...]): The paths of the values passed to the function, relative to the message,
+            with field names separated by "/" and a WILDCARD_ITEM part standing for every item of a list.
+            Only the check of a single path may have a WILDCARD_ITEM part.
+        func (SpecFlexibleValidatorFunction): The validation function, called with the dictionary forms of the values.
+        when (Optional[Tuple[str, Tuple[Any, ...]]]): The name of a field of the message and the dictionary forms
+            of its values the check applies for, None if it always applies.
+    """
+    paths: Tuple[str, ...]
+    func: SpecFlexibleValidatorFunction
+    when: Optional[Tuple[str, Tuple[Any, ...]]] = None
+
+
+def batch_form(*checks: BatchCheck) -> Callable[[SpecFlexibleValidatorFunction], SpecFlexibleValidatorFunction]:
+    """
+    Decorator declaring the batch form of a composite validation function accepting messages: checks of
+    the values below the message such that the function reports no violation for a message passing them all,
+    so it can be evaluated over many messages at once, each check over the values of every message.
+
+    A message failing a check may still be valid, the function itself tells it.
+
+    Parameters:
+        checks (BatchCheck): The checks of the batch form.
+
+    Returns:
+        Callable: A decorator recording the checks in the `batch_form` attribute of the function.
+    """
+
+    def decorator(func: SpecFlexibleValidatorFunction) -> SpecFlexibleValidatorFunction:
+        func.batch_form = checks
+        return func
+
+    return decorator
+
+
 # assertion methods section
 @assert_spec_type(str)
 def assert_shorter_le(string: str, max_len: int) -> SpecValidationResult:
@@ -208,12 +352,331 @@ def assert_items_count(items: Union[tuple, list], min_count: int, max_count: int
     return True, ""
 
 
+# Criteria index section
+# Path part matching every list item, e.g. "distances/[*]"
+WILDCARD_ITEM = "[*]"
+
+
+def _is_item(part: str) -> bool:
+    """Returns True if a path part is a list item, such as "[3]"."""
+    return isinstance(part, str) and part.startswith("[") and part.endswith("]")
+
+
+class _IndexNode:
+    """A node of the criteria path trie, keyed by path part."""
+    __slots__ = ('children', 'criterion')
+
+    def __init__(self):
+        self.children: Dict[str, _IndexNode] = {}
+        self.criterion: Optional[SpecCriterion] = None
+
+
+class _CriteriaIndex:
+    """
+    The criteria of a validator compiled for lookup by path parts.
+
+    Criteria registered by name (a key with no "/") are looked up by the last path part,
+    the others by every path part through a trie. The WILDCARD_ITEM part, as a name or
+    within a path, matches any list item.
+
+    Attributes:
+        names (Dict[str, SpecCriterion]): The criteria registered by name.
+        root (_IndexNode): The root of the trie of the criteria registered by path.
+        item_names (bool): Whether any name criterion applies to list items.
+        pruning_names (FrozenSet[str]): The names of the criteria that can fail, which no
+            subtree is pruned for, the default "~" criterion always passes.
+    """
+    __slots__ = ('names', 'root', 'item_names', 'pruning_names')
+
+    def __init__(self, criteria: Dict[str, SpecCriterion]):
+        self.names: Dict[str, SpecCriterion] = {}
+        self.root = _IndexNode()
+        for key, criterion in criteria.items():
+            if "/" not in key:
+                self.names[key] = criterion
+                continue
+            node = self.root
+            for part in Path(key).parts:
+                node = node.children.setdefault(part, _IndexNode())
+            node.criterion = criterion
+        self.item_names = any(_is_item(name) for name in self.names)
+        self.pruning_names = frozenset(name for name, criterion in self.names.items()
+                                       if criterion.validation_func is not _always_valid)
+
+    def children(self, nodes: Tuple[_IndexNode, ...], part: str) -> Tuple[_IndexNode, ...]:
+        """
+        Returns the trie nodes matching the next path part, exact matches first.
+
+        Parameters:
+            nodes (Tuple[_IndexNode, ...]): The trie nodes matching the path so far.
+            part (str): The next path part.
+
+        Returns:
+            Tuple[_IndexNode, ...]: The matching trie nodes.
+        """
+        matched = []
+        for node in nodes:
+            child = node.children.get(part)
+            if child is not None:
+                matched.append(child)
+            if _is_item(part):
+                child = node.children.get(WILDCARD_ITEM)
+                if child is not None:
+                    matched.append(child)
+        return tuple(matched)
+
+    def nodes(self, parts: Tuple[str, ...]) -> Tuple[_IndexNode, ...]:
+        """
+        Returns the trie nodes matching a path.
+
+        Parameters:
+            parts (Tuple[str, ...]): The path parts.
+
+        Returns:
+            Tuple[_IndexNode, ...]: The matching trie nodes.
+        """
+        nodes = (self.root,)
+        for part in parts:
+            if not nodes:
+                break
+            nodes = self.children(nodes, part)
+        return nodes
+
+    def lookup(self, name: str, nodes: Tuple[_IndexNode, ...]) -> Optional[SpecCriterion]:
+        """
+        Returns the criterion of a path, matching its name first, then the path itself.
+
+        Parameters:
+            name (str): The last path part.
+            nodes (Tuple[_IndexNode, ...]): The trie nodes matching the path.
+
+        Returns:
+            Optional[SpecCriterion]: The criterion, or None if not found.
+        """
+        criterion = self.names.get(name)
+        if criterion is None and self.item_names and _is_item(name):
+            criterion = self.names.get(WILDCARD_ITEM)
+        if criterion is None:
+            for node in nodes:
+                if node.criterion is not None:
+                    return node.criterion
+        return criterion
+
+    def may_match_below(self, nodes: Tuple[_IndexNode, ...], names: Any = None) -> bool:
+        """
+        Returns True if a criterion may apply below a path.
+
+        Parameters:
+            nodes (Tuple[_IndexNode, ...]): The trie nodes matching the path.
+            names (Any, optional): The names of the fields found below the path, if known,
+                any name may be found below if None.
+
+        Returns:
+            bool: False if no criterion can apply below the path.
+        """
+        if any(node.children for node in nodes) or self.item_names:
+            return True
+        if names is None:
+            return bool(self.pruning_names)
+        return not self.pruning_names.isdisjoint(names)
+
+
+@accepts_message
+def _always_valid(x: Any, *args: Any, **kwargs: Any) -> SpecValidationResult:
+    """Validation that always passes."""
+    return True, ""
+
+
+# Message accessors section
+_FD = descriptor.FieldDescriptor
+
+_subtree_names: Dict[descriptor.Descriptor, FrozenSet[str]] = {}
+
+
+def _field_names(desc: descriptor.Descriptor) -> FrozenSet[str]:
+    """Returns the names of all fields of a message type and of its nested message types."""
+    names = _subtree_names.get(desc)
+    if names is None:
+        # a recursive type sees its own names while they are being collected
+        _subtree_names[desc] = frozenset(field.name for field in desc.fields)
+        names = set(_subtree_names[desc])
+        for field in desc.fields:
+            if field.message_type is not None:
+                names |= _field_names(field.message_type)
+        names = _subtree_names[desc] = frozenset(names)
+    return names
+
+
+def _data_converter(field: descriptor.FieldDescriptor, criterion: Optional[SpecCriterion]) -> Callable[[Any], Any]:
+    """Returns the converter of a field value to the data passed to the criterion of the field."""
+    if field.cpp_type == _FD.CPPTYPE_MESSAGE:
+        to_json = _item_converter(criterion, None)
+        if to_json is not convert.message_to_dict:
+            return to_json
+    else:
+        to_json = convert.value_converter(field)
+    if field.label == _FD.LABEL_REPEATED:
+        return lambda value: [to_json(v) for v in value]
+    return to_json
+
+
+def _item_converter(criterion: Optional[SpecCriterion],
+                    to_json: Optional[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    """Returns the converter of a message, or of a scalar if to_json is given, to the data passed to the criterion."""
+    if to_json is not None:
+        return to_json
+    if criterion is not None and criterion.accepts_message:
+        return lambda value: value
+    return convert.message_to_dict
+
+
+def _may_match(validator: 'SpecValidator', path: Path, desc: Optional[descriptor.Descriptor]) -> bool:
+    """Returns True if a criterion may apply below the path, given the message type found there, if any."""
+    index = validator._get_index()  # pylint: disable=protected-access
+    return index.may_match_below(index.nodes(path.parts), _field_names(desc) if desc is not None else ())
+
+
+class _FieldAccessor:
+    """
+    The precomputed accessor of a message field having a criterion at or below it.
+
+    Attributes:
+        name (str): The field name.
+        number (int): The field number.
+        path (Path): The path of the field.
+        criterion (Optional[SpecCriterion]): The criterion of the field.
+        has_presence (bool): Whether the field is omitted from the dictionary form when unset.
+    """
+    __slots__ = ('_validator', '_field', 'name', 'number', 'path', 'criterion', 'has_presence',
+                 '_to_data', '_message', '_items', 'active')
+
+    def __init__(self, validator: 'SpecValidator', field: descriptor.FieldDescriptor, path: Path):
+        self._validator = validator
+        self._field = field
+        self.name = field.name
+        self.number = field.number
+        self.path = path
+        self.criterion = validator.get_criteria(path)
+        is_repeated = field.label == _FD.LABEL_REPEATED
+        self.has_presence = not is_repeated and (field.message_type is not None or field.containing_oneof is not None)
+        self._to_data = _data_converter(field, self.criterion)
+        self._message: Optional[_MessageAccessors] = None
+        self._items: Optional[_ListAccessors] = None
+        may_match = (is_repeated or field.message_type is not None) and _may_match(validator, path, field.message_type)
+        if may_match and is_repeated:
+            to_json = None if field.message_type is not None else convert.value_converter(field)
+            self._items = _ListAccessors(validator, path, field.message_type, to_json)
+        self.active = self.criterion is not None or may_match
+        self._message = None if is_repeated or not may_match else False
+
+    def validate(self, value: Any, violations: List[SpecViolation]) -> None:
+        """
+        Validates the field value and its items or fields.
+
+        Parameters:
+            value (Any): The field value.
+            violations (List[SpecViolation]): The list of violations to append to.
+        """
+        if self._items is not None:
+            self._items.walk(value, violations)
+        elif self._message is not None:
+            if self._message is False:
+                # built on first use, so recursive message types are compiled as deep as they are used
+                self._message = _MessageAccessors(self._validator, self._field.message_type, self.path)
+            self._message.walk(value, violations)
+        if self.criterion is not None:
+            self.criterion.validate(self._to_data(value), self.path, violations)
+
+
+class _MessageAccessors:
+    """
+    The precomputed accessors of the fields of a message type at a path,
+    holding only the fields having a criterion at or below them.
+    """
+    __slots__ = ('fields', 'set_order')
+
+    def __init__(self, validator: 'SpecValidator', desc: descriptor.Descriptor, path: Path):
+        self.fields = [accessor for accessor in (_FieldAccessor(validator, field, path / field.name)
+                                                 for field in desc.fields) if accessor.active]
+        # the dictionary form lists the set fields first by number, then the unset ones in declaration order
+        self.set_order = sorted(range(len(self.fields)), key=lambda i: self.fields[i].number)
+
+    def walk(self, message: _message.Message, violations: List[SpecViolation]) -> None:
+        """
+        Validates the fields of a message in the order of its dictionary form.
+
+        Parameters:
+            message (Message): The message to validate.
+            violations (List[SpecViolation]): The list of violations to append to.
+        """
+        set_violations: List[Optional[List[SpecViolation]]] = [None] * len(self.fields)
+        unset_violations: List[SpecViolation] = []
+        for index, accessor in enumerate(self.fields):
+            value = getattr(message, accessor.name)
+            if accessor.has_presence:
+                if not message.HasField(accessor.name):
+                    continue
+                field_violations = set_violations[index] = []
+            elif value:
+                field_violations = set_violations[index] = []
+            else:
+                field_violations = unset_violations
+            accessor.validate(value, field_violations)
+        for index in self.set_order:
+            if set_violations[index]:
+                violations.extend(set_violations[index])
+        violations.extend(unset_violations)
+
+
+class _ListAccessors:
+    """
+    The accessors of the items of a list, built for every list index on first use.
+    """
+    __slots__ = ('_validator', '_path', '_message_type', '_to_json', '_items')
+
+    def __init__(self, validator: 'SpecValidator', path: Path, message_type: Optional[descriptor.Descriptor],
+                 to_json: Optional[Callable[[Any], Any]] = None):
+        self._validator = validator
+        self._path = path
+        self._message_type = message_type
+        self._to_json = to_json
+        self._items: List[Tuple[Path, Optional[SpecCriterion], Optional[_MessageAccessors], Callable]] = []
+
+    def _item(self, index: int) -> Tuple[Path, Optional[SpecCriterion], Optional[_MessageAccessors], Callable]:
+        while len(self._items) <= index:
+            path = self._path / f"[{len(self._items)}]"
+            criterion = self._validator.get_criteria(path)
+            accessors = None
+            if self._message_type is not None:
+                accessors = _MessageAccessors(self._validator, self._message_type, path)
+                if not accessors.fields:
+                    accessors = None
+            self._items.append((path, criterion, accessors, _item_converter(criterion, self._to_json)))
+        return self._items[index]
+
+    def walk(self, items: Any, violations: List[SpecViolation]) -> None:
+        """
+        Validates the items of a repeated field.
+
+        Parameters:
+            items (Any): The repeated field value.
+            violations (List[SpecViolation]): The list of violations to append to.
+        """
+        for index, item in enumerate(items):
+            path, criterion, accessors, to_data = self._item(index)
+            if accessors is not None:
+                accessors.walk(item, violations)
+            if criterion is not None:
+                criterion.validate(to_data(item), path, violations)
+
+
 class SpecValidator:
     """
     A class responsible for validating data according to specified criteria.
 
     Attributes:
         criteria (Dict[str, SpecCriterion]): A dictionary mapping paths to their corresponding validation criteria.
+        generation (int): The number of changes of the criteria, so the caches built from them can tell they are stale.
 
     Methods:
         register(path: Union[str, Path], criteria: SpecFlexibleValidatorFunction):
@@ -227,6 +690,9 @@ class SpecValidator:
 
         validate(data: Any, path: Path = Path("~/"), violations: Optional[List[SpecViolation]] = None) -> Tuple[bool, List[SpecViolation]]:
             Validates the provided data according to the registered criteria and collects any violations.
+
+        validate_message(message: Any, path: Path = Path("~/"), violations: Optional[List[SpecViolation]] = None) -> Tuple[bool, List[SpecViolation]]:
+            Validates a protobuf message the same way, reading the values straight from the message.
     """
 
     def __init__(self):
@@ -234,8 +700,13 @@ class SpecValidator:
         Initializes the SpecValidator with an empty criteria dictionary and a default registration.
         """
         self.criteria: Dict[str, SpecCriterion] = {}
+        self.generation = 0
+        # The criteria compiled for lookup, built on first use
+        self._index: Optional[_CriteriaIndex] = None
+        # Field accessors of the message types validated so far, by type and path
+        self._accessors: Dict[Tuple[descriptor.Descriptor, str], Any] = {}
         # Register a default validation that always passes
-        self.register("~", lambda x, *args, **kwargs: (True, ""))
+        self.register("~", _always_valid)
 
     def register(self, path: Union[Path, str], criteria: SpecFlexibleValidatorFunction):
         """
@@ -251,6 +722,9 @@ class SpecValidator:
         if path in self.criteria:
             raise KeyError(f"Criterion for {path} already exists.")
         self.criteria[str(path)] = SpecCriterion(Path(path), criteria)
+        self.generation += 1
+        self._index = None
+        self._accessors.clear()
 
     def unregister(self, key: str):
         """
@@ -260,28 +734,44 @@ class SpecValidator:
             key (str): The path of the criterion to remove.
         """
         self.criteria.pop(key, None)
+        self.generation += 1
+        self._index = None
+        self._accessors.clear()
+
+    def _get_index(self) -> _CriteriaIndex:
+        """
+        Returns the criteria compiled for lookup, compiling them after a change.
+
+        Returns:
+            _CriteriaIndex: The criteria index.
+        """
+        if self._index is None:
+            self._index = _CriteriaIndex(self.criteria)
+        return self._index
 
     def get_criteria(self, path: Path) -> Optional[SpecCriterion]:
         """
         Retrieves the validation criterion for a specified path.
 
+        The criterion registered for the name of the path is returned first, then the one registered
+        for the path itself. A "[*]" name or path part matches any list item.
+
         Parameters:
             path (Path): The path to retrieve the validation criterion for.
 
         Returns:
             Optional[SpecCriterion]: The validation criterion associated with the path, or None if not found.
         """
-        key = path.name
-        criterion = self.criteria.get(key, None)
-        if criterion is None:
-            criterion = self.criteria.get(path.as_posix())
-        return criterion
+        index = self._get_index()
+        return index.lookup(path.name, index.nodes(path.parts))
 
     def validate(self, data: Any, path: Path = Path("~/"), violations: Optional[List[SpecViolation]] = None) -> Tuple[
         bool, List[SpecViolation]]:
         """
         Validates the given data recursively according to the registered validation criteria.
 
+        Subtrees no criterion can apply to are not visited.
+
         Parameters:
             data (Any): The data to validate.
             path (Path, optional): The current path being validated (default is Path("~/")).
@@ -294,159 +784,259 @@ class SpecValidator:
         if violations is None:
             violations = []
 
+        index = self._get_index()
+        self._walk(index, data, path, path.parts, index.nodes(path.parts), violations)
+
+        return len(violations) == 0, violations
+
+    def _walk(self, index: _CriteriaIndex, data: Any, path: Optional[Path], parts: Tuple[str, ...],
+              nodes: Tuple[_IndexNode, ...], violations: List[SpecViolation]) -> None:
+        """
+        Validates the data at a path and below it, building the path only for the criteria found.
+
+        Parameters:
+            index (_CriteriaIndex): The criteria index.
+            data (Any): The data to validate.
+            path (Optional[Path]): The path of the data, None if not built yet.
+            parts (Tuple[str, ...]): The parts of the path.
+            nodes (Tuple[_IndexNode, ...]): The trie nodes matching the path.
+            violations (List[SpecViolation]): The list of violations to append to.
+        """
         # If `data` is a dictionary, recursively validate its key-value pairs
         if isinstance(data, dict):
-            for key, value in data.items():
-                current_path = path / key
-                self.validate(value, current_path, violations)
+            if index.may_match_below(nodes):
+                for key, value in data.items():
+                    self._walk(index, value, None, parts + (key,), index.children(nodes, key), violations)
 
         # If `data` is a list, recursively validate its elements
         elif isinstance(data, list):
-            for i, item in enumerate(data):
-                item_path = path / f"[{i}]"
-                self.validate(item, item_path, violations)
+            # items holding no dictionaries or lists only match the item names and paths
+            names = None if any(isinstance(item, (dict, list)) for item in data) else ()
+            if index.may_match_below(nodes, names):
+                for i, item in enumerate(data):
+                    key = f"[{i}]"
+                    self._walk(index, item, None, parts + (key,), index.children(nodes, key), violations)
 
         # Validate the data at the current path according to its criterion
+        criterion = index.lookup(parts[-1] if parts else "", nodes)
+        if criterion is not None:
+            criterion.validate(data, Path(*parts) if path is None else path, violations)
+
+    def validate_message(self, message: Any, path: Path = Path("~/"),
+                         violations: Optional[List[SpecViolation]] = None) -> Tuple[bool, List[SpecViolation]]:
+        """
+        Validates a protobuf message, or a repeated message field, according to the registered validation criteria.
+
+        Reports the same violations as `validate` does for the dictionary form of the message, without
+        building it: the values are read straight from the message through field accessors precomputed
+        for the registered criteria, fields with no criterion at or below them are not visited.
+
+        Parameters:
+            message (Any): The message or the repeated message field to validate.
+            path (Path, optional): The path of the message (default is Path("~/")).
+            violations (Optional[List[SpecViolation]], optional): A list to accumulate validation violations (default is None).
+
+        Returns:
+            Tuple[bool, List[SpecViolation]]: A tuple where the first element is a boolean indicating if validation passed
+                                              and the second element is a list of violations (if any).
+        """
+        if violations is None:
+            violations = []
+
+        if isinstance(message, _message.Message):
+            desc = message.DESCRIPTOR
+            key = (desc, path.as_posix())
+            accessors = self._accessors.get(key)
+            if accessors is None:
+                accessors = self._accessors[key] = _MessageAccessors(self, desc, path)
+            accessors.walk(message, violations)
+        elif len(message):
+            desc = message[0].DESCRIPTOR
+            key = (desc, path.as_posix() + "/[]")
+            accessors = self._accessors.get(key)
+            if accessors is None:
+                accessors = self._accessors[key] = _ListAccessors(self, path, desc)
+            accessors.walk(message, violations)
+
         criterion = self.get_criteria(path)
-        if isinstance(criterion, SpecCriterion):
+        if criterion is not None:
+            if criterion.accepts_message:
+                data = message
+            elif isinstance(message, _message.Message):
+                data = convert.message_to_dict(message)
+            else:
+                data = [convert.message_to_dict(item) for item in message]
             criterion.validate(data, path, violations)
 
         return len(violations) == 0, violations
 
 
+def _validate_data(validator: SpecValidator, data: Any, path: Path, violations: List[SpecViolation]) -> None:
+    """Validates a dictionary form with `validate`, a message or a repeated message field with `validate_message`."""
+    if isinstance(data, (dict, list)):
+        validator.validate(data, path, violations)
+    else:
+        validator.validate_message(data, path, violations)
+
+
+def _field_data(data: Any, key: str) -> Any:
+    """Returns the value of a key of a dictionary form, or the dictionary form of a message field."""
+    if isinstance(data, dict):
+        return data[key]
+    field = data.DESCRIPTOR.fields_by_name[key]
+    return _data_converter(field, None)(getattr(data, key))
+
+
+def _is_valid(func: SpecFlexibleValidatorFunction, data: Any) -> bool:
+    """
+    Returns True if the data passes a validation function, so the violation path is only built
+    when the function fails and the criterion is run to report it.
+    """
+    predicate = getattr(func, 'predicate', None)
+    if predicate is not None:
+        return predicate(data)
+    try:
+        return func(data)[0]
+    except (TypeError, A7PSpecTypeError):
+        return False
+
+
 # Default validation functions section
+@single_assertion(assert_shorter_le, 50)
 def _check_profile_name(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the profile name is shorter than 50 characters."""
-    return assert_shorter_le(x, 50)
 
 
+@single_assertion(assert_shorter_le, 50)
 def _check_cartridge_name(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the cartridge name is shorter than 50 characters."""
-    return assert_shorter_le(x, 50)
 
 
+@single_assertion(assert_shorter_le, 50)
 def _check_caliber(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the caliber name is shorter than 50 characters."""
-    return assert_shorter_le(x, 50)
 
 
+@single_assertion(assert_shorter_le, 50)
 def _check_bullet_name(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the bullet name is shorter than 50 characters."""
-    return assert_shorter_le(x, 50)
 
 
+@single_assertion(assert_shorter_le, 50)
 def _check_device_uuid(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the device UUID is shorter than 50 characters."""
-    return assert_shorter_le(x, 50)
 
 
+@single_assertion(assert_shorter_le, 8)
 def _check_short_name_top(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the short name (top) is shorter than 8 characters."""
-    return assert_shorter_le(x, 8)
 
 
+@single_assertion(assert_shorter_le, 8)
 def _check_short_name_bot(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the short name (bottom) is shorter than 8 characters."""
-    return assert_shorter_le(x, 8)
 
 
+@single_assertion(assert_shorter_le, 1024)
 def _check_user_note(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the user note is shorter than 1024 characters."""
-    return assert_shorter_le(x, 1024)
 
 
+@single_assertion(assert_float_range, -200.0, 200.0, 1000)
 def _check_zero_x(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero x value is in the range of [-200.0, 200.0] with a divisor of 1000."""
-    return assert_float_range(x, -200.0, 200.0, 1000)
 
 
+@single_assertion(assert_float_range, -200.0, 200.0, 1000)
 def _check_zero_y(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero y value is in the range of [-200.0, 200.0] with a divisor of 1000."""
-    return assert_float_range(x, -200.0, 200.0, 1000)
 
 
+@single_assertion(assert_float_range, -5000.0, 5000.0)
 def _check_sc_height(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the SC height is in the range of [-5000.0, 5000.0]."""
-    return assert_float_range(x, -5000.0, 5000.0)
 
 
+@single_assertion(assert_float_range, 0.0, 100.0, 100)
 def _check_r_twist(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the right twist value is in the range of [0.0, 100.0] with a divisor of 100."""
-    return assert_float_range(x, 0.0, 100.0, 100)
 
 
+@single_assertion(assert_float_range, 10.0, 3000.0, 10)
 def _check_c_muzzle_velocity(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the muzzle velocity is in the range of [10.0, 3000.0] with a divisor of 10."""
-    return assert_float_range(x, 10.0, 3000.0, 10)
 
 
+@single_assertion(assert_float_range, -100.0, 100.0)
 def _check_c_zero_temperature(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero temperature is in the range of [-100.0, 100.0]."""
-    return assert_float_range(x, -100.0, 100.0)
 
 
+@single_assertion(assert_float_range, 0.0, 5.0, 1000)
 def _check_c_t_coeff(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the temperature coefficient is in the range of [0.0, 5.0] with a divisor of 1000."""
-    return assert_float_range(x, 0.0, 5.0, 1000)
 
 
+@single_assertion(assert_float_range, -100.0, 100.0)
 def _check_c_zero_air_temperature(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero air temperature is in the range of [-100.0, 100.0]."""
-    return assert_float_range(x, -100.0, 100.0)
 
 
+@single_assertion(assert_float_range, 300.0, 1500.0, 10)
 def _check_c_zero_air_pressure(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero air pressure is in the range of [300.0, 1500.0] with a divisor of 10."""
-    return assert_float_range(x, 300.0, 1500.0, 10)
 
 
+@single_assertion(assert_float_range, 0.0, 100.0)
 def _check_c_zero_air_humidity(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero air humidity is in the range of [0.0, 100.0]."""
-    return assert_float_range(x, 0.0, 100.0)
 
 
+@single_assertion(assert_float_range, -90.0, 90.0, 10)
 def _check_c_zero_w_pitch(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero wind pitch is in the range of [-90.0, 90.0] with a divisor of 10."""
-    return assert_float_range(x, -90.0, 90.0, 10)
 
 
+@single_assertion(assert_float_range, -100.0, 100.0)
 def _check_c_zero_p_temperature(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero pressure temperature is in the range of [-100.0, 100.0]."""
-    return assert_float_range(x, -100.0, 100.0)
 
 
+@single_assertion(assert_float_range, 0.001, 50.0, 1000)
 def _check_b_diameter(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero ballistic diameter is in the range of [0.001, 50.0] with a divisor of 1000."""
-    return assert_float_range(x, 0.001, 50.0, 1000)
 
 
+@single_assertion(assert_float_range, 1.0, 6553.5, 10)
 def _check_b_weight(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero ballistic weight is in the range of [1.0, 6553.5] with a divisor of 10."""
-    return assert_float_range(x, 1.0, 6553.5, 10)
 
 
+@single_assertion(assert_float_range, 0.01, 200.0, 1000)
 def _check_b_length(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero ballistic length is in the range of [0.01, 200.0] with a divisor of 1000."""
-    return assert_float_range(x, 0.01, 200.0, 1000)
 
 
+@single_assertion(assert_choice, ['RIGHT', 'LEFT'])
 def _check_twist_dir(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the twist direction is either 'RIGHT' or 'LEFT'."""
-    return assert_choice(x, ['RIGHT', 'LEFT'])
 
 
 # Validation functions for distances/c_zero_distance_idx section
+@single_assertion(assert_int_range, 0, 200)
 def _check_c_zero_distance_idx(x: int, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zero distance index is in the range of [0, 200]."""
-    return assert_int_range(x, 0, 200)
 
 
+@single_assertion(assert_float_range, 1.0, 3000.0, 100)
 def _check_one_distance(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the one distance value is in the range of [1.0, 3000.0] with a divisor of 100."""
-    return assert_float_range(x, 1.0, 3000.0, 100)
 
 
 # Validation functions for switches section
+_MIN_SWITCHES = 4
+
+
 def _check_distance_from(x: Union[float, int, str], *args: Any, **kwargs: Any) -> SpecValidationResult:
     """
     Validates that the distance value is within the range [1.0, 3000.0] (divisor of 100),
@@ -466,66 +1056,80 @@ def _check_c_idx(idx: int, *args: Any, **kwargs: Any) -> SpecValidationResult:
     return assert_int_range(idx, 0, 200)
 
 
+def _check_switches_count(x: int, *args: Any, **kwargs: Any) -> SpecValidationResult:
+    """Validates that there are at least 4 switches."""
+    return x >= _MIN_SWITCHES, f"expected minimum {_MIN_SWITCHES} items but got {x}"
+
+
+@single_assertion(assert_items_count, _MIN_SWITCHES, sys.maxsize)
+def _check_switches_items(x: list, *args: Any, **kwargs: Any) -> SpecValidationResult:
+    """Validates that there are at least 4 switches, as a check of the list for the batch form of the profile."""
+
+
+@single_assertion(assert_int_range, 0, 255)
 def _check_reticle_idx(x: int, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the reticle index is in the range of [0, 255]."""
-    return assert_int_range(x, 0, 255)
 
 
+@single_assertion(assert_int_range, 0, 6)
 def _check_zoom(x: int, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the zoom value is in the range of [0, 4]."""
-    return assert_int_range(x, 0, 6)
 
 
+@accepts_message
 def _check_switches(switches: List[dict], path: Path, violations: List[SpecViolation], *args: Any,
                     **kwargs: Any) -> SpecValidationResult:
     """
     Validates the switches list, ensuring it contains at least 4 items, and validates each switch
     based on specific criteria (c_idx, reticle_idx, zoom, distance_from).
     """
-    criterion = SpecCriterion(
-        path,
-        lambda x, *args, **kwargs: (x >= 4, f"expected minimum 4 items but got {x}")
-    )
+    criterion = SpecCriterion(path, _check_switches_count)
     criterion.validate(len(switches), path, violations)
 
-    v = SpecValidator()
-    v.register("c_idx", _check_c_idx)
-    v.register("reticle_idx", _check_reticle_idx)
-    v.register("zoom", _check_zoom)
-    v.register("distance_from", _check_distance_from)
-
-    v.validate(switches, path, violations)
+    _validate_data(_switches_validator, switches, path, violations)
 
     return True, "No reasons"
 
 
 # Validation functions for bc type and bc/cd/mv values section
+@single_assertion(assert_choice, ['G7', 'G1', 'CUSTOM'])
 def _check_bc_type(x: str, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the ballistic coefficient type is one of 'G7', 'G1', or 'CUSTOM'."""
-    return assert_choice(x, ['G7', 'G1', 'CUSTOM'])
 
 
+@single_assertion(assert_float_range, 0.0, 10.0, 10000)
 def _check_bc_value(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the ballistic coefficient value is in the range of [0.0, 10.0] with a divisor of 10000."""
-    return assert_float_range(x, 0.0, 10.0, 10000)
 
 
+@single_assertion(assert_float_range, 0.0, 10.0, 10000)
 def _check_cd_value(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the drag coefficient value is in the range of [0.0, 10.0] with a divisor of 10000."""
-    return assert_float_range(x, 0.0, 10.0, 10000)
 
 
+@single_assertion(assert_float_range, 0.0, 10.0, 10000)
 def _check_ma_value(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the Mach value is in the range of [0.0, 10.0] with a divisor of 10000."""
-    return assert_float_range(x, 0.0, 10.0, 10000)
 
 
+@single_assertion(assert_float_range, 0.0, 3000.0, 10)
 def _check_mv_value(x: float, *args: Any, **kwargs: Any) -> SpecValidationResult:
     """Validates that the muzzle velocity value is in the range of [0.0, 3000.0] with a divisor of 10."""
-    return assert_float_range(x, 0.0, 3000.0, 10)
+
+
+@single_assertion(assert_items_count, 1, 5)
+def _check_g_coef_rows(x: list, *args: Any, **kwargs: Any) -> SpecValidationResult:
+    """Validates that there are 1 to 5 coefficient rows for G7 and G1 ballistic coefficients."""
+
+
+@single_assertion(assert_items_count, 1, 200)
+def _check_custom_coef_rows(x: list, *args: Any, **kwargs: Any) -> SpecValidationResult:
+    """Validates that there are 1 to 200 coefficient rows for a custom drag function."""
 
 
 # Validation function for coef_rows
+@accepts_message
+@depends_on("bc_type", "coef_rows")
 def _check_coef_rows(profile: dict, path: Path, violations: List[SpecViolation], *args: Any, **kwargs: Any) -> Tuple[
     bool, str]:
     """
@@ -534,7 +1138,7 @@ def _check_coef_rows(profile: dict, path: Path, violations: List[SpecViolation],
     based on the 'bc_type' (G7, G1, or CUSTOM).
 
     Args:
-        profile (dict): The profile containing the data to validate.
+        profile (dict): The profile containing the data to validate, or the Profile message.
         path (Path): The path to the profile data for error reporting.
         violations (list): A list to store the violations found during validation.
 
@@ -542,26 +1146,16 @@ def _check_coef_rows(profile: dict, path: Path, violations: List[SpecViolation],
         Tuple[bool, str]: A tuple where the first element indicates if validation passed,
                            and the second element is a reason or message.
     """
-    bc_type = profile['bc_type']
-    bc_criterion = SpecCriterion(Path("bc_type"), _check_bc_type)
+    bc_type = _field_data(profile, 'bc_type')
     coef_rows_violations = []
 
     # Validate the boundary condition type
-    is_valid, reason = bc_criterion.validate(bc_type, path, coef_rows_violations)
+    is_valid, reason = _bc_type_criterion.validate(bc_type, path, coef_rows_violations)
 
     if is_valid:
-        v = SpecValidator()
-
-        # Register validation rules based on bc_type
-        if bc_type in ['G7', 'G1']:
-            v.register("coef_rows", lambda x, *args, **kwargs: assert_items_count(x, 1, 5))
-            v.register("bc_cd", _check_bc_value)
-            v.register("mv", _check_mv_value)
-        elif bc_type == 'CUSTOM':
-            v.register("coef_rows", lambda x, *args, **kwargs: assert_items_count(x, 1, 200))
-            v.register("bc_cd", _check_cd_value)
-            v.register("mv", _check_ma_value)
-        else:
+        # Pick the validation rules based on bc_type
+        v = _coef_rows_validators.get(bc_type)
+        if v is None:
             coef_rows_violations.append(
                 SpecViolation(
                     path / "coef_rows",
@@ -569,9 +1163,9 @@ def _check_coef_rows(profile: dict, path: Path, violations: List[SpecViolation],
                     f"Unsupported bc_type '{bc_type}'"
                 )
             )
-
-        # Perform the validation
-        v.validate(profile, path, coef_rows_violations)
+        else:
+            # Perform the validation
+            _validate_data(v, profile, path, coef_rows_violations)
 
     # Handle violations
     if len(coef_rows_violations) <= 12:
@@ -586,7 +1180,14 @@ def _check_coef_rows(profile: dict, path: Path, violations: List[SpecViolation],
     return True, ""
 
 
+@single_assertion(assert_items_count, 1, 200)
+def _check_distances_count(x: list, *args: Any, **kwargs: Any) -> SpecValidationResult:
+    """Validates that there are 1 to 200 distances."""
+
+
 # Validation function for distances
+@accepts_message
+@depends_on("c_zero_distance_idx", "distances")
 def _check_distances(profile: dict, path: Path, violations: List[SpecViolation], *args: Any, **kwargs: Any) -> Tuple[
     bool, str]:
     """
@@ -594,7 +1195,7 @@ def _check_distances(profile: dict, path: Path, violations: List[SpecViolation],
     Ensures the zero distance index is valid and the distances are within the expected range.
 
     Args:
-        profile (dict): The profile containing the data to validate.
+        profile (dict): The profile containing the data to validate, or the Profile message.
         path (Path): The path to the profile data for error reporting.
         violations (list): A list to store the violations found during validation.
 
@@ -604,34 +1205,38 @@ def _check_distances(profile: dict, path: Path, violations: List[SpecViolation],
     """
     distances_violations = []
 
-    idx = profile["c_zero_distance_idx"]
-    distances = profile["distances"]
+    idx = _field_data(profile, "c_zero_distance_idx")
+    distances = _field_data(profile, "distances")
 
-    SpecCriterion(
-        path / "c_zero_distance_idx",
-        _check_c_zero_distance_idx
-    ).validate(
-        idx,
-        path / "c_zero_distance_idx",
-        distances_violations
-    )
+    # paths are only built for the values failing their check
+    if not _is_valid(_check_c_zero_distance_idx, idx):
+        SpecCriterion(
+            path / "c_zero_distance_idx",
+            _check_c_zero_distance_idx
+        ).validate(
+            idx,
+            path / "c_zero_distance_idx",
+            distances_violations
+        )
 
     is_valid, reason = _check_dependency_distances(idx, distances)
     if not is_valid:
         distances_violations.append(SpecViolation("Distances", "Distance dependency error", reason))
 
-    SpecCriterion(
-        path / "distances",
-        lambda x, *args, **kwargs: assert_items_count(x, 1, 200)
-    ).validate(distances, path / "distances", distances_violations)
+    if not _is_valid(_check_distances_count, distances):
+        SpecCriterion(
+            path / "distances",
+            _check_distances_count
+        ).validate(distances, path / "distances", distances_violations)
 
     criterion = SpecCriterion(
-        path / "[:] ",
+        Path("[:] "),
         _check_one_distance
     )
 
     for i, d in enumerate(distances):
-        criterion.validate(d, path / 'distances' / f"[{i}]", distances_violations)
+        if not _is_valid(_check_one_distance, d):
+            criterion.validate(d, path / 'distances' / f"[{i}]", distances_violations)
 
     # Handle violations
     if len(distances_violations) <= 11:
@@ -660,24 +1265,83 @@ def _check_dependency_distances(zero_distance_index: int, distances: List[int])
     return 0 <= zero_distance_index < len(distances), "zero distance index > len(distances)"
 
 
+# Validators used by the composite validation functions, so their field accessors are built once
+_switches_validator = SpecValidator()
+_switches_validator.register("c_idx", _check_c_idx)
+_switches_validator.register("reticle_idx", _check_reticle_idx)
+_switches_validator.register("zoom", _check_zoom)
+_switches_validator.register("distance_from", _check_distance_from)
+
+_g_coef_rows_validator = SpecValidator()
+_g_coef_rows_validator.register("coef_rows", _check_g_coef_rows)
+_g_coef_rows_validator.register("bc_cd", _check_bc_value)
+_g_coef_rows_validator.register("mv", _check_mv_value)
+
+_custom_coef_rows_validator = SpecValidator()
+_custom_coef_rows_validator.register("coef_rows", _check_custom_coef_rows)
+_custom_coef_rows_validator.register("bc_cd", _check_cd_value)
+_custom_coef_rows_validator.register("mv", _check_ma_value)
+
+_coef_rows_validators: Dict[str, SpecValidator] = {
+    'G7': _g_coef_rows_validator,
+    'G1': _g_coef_rows_validator,
+    'CUSTOM': _custom_coef_rows_validator,
+}
+
+_bc_type_criterion = SpecCriterion(Path("bc_type"), _check_bc_type)
+
+_profile_validator = SpecValidator()
+_profile_validator.register("~/profile/switches", _check_switches)
+
+
+def _named_checks(validator: SpecValidator, desc: descriptor.Descriptor, path: str,
+                  when: Optional[Tuple[str, Tuple[Any, ...]]] = None) -> List[BatchCheck]:
+    """
+    Returns the batch checks of a validator of criteria registered by field name, applied to the messages
+    of a type at a path, one for every field of the messages or of their nested ones having a criterion.
+    """
+    checks = []
+    for field in desc.fields:
+        field_path = f"{path}/{field.name}" if path else field.name
+        criterion = validator.criteria.get(field.name)
+        if criterion is not None:
+            checks.append(BatchCheck((field_path,), criterion.validation_func, when))
+        if field.message_type is not None:
+            if field.label == _FD.LABEL_REPEATED:
+                field_path = f"{field_path}/{WILDCARD_ITEM}"
+            checks.extend(_named_checks(validator, field.message_type, field_path, when))
+    return checks
+
+
 # Validation function for profile
+@accepts_message
+@depends_on("switches", "c_zero_distance_idx", "distances", "bc_type", "coef_rows")
+@batch_form(
+    BatchCheck(("switches",), _check_switches_items),
+    *_named_checks(_switches_validator, profedit_pb2.SwPos.DESCRIPTOR, f"switches/{WILDCARD_ITEM}"),
+    BatchCheck(("c_zero_distance_idx",), _check_c_zero_distance_idx),
+    BatchCheck(("c_zero_distance_idx", "distances"), _check_dependency_distances),
+    BatchCheck(("distances",), _check_distances_count),
+    BatchCheck((f"distances/{WILDCARD_ITEM}",), _check_one_distance),
+    BatchCheck(("bc_type",), _check_bc_type),
+    *(check for validator in dict.fromkeys(_coef_rows_validators.values())
+      for check in _named_checks(validator, profedit_pb2.Profile.DESCRIPTOR, "", (
+          "bc_type", tuple(bc_type for bc_type, v in _coef_rows_validators.items() if v is validator)))),
+)
 def _check_profile(profile: dict, path: Path, violations: List[SpecViolation], *args: Any, **kwargs: Any) -> Tuple[
     bool, str]:
     """
     Validates the entire profile, including switches, distances, and coef_rows.
 
     Args:
-        profile (dict): The profile containing the data to validate.
+        profile (dict): The profile containing the data to validate, or the Profile message.
         path (Path): The path to the profile data for error reporting.
         violations (list): A list to store the violations found during validation.
 
     Returns:
         Tuple[bool, str]: A tuple indicating if validation passed, and a reason or message.
     """
-    v = SpecValidator()
-    v.register("~/profile/switches", _check_switches)
-
-    v.validate(profile, path, violations)
+    _validate_data(_profile_validator, profile, path, violations)
 
     _check_distances(profile, path, violations, *args, **kwargs)
     _check_coef_rows(profile, path, violations, *args, **kwargs)
@@ -740,11 +1404,8 @@ def validate_spec(payload: profedit_pb2.Payload) -> None:
     Raises:
         A7PSpecValidationError: If validation fails, raises an exception with details.
     """
-    # Convert protobuf message to dictionary, including default values
-    data = a7p.to_dict(payload)
-
-    # Perform validation
-    is_valid, violations = _default_validator.validate(data)
+    # Perform validation, reading the values straight from the message
+    is_valid, violations = _default_validator.validate_message(payload)
 
     # Raise an error if validation fails
     if not is_valid:
@@ -756,6 +1417,12 @@ __all__ = (
     'SpecCriterion',
     'validate_spec',
     'assert_spec_type',
+    'accepts_message',
+    'single_assertion',
+    'depends_on',
+    'batch_form',
+    'BatchCheck',
+    'WILDCARD_ITEM',
     'assert_items_count',
     'assert_shorter_le',
     'assert_float_range',
@@ -0,0 +1,227 @@
+"""
+This module provides a payload wrapper recording the profile fields modified since the last successful validation.
+
+`a7p.validate` and `a7p.dumps` accept a tracked payload. Once it passed validation, they only rerun
+the rules depending on the modified fields, including the cross-field spec checks reading them
+(see `spec_validator.depends_on`), and fall back to a full validation if any of them fails.
+
+Classes:
+    TrackedPayload: A payload wrapper recording the modified profile fields.
+
+Usage Example:
+    tracked = TrackedPayload(a7p.loads(data), validated=True)
+    tracked.profile.zero_x += 1000
+    data = a7p.dumps(tracked)  # only the zero_x rules are checked
+"""
+
+from typing import Any, Dict, FrozenSet, List, Set, Tuple, TYPE_CHECKING
+
+from google.protobuf import descriptor
+
+from a7p import profedit_pb2
+
+if TYPE_CHECKING:
+    from a7p import validation_plan
+
+_FD = descriptor.FieldDescriptor
+
+_PROFILE_FIELDS: Dict[str, descriptor.FieldDescriptor] = profedit_pb2.Profile.DESCRIPTOR.fields_by_name
+
+# Validation plans reduced to the rules depending on a set of fields, with the plan they were reduced from
+_plans: Dict[FrozenSet[str], Tuple['validation_plan.ValidationPlan', 'validation_plan.ValidationPlan']] = {}
+
+# Keep at most this many reduced plans
+_MAX_PLANS = 64
+
+
+def _get_plan(names: FrozenSet[str]) -> 'validation_plan.ValidationPlan':
+    """
+    Returns the cached validation plan of a payload reduced to the rules depending on some profile fields.
+
+    Args:
+        names (FrozenSet[str]): The names of the profile fields.
+
+    Returns:
+        validation_plan.ValidationPlan: The reduced plan.
+    """
+    from a7p import validation_plan
+
+    plan = validation_plan.get_plan(profedit_pb2.Payload.DESCRIPTOR)
+    cached = _plans.get(names)
+    if cached is not None and cached[0] is plan:
+        return cached[1]
+    if len(_plans) >= _MAX_PLANS:
+        _plans.clear()
+    reduced = plan.only([_PROFILE_FIELDS[name] for name in names])
+    _plans[names] = plan, reduced
+    return reduced
+
+
+class _TrackedProfile:
+    """
+    The profile of a tracked payload, recording the fields modified through it.
+
+    Only the profile fields are reachable, the methods of the message (`ClearField`, `MergeFrom`, ...)
+    would modify it unrecorded. They are reached through `TrackedPayload.payload`, which drops the
+    recorded validation.
+    """
+    __slots__ = ('_tracked',)
+
+    def __init__(self, tracked: 'TrackedPayload'):
+        object.__setattr__(self, '_tracked', tracked)
+
+    def __getattr__(self, name: str) -> Any:
+        field = _PROFILE_FIELDS.get(name)
+        if field is None:
+            raise AttributeError(f"Not a profile field: {name}, use the payload of the tracked payload")
+        value = getattr(self._tracked._payload.profile, name)  # pylint: disable=protected-access
+        if field.label == _FD.LABEL_REPEATED or field.message_type is not None:
+            # may be modified in place
+            self._tracked._touch(field, value)  # pylint: disable=protected-access
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in _PROFILE_FIELDS:
+            raise AttributeError(f"Not a profile field: {name}, use the payload of the tracked payload")
+        profile = self._tracked._payload.profile  # pylint: disable=protected-access
+        previous = getattr(profile, name)
+        setattr(profile, name, value)
+        if getattr(profile, name) != previous:
+            self._tracked.mark_dirty(name)
+
+    def __repr__(self) -> str:
+        return repr(self._tracked._payload.profile)  # pylint: disable=protected-access
+
+
+class TrackedPayload:
+    """
+    A payload wrapper recording the profile fields modified since the last successful validation.
+
+    Changes made through `profile` are recorded: the assigned fields whose value changed, the repeated
+    scalar fields whose items differ from the ones they had on first access, and the repeated message
+    fields once accessed. The message itself is reached through `payload`, for the message methods which
+    `profile` does not expose: any change may then be made to it, so the next validation is a full one.
+
+    Attributes:
+        profile (Any): The profile of the payload, recording the changes.
+    """
+    __slots__ = ('_payload', 'profile', '_validated', '_had_profile', '_dirty', '_snapshots')
+
+    def __init__(self, payload: profedit_pb2.Payload, validated: bool = False):
+        """
+        Wraps a payload.
+
+        Args:
+            payload (profedit_pb2.Payload): The payload to track.
+            validated (bool): Whether the payload passed validation as it is. Default is False.
+        """
+        self._payload = payload
+        self.profile = _TrackedProfile(self)
+        self._validated = False
+        self._had_profile = False
+        self._dirty: Set[str] = set()
+        self._snapshots: Dict[str, List[Any]] = {}
+        if validated:
+            self.mark_valid()
+
+    @property
+    def payload(self) -> profedit_pb2.Payload:
+        """
+        Returns the wrapped payload. Its changes are not recorded, so the recorded validation is dropped.
+
+        Returns:
+            profedit_pb2.Payload: The payload.
+        """
+        self._validated = False
+        return self._payload
+
+    @property
+    def validated(self) -> bool:
+        """
+        Returns True if the payload passed validation, with the modified fields possibly not rechecked yet.
+
+        Returns:
+            bool: True once the payload passed validation.
+        """
+        return self._validated
+
+    @property
+    def dirty(self) -> FrozenSet[str]:
+        """
+        Returns the names of the profile fields modified since the last successful validation.
+
+        Returns:
+            FrozenSet[str]: The field names.
+        """
+        profile = self._payload.profile
+        changed = {name for name, items in self._snapshots.items() if list(getattr(profile, name)) != items}
+        return frozenset(self._dirty | changed)
+
+    def _touch(self, field: descriptor.FieldDescriptor, value: Any) -> None:
+        """Records the access to a repeated or message field, which may be modified in place."""
+        if field.name in self._dirty or field.name in self._snapshots:
+            return
+        if field.label == _FD.LABEL_REPEATED and field.message_type is None:
+            self._snapshots[field.name] = list(value)
+        else:
+            self._dirty.add(field.name)
+
+    def serialize(self) -> bytes:
+        """
+        Serializes the payload, keeping the recorded validation.
+
+        Returns:
+            bytes: The serialized payload.
+        """
+        return self._payload.SerializeToString()
+
+    def mark_dirty(self, *names: str) -> None:
+        """
+        Records profile fields modified without going through `profile`, such as the fields
+        of a payload serialized with `serialize` and loaded again.
+
+        Args:
+            *names (str): The names of the modified fields.
+
+        Raises:
+            KeyError: If a name is not a profile field.
+        """
+        for name in names:
+            if name not in _PROFILE_FIELDS:
+                raise KeyError(f"Unknown profile field: {name}")
+            self._dirty.add(name)
+
+    def mark_valid(self) -> None:
+        """
+        Records that the payload passed validation as it is.
+        """
+        self._validated = True
+        self._had_profile = self._payload.HasField('profile')
+        self._dirty.clear()
+        self._snapshots.clear()
+
+    def check_changes(self) -> bool:
+        """
+        Checks the rules depending on the fields modified since the last successful validation.
+
+        Returns:
+            bool: True if the payload is known to be valid, False if it has to be validated in full.
+        """
+        if not self._validated or self._payload.HasField('profile') != self._had_profile:
+            return False
+        dirty = self.dirty
+        if dirty:
+            from a7p.protovalidate.internal.constraints import ConstraintContext
+
+            ctx = ConstraintContext()
+            violations = []
+            _get_plan(dirty).run(self._payload, ctx, violations)
+            if violations or ctx.has_errors():
+                return False
+            self.mark_valid()
+        return True
+
+
+__all__ = (
+    'TrackedPayload',
+)
@@ -0,0 +1,447 @@
+"""
+This module provides a unified validation plan checking a message against the proto and spec rules in a single pass.
+
+The plan of a message type is built from the protovalidate constraints and from the criteria of
+the default spec validator, grouped by field, and built again once the criteria change. Validation
+walks the message once, evaluating the proto constraints and the spec criteria of each field together,
+instead of walking the message with protovalidate and then walking its dictionary form with the spec
+validator.
+
+Proto violations are reported in the same order and shape as `protovalidate.collect_violations`
+reports them, spec violations in the same order and shape as `SpecValidator.validate` reports them
+for the dictionary form of the message.
+
+The checks of a plan can also be run one by one: `ValidationPlan.units` splits them into independent
+rule units, such as the proto constraints or the spec criterion of a field, which report the same
+violations as the plan does.
+
+Classes:
+    ValidationPlan: The validation plan of a message type.
+    RuleUnit: An independent check of a validation plan.
+
+Functions:
+    get_plan: Returns the cached validation plan of a message type.
+    check: Checks a message against the proto and spec rules.
+"""
+
+import copy
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, Iterator, List, Optional, Tuple
+
+from google.protobuf import descriptor, message as _message
+
+from a7p import convert, protovalidate
+from a7p.buf.validate import expression_pb2
+from a7p.exceptions import SpecViolation
+from a7p.protovalidate.internal.constraints import ConstraintContext, ConstraintRules, SubMsgConstraint
+from a7p.spec_validator import SpecCriterion, SpecValidator, _default_validator
+
+_FD = descriptor.FieldDescriptor
+
+# The spec validator walks the dictionary form of a message from this path
+_ROOT_PATH = Path("~/")
+
+
+class _FieldPlan:
+    """
+    The checks of a single field.
+
+    Attributes:
+        field (descriptor.FieldDescriptor): The field descriptor.
+        proto_rules (List[ConstraintRules]): The proto constraints of the field, in protovalidate order,
+            except the constraint of a singular message field, which is applied by sub_plan.
+        proto_sub_message (bool): Whether the proto constraints of the singular message field apply.
+        path (Optional[Path]): The spec path of the field, None if it depends on a list index.
+        criterion (Optional[SpecCriterion]): The spec criterion of the field.
+        lookup (bool): Whether the spec criterion is looked up as the field is visited, for fields of list items.
+        sub_plan (Optional[ValidationPlan]): The plan of the message type of the field.
+        to_json (Callable[[Any], Any]): The converter of the field value to its dictionary form.
+    """
+    __slots__ = ('field', 'name', 'is_repeated', 'is_message', 'has_presence', 'proto_rules',
+                 'proto_sub_message', 'path', 'criterion', 'lookup', 'sub_plan', 'to_json')
+
+    def __init__(self, field: descriptor.FieldDescriptor, rules: List[ConstraintRules], path: Optional[Path],
+                 spec_validator: SpecValidator, factory):
+        self.field = field
+        self.name = field.name
+        self.is_repeated = field.label == _FD.LABEL_REPEATED
+        self.is_message = field.cpp_type == _FD.CPPTYPE_MESSAGE
+        self.has_presence = not self.is_repeated and (self.is_message or field.containing_oneof is not None)
+        self.proto_rules = [rule for rule in rules if not isinstance(rule, SubMsgConstraint)]
+        self.proto_sub_message = len(self.proto_rules) < len(rules)
+        self.path = path
+        self.criterion = spec_validator.get_criteria(path) if path is not None else None
+        self.lookup = path is None
+        self.sub_plan = None
+        if self.is_message:
+            # list items have no static path, their criteria are looked up as they are visited,
+            # and their proto constraints are checked by the constraint of the repeated field
+            sub_path = None if self.is_repeated or path is None else path
+            self.sub_plan = ValidationPlan(field.message_type, sub_path, spec_validator, factory,
+                                           proto=not self.is_repeated)
+            if self.is_repeated and not self.sub_plan.has_spec:
+                self.sub_plan = None
+            self.to_json = convert.message_to_dict
+        else:
+            self.to_json = convert.value_converter(field)
+
+    def is_set(self, message: _message.Message, value: Any) -> bool:
+        """
+        Returns True if the field is set, so it is listed in the dictionary form of the message.
+
+        Args:
+            message (Message): The message holding the field.
+            value (Any): The field value.
+
+        Returns:
+            bool: Whether the field is set.
+        """
+        return message.HasField(self.name) if self.has_presence else bool(value)
+
+    def check_items(self, value: Any, ctx: ConstraintContext, violations: List[SpecViolation], path: Path) -> None:
+        """
+        Checks the items of a repeated message field against the spec criteria of their fields.
+
+        Args:
+            value (Any): The field value.
+            ctx (ConstraintContext): The context of the message holding the field.
+            violations (List[SpecViolation]): The list collecting spec violations.
+            path (Path): The spec path of the field.
+        """
+        for i, item in enumerate(value):
+            self.sub_plan.run(item, ctx.sub_context(), violations, path / f"[{i}]")
+
+    def check_criterion(self, criterion: Optional[SpecCriterion], value: Any, is_set: bool, path: Path,
+                        violations: List[SpecViolation]) -> None:
+        """
+        Checks the field value against a spec criterion, unless the field is omitted from the dictionary form.
+
+        Args:
+            criterion (Optional[SpecCriterion]): The criterion of the field, None if there is none.
+            value (Any): The field value.
+            is_set (bool): Whether the field is set.
+            path (Path): The spec path of the field.
+            violations (List[SpecViolation]): The list collecting spec violations.
+        """
+        if criterion is not None and (is_set or not self.has_presence):
+            data = value if self.is_message and criterion.accepts_message else self.value_to_json(value)
+            criterion.validate(data, path, violations)
+
+    def value_to_json(self, value: Any) -> Any:
+        """
+        Converts the field value to its dictionary form.
+
+        Args:
+            value (Any): The field value.
+
+        Returns:
+            Any: The dictionary form of the value.
+        """
+        if self.is_repeated:
+            return [self.to_json(item) for item in value]
+        return self.to_json(value)
+
+
+class ValidationPlan:
+    """
+    The validation plan of a message type.
+
+    Attributes:
+        descriptor (descriptor.Descriptor): The message descriptor.
+        has_spec (bool): Whether any spec criterion applies to the message or its fields.
+        spec_generation (int): The generation of the criteria of the spec validator the plan was built from.
+    """
+
+    def __init__(self, desc: descriptor.Descriptor, path: Optional[Path] = _ROOT_PATH,
+                 spec_validator: SpecValidator = _default_validator, factory=None, proto: bool = True):
+        """
+        Builds the plan of a message type.
+
+        Args:
+            desc (descriptor.Descriptor): The message descriptor.
+            path (Optional[Path]): The spec path of the message, None for list items.
+            spec_validator (SpecValidator): The spec validator to take the criteria from.
+            factory (ConstraintFactory, optional): The protovalidate constraint factory,
+                the one of the default protovalidate validator if None.
+            proto (bool): Whether the proto constraints of the message and of its fields are checked.
+        """
+        if factory is None:
+            factory = protovalidate._validator._factory  # pylint: disable=protected-access
+        self.descriptor = desc
+        self.spec_generation = spec_validator.generation
+        self._spec_validator = spec_validator
+        self._message_rules: List[ConstraintRules] = []
+        rules_by_field: Dict[str, List[ConstraintRules]] = {}
+        for rule in factory.get(desc) if proto else ():
+            field = getattr(rule, '_field', None)
+            if field is None:
+                self._message_rules.append(rule)
+            else:
+                rules_by_field.setdefault(field.name, []).append(rule)
+        self._fields = [
+            _FieldPlan(field, rules_by_field.get(field.name, []), None if path is None else path / field.name,
+                       spec_validator, factory)
+            for field in desc.fields
+        ]
+        # protovalidate checks fields in declaration order, json_format lists the set ones first by number
+        self._set_order = sorted(range(len(self._fields)), key=lambda i: self._fields[i].field.number)
+        self.has_spec = any(plan.criterion is not None or (plan.sub_plan is not None and plan.sub_plan.has_spec)
+                            for plan in self._fields)
+        if path is None:
+            self.has_spec = self.has_spec or any(
+                spec_validator.get_criteria(Path(plan.name)) is not None for plan in self._fields)
+
+    @property
+    def fields(self) -> List[_FieldPlan]:
+        """
+        Returns the plans of the fields, in declaration order.
+
+        Returns:
+            List[_FieldPlan]: The field plans.
+        """
+        return self._fields
+
+    def without(self, fields: Collection[descriptor.FieldDescriptor]) -> 'ValidationPlan':
+        """
+        Returns a copy of the plan skipping the proto rules and the spec criteria of some fields,
+        in this message type and in the nested ones.
+
+        Args:
+            fields (Collection[descriptor.FieldDescriptor]): The fields to skip the checks of.
+
+        Returns:
+            ValidationPlan: The reduced plan.
+        """
+        plan = copy.copy(self)
+        plan._fields = []
+        for field_plan in self._fields:
+            field_plan = copy.copy(field_plan)
+            if field_plan.field in fields:
+                field_plan.proto_rules = []
+                field_plan.criterion = None
+                field_plan.lookup = False
+            if field_plan.sub_plan is not None:
+                field_plan.sub_plan = field_plan.sub_plan.without(fields)
+            plan._fields.append(field_plan)
+        return plan
+
+    def only(self, fields: Collection[descriptor.FieldDescriptor]) -> 'ValidationPlan':
+        """
+        Returns a copy of the plan checking only the rules depending on some fields,
+        of this message type or of the nested ones.
+
+        The rules of the given fields, of their items and of their nested fields are kept. Spec criteria of
+        the other message fields are kept if they read a given field, as told by their `depends_on`
+        declaration, or if they have no declaration. The message-level proto rules are kept.
+
+        Args:
+            fields (Collection[descriptor.FieldDescriptor]): The fields the kept rules depend on.
+
+        Returns:
+            ValidationPlan: The reduced plan.
+        """
+        names = {field.name for field in fields}
+        plan = copy.copy(self)
+        plan._fields = []
+        for field_plan in self._fields:
+            if field_plan.field not in fields:
+                field_plan = copy.copy(field_plan)
+                field_plan.proto_rules = []
+                depends_on = getattr(getattr(field_plan.criterion, 'validation_func', None), 'depends_on', None)
+                if not field_plan.is_message or (depends_on is not None and names.isdisjoint(depends_on)):
+                    field_plan.criterion = None
+                    field_plan.lookup = False
+                if field_plan.sub_plan is not None:
+                    field_plan.sub_plan = field_plan.sub_plan.only(fields)
+            plan._fields.append(field_plan)
+        return plan
+
+    def units(self) -> Iterator['RuleUnit']:
+        """
+        Yields the checks of the plan as independent rule units, in plan order: the message-level proto
+        constraints, then for every field its proto constraints, the units of its singular message type
+        or the spec criteria of its items, and its spec criterion.
+
+        Returns:
+            Iterator[RuleUnit]: The rule units.
+        """
+        return self._units((), True)
+
+    def _units(self, chain: Tuple[str, ...], proto: bool) -> Iterator['RuleUnit']:
+        """Yields the rule units of the plan of a message reached through a chain of singular message fields."""
+        prefix = "".join(name + "." for name in chain)
+        if proto and self._message_rules:
+            yield RuleUnit(f"{prefix}<message>:proto", RuleUnit.MESSAGE, chain, proto_rules=self._message_rules)
+        for plan in self._fields:
+            name = prefix + plan.name
+            if proto and plan.proto_rules:
+                yield RuleUnit(f"{name}:proto", RuleUnit.PROTO, chain, plan, plan.proto_rules)
+            if plan.sub_plan is not None:
+                if plan.is_repeated:
+                    yield RuleUnit(f"{name}[*]:spec", RuleUnit.ITEMS, chain, plan)
+                else:
+                    yield from plan.sub_plan._units(chain + (plan.name,), proto and plan.proto_sub_message)
+            if plan.criterion is not None:
+                yield RuleUnit(f"{name}:spec", RuleUnit.SPEC, chain, plan)
+
+    def run(self, message: _message.Message, ctx: ConstraintContext,
+            violations: List[SpecViolation], path: Optional[Path] = None) -> None:
+        """
+        Checks a message against the proto and spec rules of its fields.
+
+        Args:
+            message (Message): The message to check.
+            ctx (ConstraintContext): The context collecting proto violations.
+            violations (List[SpecViolation]): The list collecting spec violations.
+            path (Optional[Path]): The spec path of the message if the plan has no static paths.
+        """
+        for rule in self._message_rules:
+            rule.validate(ctx, message)
+
+        # spec violations of every field, in the order the fields appear in the dictionary form
+        set_violations: List[Optional[List[SpecViolation]]] = [None] * len(self._fields)
+        unset_violations: List[SpecViolation] = []
+        for index, plan in enumerate(self._fields):
+            for rule in plan.proto_rules:
+                rule.validate(ctx, message)
+
+            value = getattr(message, plan.name)
+            is_set = plan.is_set(message, value)
+            if is_set:
+                field_violations = set_violations[index] = []
+            else:
+                field_violations = unset_violations
+
+            field_path = plan.path
+            if field_path is None and path is not None:
+                field_path = path / plan.name
+
+            if plan.sub_plan is not None and is_set:
+                if plan.is_repeated:
+                    plan.check_items(value, ctx, field_violations, field_path)
+                else:
+                    sub_ctx = ctx.sub_context()
+                    plan.sub_plan.run(value, sub_ctx, field_violations, field_path)
+                    if plan.proto_sub_message and sub_ctx.has_errors():
+                        sub_ctx.add_path_prefix(plan.name)
+                        ctx.add_errors(sub_ctx)
+
+            criterion = plan.criterion
+            if criterion is None and plan.lookup and field_path is not None:
+                criterion = self._spec_validator.get_criteria(field_path)
+            plan.check_criterion(criterion, value, is_set, field_path, field_violations)
+
+        for index in self._set_order:
+            if set_violations[index]:
+                violations.extend(set_violations[index])
+        violations.extend(unset_violations)
+
+
+class RuleUnit:
+    """
+    An independent check of a validation plan, run on the message the plan checks.
+
+    Attributes:
+        name (str): The unit name, the dotted field path followed by the check kind, e.g. "profile.zero_x:proto".
+        kind (str): The check kind, one of MESSAGE, PROTO, ITEMS and SPEC.
+        chain (Tuple[str, ...]): The names of the singular message fields leading to the checked message.
+        field_plan (Optional[_FieldPlan]): The plan of the checked field, None for the message-level constraints.
+        proto_rules (List[ConstraintRules]): The proto constraints of the unit, if it checks any.
+    """
+    # The message-level proto constraints
+    MESSAGE = "message"
+    # The proto constraints of a field
+    PROTO = "proto"
+    # The spec criteria of the fields of the items of a repeated message field
+    ITEMS = "items"
+    # The spec criterion of a field
+    SPEC = "spec"
+
+    __slots__ = ('name', 'kind', 'chain', 'field_plan', 'proto_rules')
+
+    def __init__(self, name: str, kind: str, chain: Tuple[str, ...], field_plan: Optional[_FieldPlan] = None,
+                 proto_rules: List[ConstraintRules] = ()):
+        self.name = name
+        self.kind = kind
+        self.chain = chain
+        self.field_plan = field_plan
+        self.proto_rules = proto_rules
+
+    def run(self, root: _message.Message, ctx: ConstraintContext, violations: List[SpecViolation]) -> None:
+        """
+        Runs the check on a message, skipping it if a message of its chain is not set.
+
+        Args:
+            root (Message): The message the plan checks.
+            ctx (ConstraintContext): A context collecting the proto violations of this unit only.
+            violations (List[SpecViolation]): The list collecting spec violations.
+        """
+        message = root
+        for name in self.chain:
+            if not message.HasField(name):
+                return
+            message = getattr(message, name)
+
+        if self.proto_rules:
+            for rule in self.proto_rules:
+                rule.validate(ctx, message)
+            if ctx.has_errors():
+                for name in reversed(self.chain):
+                    ctx.add_path_prefix(name)
+            return
+
+        plan = self.field_plan
+        value = getattr(message, plan.name)
+        is_set = plan.is_set(message, value)
+        if self.kind == RuleUnit.ITEMS:
+            if is_set:
+                plan.check_items(value, ctx, violations, plan.path)
+        else:
+            plan.check_criterion(plan.criterion, value, is_set, plan.path, violations)
+
+
+_plans: Dict[descriptor.Descriptor, ValidationPlan] = {}
+
+
+def get_plan(desc: descriptor.Descriptor) -> ValidationPlan:
+    """
+    Returns the cached validation plan of a message type, building it on first use
+    and after a change of the criteria of the default spec validator.
+
+    The caches of plans derived from it are stale once it is built again, they check
+    whether they were built from the returned plan.
+
+    Args:
+        desc (descriptor.Descriptor): The message descriptor.
+
+    Returns:
+        ValidationPlan: The validation plan.
+    """
+    plan = _plans.get(desc)
+    if plan is None or plan.spec_generation != _default_validator.generation:
+        plan = _plans[desc] = ValidationPlan(desc)
+    return plan
+
+
+def check(message: _message.Message) -> Tuple[expression_pb2.Violations, List[SpecViolation]]:
+    """
+    Checks a message against the proto and spec rules in a single pass.
+
+    Args:
+        message (Message): The message to check.
+
+    Returns:
+        Tuple[expression_pb2.Violations, List[SpecViolation]]: The proto and the spec violations.
+    """
+    ctx = ConstraintContext()
+    violations: List[SpecViolation] = []
+    get_plan(message.DESCRIPTOR).run(message, ctx, violations)
+    return ctx.violations, violations
+
+
+__all__ = (
+    'ValidationPlan',
+    'RuleUnit',
+    'get_plan',
+    'check',
+)
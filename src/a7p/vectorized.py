@@ -0,0 +1,465 @@
+"""
+This module provides vectorized validation of many payloads at once.
+
+The rule units of the validation plan are turned into checks of columns, each packing the values at
+a path of every payload: the proto rules having native bounds (such as the int32 ranges, the string
+lengths and the repeated item counts), the spec criteria of the scalar fields and the batch forms of
+the composite criteria, which check the items of the distances, coef_rows and switches lists in columns
+flattening the items of every payload. Criteria declared with `single_assertion` are evaluated with one
+comparison per column with NumPy if it is installed, the other ones value by value. The rule units
+without a column form run per payload.
+
+Payloads failing any check are validated again on their own with `validate`,
+so their errors are the ones `validate` raises.
+
+Functions:
+    validate_batch: Validates many payloads at once.
+
+Usage Example:
+    for result in a7p.validate_batch(payloads):
+        if not result.ok:
+            print(result.source, result.error)
+"""
+
+import itertools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from google.protobuf import descriptor, message as _message
+
+from a7p import convert, exceptions, profedit_pb2, validation_plan
+from a7p.a7p import validate
+from a7p.batch import BatchResult
+from a7p.exceptions import A7PSpecTypeError
+from a7p.protovalidate.internal.constraints import (ConstraintContext, FieldConstraintRules,
+                                                    RepeatedMsgConstraint)
+from a7p.protovalidate.internal.native import Bounds, NativeCheck
+from a7p.spec_validator import (WILDCARD_ITEM, BatchCheck, assert_choice, assert_float_range, assert_int_range,
+                                assert_items_count, assert_shorter_le)
+from a7p.validation_plan import RuleUnit
+
+# NumPy, imported on the first batch so importing a7p stays fast, None if it is not installed
+np = None
+_numpy_imported = False
+
+_FD = descriptor.FieldDescriptor
+
+_INT_TYPES = (_FD.CPPTYPE_INT32, _FD.CPPTYPE_UINT32)
+
+# Types of the values packed in NumPy arrays, by cpp type, the other values are kept as they are
+_ARRAY_TYPES = {
+    _FD.CPPTYPE_INT32: 'int64',
+    _FD.CPPTYPE_UINT32: 'int64',
+    _FD.CPPTYPE_ENUM: 'int64',
+    _FD.CPPTYPE_FLOAT: 'float64',
+    _FD.CPPTYPE_DOUBLE: 'float64',
+}
+
+# Spec assertions evaluated over columns, by the cpp type of the fields they apply to, None for lists
+_ASSERTION_TYPES = {
+    assert_float_range: _INT_TYPES,
+    assert_int_range: _INT_TYPES,
+    assert_shorter_le: (_FD.CPPTYPE_STRING,),
+    assert_choice: (_FD.CPPTYPE_ENUM,),
+    assert_items_count: (None,),
+}
+
+
+def _import_numpy() -> None:
+    """Imports NumPy on first use, if it is installed."""
+    global np, _numpy_imported  # pylint: disable=global-statement
+    if not _numpy_imported:
+        _numpy_imported = True
+        try:
+            import numpy  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return
+        np = numpy
+
+
+def _measure(measure: str, values: Any) -> Any:
+    """Returns the bounded measure of the values: the values, or the lengths of strings in characters or bytes."""
+    if measure == "len":
+        return np.fromiter(map(len, values), np.int64, len(values))
+    if measure == "len_bytes":
+        return np.fromiter((len(value.encode()) for value in values), np.int64, len(values))
+    return values
+
+
+def _bounds_mask(bounds: Bounds, values: Any) -> Any:
+    """Returns the mask of the values a native check may report, see `native.Bounds`."""
+    measured = _measure(bounds.measure, values)
+    low_ok = high_ok = np.ones(len(values), bool)
+    if bounds.low is not None:
+        low_ok = measured > bounds.low if bounds.low_strict else measured >= bounds.low
+    if bounds.high is not None:
+        high_ok = measured < bounds.high if bounds.high_strict else measured <= bounds.high
+    mask = ~(low_ok & high_ok) if bounds.inside else ~(low_ok | high_ok)
+    if bounds.nan:
+        mask |= measured != measured
+    return mask
+
+
+def _assertion_mask(assertion: Callable, params: Tuple[Any, ...],
+                    field: descriptor.FieldDescriptor, values: Any) -> Any:
+    """Returns the mask of the values failing a spec assertion, the lengths for a list assertion."""
+    if assertion is assert_float_range:
+        min_value, max_value, divisor = (params + (1,))[:3]
+        scaled = values / divisor
+        return ~((min_value <= scaled) & (scaled <= max_value))
+    if assertion in (assert_int_range, assert_items_count):
+        min_value, max_value = params
+        return ~((min_value <= values) & (values <= max_value))
+    if assertion is assert_shorter_le:
+        return _measure("len", values) > params[0]
+    # assert_choice, enum values are compared by their names, unknown values by number
+    keys = params[0]
+    allowed = [value.number for value in field.enum_type.values if value.name in keys]
+    allowed += [key for key in keys if isinstance(key, int) and key not in field.enum_type.values_by_number]
+    return ~np.isin(values, allowed)
+
+
+def _fails(func: Callable, *values: Any) -> bool:
+    """Returns True if a spec validation function rejects the values."""
+    predicate = getattr(func, 'predicate', None)
+    if predicate is not None and len(values) == 1:
+        return not predicate(values[0])
+    try:
+        return not func(*values)[0]
+    except (TypeError, A7PSpecTypeError):
+        return True
+
+
+class _Column:
+    """
+    The values at a path below the messages of many payloads.
+
+    Attributes:
+        field (descriptor.FieldDescriptor): The field holding the values.
+        is_list (bool): Whether the values are the lists of a repeated field.
+        values (List[Any]): The values.
+        owners (Sequence[int]): The index of the payload of every value.
+    """
+    __slots__ = ('field', 'is_list', 'values', 'owners', '_array', '_json')
+
+    def __init__(self, field: descriptor.FieldDescriptor, is_list: bool, values: List[Any], owners: Sequence[int]):
+        self.field = field
+        self.is_list = is_list
+        self.values = values
+        self.owners = owners
+        self._array = None
+        self._json = None
+
+    def array(self) -> Any:
+        """
+        Returns the values packed for NumPy: the lengths of lists, 32-bit numbers as arrays,
+        the other values as they are.
+
+        Returns:
+            Any: A NumPy array, or the list of values.
+        """
+        if self._array is None:
+            values = self.values
+            dtype = _ARRAY_TYPES.get(self.field.cpp_type)
+            if self.is_list:
+                self._array = np.fromiter(map(len, values), np.int64, len(values))
+            elif dtype is not None:
+                self._array = np.fromiter(values, dtype, len(values))
+            else:
+                self._array = values
+        return self._array
+
+    def json(self) -> List[Any]:
+        """
+        Returns the dictionary forms of the values.
+
+        Returns:
+            List[Any]: The converted values.
+        """
+        if self._json is None:
+            if self.is_list:
+                to_json = convert.list_converter(self.field)
+            elif self.field.cpp_type == _FD.CPPTYPE_MESSAGE:
+                to_json = convert.message_to_dict
+            else:
+                to_json = convert.value_converter(self.field)
+            self._json = list(map(to_json, self.values))
+        return self._json
+
+
+class _Batch:
+    """
+    The payloads of a batch, with the columns read from them so far.
+    """
+
+    def __init__(self, payloads: Sequence[profedit_pb2.Payload]):
+        self.size = len(payloads)
+        self._descriptors: Dict[Tuple[str, ...], descriptor.Descriptor] = {(): profedit_pb2.Payload.DESCRIPTOR}
+        self._messages: Dict[Tuple[str, ...], Tuple[List[_message.Message], List[int]]] = {
+            (): (list(payloads), list(range(len(payloads))))}
+        self._columns: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], _Column] = {}
+
+    def messages(self, chain: Tuple[str, ...]) -> Tuple[List[_message.Message], List[int]]:
+        """
+        Returns the messages reached through a chain of singular message fields, where they are all set.
+
+        Args:
+            chain (Tuple[str, ...]): The names of the fields.
+
+        Returns:
+            Tuple[List[Message], List[int]]: The messages and the indices of their payloads.
+        """
+        found = self._messages.get(chain)
+        if found is None:
+            parents, owners = self.messages(chain[:-1])
+            name = chain[-1]
+            self._descriptors[chain] = self._descriptors[chain[:-1]].fields_by_name[name].message_type
+            found = self._messages[chain] = (
+                [getattr(parent, name) for parent in parents if parent.HasField(name)],
+                [owner for parent, owner in zip(parents, owners) if parent.HasField(name)])
+        return found
+
+    def column(self, chain: Tuple[str, ...], parts: Tuple[str, ...]) -> _Column:
+        """
+        Returns the column of the values at a path below the messages reached through a chain.
+
+        Args:
+            chain (Tuple[str, ...]): The names of the singular message fields leading to the messages.
+            parts (Tuple[str, ...]): The parts of the path below the messages.
+
+        Returns:
+            _Column: The values, the items of every list for a WILDCARD_ITEM part.
+        """
+        key = (chain, parts)
+        column = self._columns.get(key)
+        if column is None:
+            values, owners = self.messages(chain)
+            desc = self._descriptors[chain]
+            field = None
+            for part in parts:
+                if part == WILDCARD_ITEM:
+                    counts = list(map(len, values))
+                    if np is None:
+                        owners = [owner for owner, count in zip(owners, counts) for _ in range(count)]
+                    else:
+                        owners = np.repeat(owners, counts)
+                    values = list(itertools.chain.from_iterable(values))
+                else:
+                    field = desc.fields_by_name[part]
+                    values = [getattr(value, part) for value in values]
+                    desc = field.message_type
+            is_list = field.label == _FD.LABEL_REPEATED and parts[-1] != WILDCARD_ITEM
+            column = self._columns[key] = _Column(field, is_list, values, owners)
+        return column
+
+
+class _ColumnCheck:
+    """
+    A check of the values at some paths below the messages reached through a chain of singular message fields.
+
+    Attributes:
+        chain (Tuple[str, ...]): The names of the fields leading to the messages.
+        paths (Tuple[Tuple[str, ...], ...]): The parts of the paths of the checked values below the messages.
+        native (List[NativeCheck]): The native pre-checks of the proto rules of the values.
+        func (Optional[Callable]): The spec validation function of the values.
+        when (Optional[Tuple[str, Tuple[Any, ...]]]): The field of the messages and the dictionary forms
+            of its values the check applies for, None if it always applies.
+    """
+    __slots__ = ('chain', 'paths', 'native', 'func', 'when')
+
+    def __init__(self, chain: Tuple[str, ...], paths: Tuple[Tuple[str, ...], ...], native: List[NativeCheck],
+                 func: Optional[Callable] = None, when: Optional[Tuple[str, Tuple[Any, ...]]] = None):
+        self.chain = chain
+        self.paths = paths
+        self.native = native
+        self.func = func
+        self.when = when
+
+    def _mask(self, batch: _Batch) -> Tuple[Any, Sequence[int]]:
+        """Returns the flags of the values failing the check, a NumPy mask or a list, and the payloads of the values."""
+        columns = [batch.column(self.chain, parts) for parts in self.paths]
+        column = columns[0]
+        func = self.func
+        if len(columns) > 1:
+            flags = [_fails(func, *values) for values in zip(*(other.json() for other in columns))]
+            return (flags if np is None else np.array(flags, bool)), column.owners
+        if np is None:
+            flags = [any(check(value) for check in self.native) for value in column.values]
+            if func is not None:
+                flags = [flag or _fails(func, value) for flag, value in zip(flags, column.json())]
+            return flags, column.owners
+        mask = np.zeros(len(column.values), bool)
+        for check in self.native:
+            mask |= _bounds_mask(check.bounds, column.array())
+        if func is not None:
+            assertion = getattr(func, 'assertion', None)
+            cpp_type = None if column.is_list else column.field.cpp_type
+            if assertion is not None and cpp_type in _ASSERTION_TYPES.get(assertion[0], ()):
+                mask |= _assertion_mask(*assertion, column.field, column.array())
+            else:
+                mask |= np.fromiter((_fails(func, value) for value in column.json()), bool, len(column.values))
+        return mask, column.owners
+
+    def failing(self, batch: _Batch) -> Any:
+        """
+        Returns the indices of the payloads having a value failing the check, some of them repeated.
+
+        Args:
+            batch (_Batch): The payloads.
+
+        Returns:
+            Any: A NumPy array of indices, or a list without NumPy.
+        """
+        mask, owners = self._mask(batch)
+        applies = None
+        if self.when is not None:
+            name, allowed = self.when
+            column = batch.column(self.chain, (name,))
+            applies = set(owner for owner, value in zip(column.owners, column.json()) if value in allowed)
+        if np is None:
+            return [owner for owner, flag in zip(owners, mask) if flag and (applies is None or owner in applies)]
+        failing = np.asarray(owners, np.int64)[mask]
+        if applies is not None:
+            failing = failing[np.isin(failing, list(applies))]
+        return failing
+
+
+def _proto_checks(unit: RuleUnit) -> Optional[List[NativeCheck]]:
+    """Returns the native pre-checks covering every proto rule of a unit, None if some rule has none."""
+    checks = []
+    for rule in unit.proto_rules:
+        if isinstance(rule, RepeatedMsgConstraint) and not rule.item_constraints():
+            continue
+        rule_checks = rule.value_checks() if isinstance(rule, FieldConstraintRules) else None
+        if rule_checks is None or any(getattr(check, 'bounds', None) is None for check in rule_checks):
+            return None
+        checks.extend(rule_checks)
+    return checks
+
+
+def _batch_checks(unit: RuleUnit) -> Optional[List[_ColumnCheck]]:
+    """
+    Returns the column checks of a rule unit, None if it has no column form.
+
+    Args:
+        unit (RuleUnit): The rule unit.
+
+    Returns:
+        Optional[List[_ColumnCheck]]: The checks, failing for every payload the unit reports a violation for.
+    """
+    field_plan = unit.field_plan
+    if unit.kind == RuleUnit.PROTO:
+        checks = _proto_checks(unit)
+        if checks is None or (field_plan.field.cpp_type not in _ARRAY_TYPES
+                              and any(check.bounds.measure == "value" for check in checks)):
+            return None
+        return [_ColumnCheck(unit.chain, ((field_plan.name,),), checks)] if checks else []
+    if unit.kind != RuleUnit.SPEC:
+        return None
+    func = field_plan.criterion.validation_func
+    if not field_plan.is_message:
+        if field_plan.has_presence:
+            return None
+        return [_ColumnCheck(unit.chain, ((field_plan.name,),), [], func)]
+    form: Optional[Tuple[BatchCheck, ...]] = getattr(func, 'batch_form', None)
+    if form is None or field_plan.is_repeated:
+        return None
+    chain = unit.chain + (field_plan.name,)
+    return [_ColumnCheck(chain, tuple(tuple(path.split("/")) for path in check.paths), [], check.func, check.when)
+            for check in form]
+
+
+class _BatchPlan:
+    """
+    The split of the rule units of the payload plan into column checks and units run per payload.
+    """
+
+    def __init__(self, plan: validation_plan.ValidationPlan):
+        self.plan = plan
+        self.columns: List[_ColumnCheck] = []
+        self.residual: List[RuleUnit] = []
+        for unit in plan.units():
+            checks = _batch_checks(unit)
+            if checks is None:
+                self.residual.append(unit)
+            else:
+                self.columns.extend(checks)
+
+    def passes(self, payload: profedit_pb2.Payload) -> bool:
+        """
+        Returns True if the payload passes the rule units not covered by the columns.
+
+        Args:
+            payload (profedit_pb2.Payload): The payload.
+
+        Returns:
+            bool: True if no violation was found.
+        """
+        for unit in self.residual:
+            ctx = ConstraintContext()
+            violations = []
+            unit.run(payload, ctx, violations)
+            if violations or ctx.has_errors():
+                return False
+        return True
+
+    def failing(self, payloads: Sequence[profedit_pb2.Payload]) -> List[bool]:
+        """
+        Returns the flags of the payloads failing any column check.
+
+        Args:
+            payloads (Sequence[profedit_pb2.Payload]): The payloads.
+
+        Returns:
+            List[bool]: True for every payload failing a column check.
+        """
+        batch = _Batch(payloads)
+        if np is None:
+            failing = [False] * batch.size
+            for column in self.columns:
+                for index in column.failing(batch):
+                    failing[index] = True
+            return failing
+        failing = np.zeros(batch.size, bool)
+        for column in self.columns:
+            failing[column.failing(batch)] = True
+        return failing.tolist()
+
+
+_batch_plan: Optional[_BatchPlan] = None
+
+
+def validate_batch(payloads: Iterable[profedit_pb2.Payload], fail_fast: bool = False) -> List[BatchResult]:
+    """
+    Validates many payloads at once, evaluating the checks having a column form over the values of every payload.
+
+    Gives the same outcome as calling `validate` on every payload.
+
+    Args:
+        payloads (Iterable[profedit_pb2.Payload]): The payloads to validate.
+        fail_fast (bool): Flag indicating whether to stop validation on the first violation. Default is False.
+
+    Returns:
+        List[BatchResult]: The result for every payload, in input order,
+            with its position in the input as the source.
+    """
+    global _batch_plan  # pylint: disable=global-statement
+    plan = validation_plan.get_plan(profedit_pb2.Payload.DESCRIPTOR)
+    if _batch_plan is None or _batch_plan.plan is not plan:
+        _import_numpy()
+        _batch_plan = _BatchPlan(plan)
+    payloads = list(payloads)
+    results = []
+    for index, (payload, failing) in enumerate(zip(payloads, _batch_plan.failing(payloads))):
+        error = None
+        if failing or not _batch_plan.passes(payload):
+            try:
+                validate(payload, fail_fast)
+            except exceptions.A7PValidationError as err:
+                error = err
+        results.append(BatchResult(index, payload, error))
+    return results
+
+
+__all__ = (
+    'validate_batch',
+)
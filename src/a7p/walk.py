@@ -0,0 +1,110 @@
+"""
+This module provides a lazy walker of the .a7p files of a directory tree.
+
+Directories are read with `os.scandir`. Entries are filtered by their name first and by the type
+reported by the directory listing, so no file is stat'ed (apart from symbolic links) and nothing is
+collected up front: the files are yielded while the tree is walked, at the pace of the consumer.
+Symbolic links to directories are not followed.
+
+Include and exclude patterns are shell-style globs. A pattern without a slash is matched against
+the entry name, a pattern with a slash against the path relative to the walked directory. Excluded
+directories are not walked.
+
+Functions:
+    iter_profiles: Yields the .a7p files of a directory, optionally recursively.
+
+Usage Example:
+    for result in a7p.load_many(iter_profiles("profiles", recursive=True, exclude=["*_recovered.a7p"])):
+        ...
+"""
+
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+# The suffix of the walked files
+SUFFIX = ".a7p"
+
+
+def _compile(patterns: Iterable[str]) -> Optional[Callable[[str, str], bool]]:
+    """
+    Compiles glob patterns into a single matcher of an entry name and relative path.
+
+    Args:
+        patterns (Iterable[str]): The glob patterns.
+
+    Returns:
+        Optional[Callable[[str, str], bool]]: The matcher, None if there are no patterns.
+    """
+    name_patterns = []
+    path_patterns = []
+    for pattern in patterns:
+        if "/" in pattern:
+            path_patterns.append(fnmatch.translate(pattern.strip("/")))
+        else:
+            name_patterns.append(fnmatch.translate(pattern))
+    if not name_patterns and not path_patterns:
+        return None
+    match_name = re.compile("|".join(name_patterns)).match if name_patterns else None
+    match_path = re.compile("|".join(path_patterns)).match if path_patterns else None
+
+    def matches(name: str, relpath: str) -> bool:
+        return bool(match_name and match_name(name) or match_path and match_path(relpath))
+
+    return matches
+
+
+def iter_profiles(root: str | os.PathLike, recursive: bool = False,
+                  include: Iterable[str] = (), exclude: Iterable[str] = ()) -> Iterator[Path]:
+    """
+    Yields the .a7p files of a directory, lazily.
+
+    Unreadable directories are skipped. The order of the files within a directory is the order of
+    the directory listing, subdirectories are walked after the files of their parent.
+
+    Args:
+        root (str | os.PathLike): The directory to walk.
+        recursive (bool): Whether to walk the subdirectories. Default is False.
+        include (Iterable[str]): Glob patterns of the files to yield. Default is every .a7p file.
+        exclude (Iterable[str]): Glob patterns of the files and directories to skip.
+
+    Yields:
+        Path: The path of every matching file.
+    """
+    included = _compile(include)
+    excluded = _compile(exclude)
+    stack = [(os.fspath(root), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        if name.endswith(SUFFIX) and len(name) > len(SUFFIX) and entry.is_file():
+                            is_dir = False
+                        elif recursive and entry.is_dir(follow_symlinks=False):
+                            is_dir = True
+                        else:
+                            continue
+                    except OSError:
+                        continue
+                    relpath = prefix + name
+                    if excluded and excluded(name, relpath):
+                        continue
+                    if is_dir:
+                        subdirectories.append((entry.path, relpath + "/"))
+                    elif not included or included(name, relpath):
+                        yield Path(entry.path)
+        except OSError:
+            continue
+        stack.extend(reversed(subdirectories))
+
+
+__all__ = (
+    'SUFFIX',
+    'iter_profiles',
+)
@@ -0,0 +1,145 @@
+"""
+This module provides minimal helpers for scanning the protobuf wire format of a serialized
+`profedit_pb2.Payload` without parsing it into a message.
+
+They are used to read a few scalar fields or to index field offsets cheaply, skipping
+the length-delimited repeated fields (such as `distances`, `coef_rows` and `switches`)
+instead of decoding them.
+
+Functions:
+    decode_varint: Decodes a base 128 varint at a given position.
+    to_int32: Converts a decoded varint to a signed 32-bit integer.
+    iter_fields: Iterates over the fields of a serialized message.
+    decode_packed_varints: Decodes a packed repeated varint field.
+"""
+
+from typing import Iterator, Tuple, Union
+
+from a7p import exceptions
+
+# Wire types used by the profedit messages
+WIRE_VARINT = 0
+WIRE_I64 = 1
+WIRE_LEN = 2
+WIRE_I32 = 5
+
+ByteView = Union[bytes, bytearray, memoryview]
+
+
+def decode_varint(buf: ByteView, pos: int, end: int) -> Tuple[int, int]:
+    """
+    Decodes a base 128 varint at the given position.
+
+    Args:
+        buf (ByteView): The serialized data.
+        pos (int): The position of the first byte of the varint.
+        end (int): The position the varint must not cross.
+
+    Returns:
+        Tuple[int, int]: The decoded unsigned value and the position right after the varint.
+
+    Raises:
+        A7PDataError: If the varint is truncated or too long.
+    """
+    result = 0
+    shift = 0
+    while pos < end:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 70:
+            break
+    raise exceptions.A7PDataError("Malformed protobuf data: invalid varint")
+
+
+def to_int32(value: int) -> int:
+    """
+    Converts a decoded varint to a signed 32-bit integer (negative int32 values are sign-extended to 64 bits).
+
+    Args:
+        value (int): The decoded unsigned varint.
+
+    Returns:
+        int: The signed 32-bit value.
+    """
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def iter_fields(buf: ByteView, start: int = 0, end: int = None) -> Iterator[Tuple[int, int, int, int, int]]:
+    """
+    Iterates over the fields of a serialized message in wire order.
+
+    Args:
+        buf (ByteView): The serialized data.
+        start (int): The position the message starts at. Default is 0.
+        end (int): The position the message ends at. Default is the end of the buffer.
+
+    Yields:
+        Tuple[int, int, int, int, int]: The field number, the wire type, the decoded value
+            (for varint and fixed-size fields, 0 for length-delimited ones)
+            and the start and end positions of the field value.
+
+    Raises:
+        A7PDataError: If the data is malformed.
+    """
+    pos = start
+    if end is None:
+        end = len(buf)
+    while pos < end:
+        tag, pos = decode_varint(buf, pos, end)
+        number, wire_type = tag >> 3, tag & 0x07
+        if number == 0:
+            raise exceptions.A7PDataError("Malformed protobuf data: invalid field number")
+        value_start = pos
+        if wire_type == WIRE_VARINT:
+            value, pos = decode_varint(buf, pos, end)
+        elif wire_type == WIRE_LEN:
+            length, value_start = decode_varint(buf, pos, end)
+            value, pos = 0, value_start + length
+        elif wire_type == WIRE_I64:
+            pos += 8
+            value = int.from_bytes(buf[value_start:pos], 'little')
+        elif wire_type == WIRE_I32:
+            pos += 4
+            value = int.from_bytes(buf[value_start:pos], 'little')
+        else:
+            raise exceptions.A7PDataError(f"Malformed protobuf data: unsupported wire type {wire_type}")
+        if pos > end:
+            raise exceptions.A7PDataError("Malformed protobuf data: truncated field")
+        yield number, wire_type, value, value_start, pos
+
+
+def decode_packed_varints(buf: ByteView, start: int, end: int) -> list[int]:
+    """
+    Decodes a packed repeated varint field as signed 32-bit integers.
+
+    Args:
+        buf (ByteView): The serialized data.
+        start (int): The position the packed values start at.
+        end (int): The position the packed values end at.
+
+    Returns:
+        list[int]: The decoded values.
+    """
+    values = []
+    pos = start
+    while pos < end:
+        value, pos = decode_varint(buf, pos, end)
+        values.append(to_int32(value))
+    return values
+
+
+__all__ = (
+    'WIRE_VARINT',
+    'WIRE_I64',
+    'WIRE_LEN',
+    'WIRE_I32',
+    'decode_varint',
+    'to_int32',
+    'iter_fields',
+    'decode_packed_varints',
+)
@@ -1,7 +1,9 @@
+from io import BytesIO
+from pathlib import Path
 from unittest import TestCase
 
 from a7p import *
-from a7p.exceptions import A7PError
+from a7p.exceptions import A7PError, A7PChecksumError, A7PSizeError
 
 
 class TestA7P(TestCase):
@@ -44,3 +46,39 @@ class TestA7P(TestCase):
             is_raise_exception = True
         self.assertTrue(is_raise_exception, "A7PDataError exception didn't raised")
 
+
+    def testLoadsBuffers(self):
+        expected = loads(self.test_data)
+        self.assertEqual(expected, loads(bytearray(self.test_data)))
+        self.assertEqual(expected, loads(memoryview(self.test_data)))
+
+    def testLoadMmap(self):
+        path = Path(__file__).parent / "test.a7p"
+        with open(path, 'rb') as fp:
+            expected = load(fp)
+        self.assertEqual(expected, load_mmap(path))
+
+    def testLoadStream(self):
+        expected = loads(self.test_data)
+        self.assertEqual(expected, load(BytesIO(self.test_data), stream=True, chunk_size=7))
+
+        corrupted = self.test_data[:-1] + b'\x00'
+        with self.assertRaises(A7PChecksumError):
+            load(BytesIO(corrupted), stream=True)
+
+        with self.assertRaises(A7PSizeError):
+            load(BytesIO(self.test_data), stream=True, max_size=64)
+
+    def testVerifyPeek(self):
+        self.assertTrue(verify(self.test_data))
+        self.assertFalse(verify(self.test_data[:-1]))
+        self.assertTrue(verify(Path(__file__).parent / "test.a7p"))
+
+        profile = loads(self.test_data).profile
+        profile.zero_x = -1500
+        data = dumps(Payload(profile=profile))
+        header = peek(data, verify_=True)
+        self.assertEqual(profile.profile_name, header.profile_name)
+        self.assertEqual(profile.caliber, header.caliber)
+        self.assertEqual((-1500, profile.zero_y), (header.zero_x, header.zero_y))
+        self.assertEqual(profile.c_muzzle_velocity, header.c_muzzle_velocity)
@@ -0,0 +1,52 @@
+from pathlib import Path
+from unittest import TestCase
+
+from a7p import load_many, validate_many, loads, spec_validator
+from a7p.exceptions import A7PChecksumError, A7PSpecTypeError, A7PValidationError
+
+
+class TestBatch(TestCase):
+
+    def setUp(self) -> None:
+        self.path = Path(__file__).parent / "test.a7p"
+        self.payload = loads(self.path.read_bytes())
+
+    def testLoadMany(self):
+        for executor in ("process", "thread"):
+            with self.subTest(executor=executor):
+                paths = [self.path] * 5 + [Path(__file__)]
+                results = list(load_many(paths, workers=2, executor=executor, chunk_size=2))
+                self.assertEqual(len(paths), len(results))
+                errors = [result for result in results if not result.ok]
+                self.assertEqual(1, len(errors))
+                self.assertEqual(Path(__file__), errors[0].source)
+                self.assertIsInstance(errors[0].error, A7PChecksumError)
+                for result in results:
+                    if result.ok:
+                        self.assertEqual(self.payload, result.payload)
+
+    def testValidateMany(self):
+        invalid = loads(self.path.read_bytes())
+        invalid.profile.c_muzzle_velocity = -1
+        payloads = [self.payload, invalid, self.payload]
+        results = sorted(validate_many(payloads, workers=2, chunk_size=1), key=lambda result: result.source)
+        self.assertEqual([0, 1, 2], [result.source for result in results])
+        self.assertEqual([True, False, True], [result.ok for result in results])
+        self.assertIs(invalid, results[1].payload)
+        self.assertIsInstance(results[1].error, A7PValidationError)
+        self.assertEqual(invalid, results[1].error.payload)
+
+    def testSingleAssertions(self):
+        values = [-10 ** 7, -600001, -1, 0, 1, 5, 100, 255, 3000, 30000, 600001, 10 ** 7, "", "x" * 9, "x" * 60,
+                  "G7", "LEFT", [], [0] * 5, (0,) * 201]
+        for func in vars(spec_validator).values():
+            assertion = getattr(func, 'assertion', None)
+            if assertion is None:
+                continue
+            for value in values:
+                with self.subTest(func=func.__name__, value=value):
+                    try:
+                        valid = func(value)[0]
+                    except (TypeError, A7PSpecTypeError):
+                        valid = False
+                    self.assertEqual(valid, func.predicate(value))
@@ -0,0 +1,148 @@
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from unittest import TestCase, mock
+
+from a7p import loads, load, dumps
+from a7p import spec_validator
+from a7p.cache import PayloadCache, ValidationCache, rules_fingerprint
+from a7p.buf.validate import expression_pb2
+from a7p.exceptions import A7PValidationError, A7PProtoValidationError, A7PSpecValidationError, SpecViolation
+
+
+class TestPayloadCache(TestCase):
+
+    def setUp(self) -> None:
+        with open(Path(__file__).parent / "test.a7p", 'rb') as fp:
+            self.test_data = fp.read()
+
+    def testHitMiss(self):
+        cache = PayloadCache()
+        first = loads(self.test_data, cache=cache)
+        first.profile.profile_name = "changed"
+        second = loads(bytearray(self.test_data), cache=cache)
+        third = load(BytesIO(self.test_data), stream=True, cache=cache)
+        self.assertEqual(loads(self.test_data), second)
+        self.assertEqual(second, third)
+        self.assertIsNot(second, third)
+        self.assertEqual((2, 1), (cache.hits, cache.misses))
+
+    def testValidationOutcome(self):
+        payload = loads(self.test_data)
+        payload.profile.short_name_top = "abcdefghij"
+        data = dumps(payload, validate_=False)
+
+        cache = PayloadCache()
+        for _ in range(2):
+            with self.assertRaises(A7PValidationError) as ctx:
+                loads(data, cache=cache)
+            self.assertTrue(ctx.exception.proto_violations)
+            self.assertEqual(payload, ctx.exception.payload)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def testConcurrentValidation(self):
+        cache = PayloadCache()
+        calls = []
+
+        def slow_validate(payload, fail_fast):
+            calls.append(fail_fast)
+            time.sleep(0.05)
+
+        with mock.patch('a7p.cache.validate', slow_validate), ThreadPoolExecutor(4) as pool:
+            payloads = list(pool.map(lambda _: loads(self.test_data, cache=cache), range(8)))
+        self.assertEqual([False], calls)
+        self.assertEqual(8, len({id(payload) for payload in payloads}))
+
+    def testEviction(self):
+        cache = PayloadCache(max_bytes=len(self.test_data))
+        payload = loads(self.test_data)
+        for name in ("a", "b", "c"):
+            payload.profile.profile_name = name
+            loads(dumps(payload), validate_=False, cache=cache)
+        self.assertEqual(1, len(cache))
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+
+class TestValidationCache(TestCase):
+
+    def testVerdicts(self):
+        with open(Path(__file__).parent / "test.a7p", 'rb') as fp:
+            payload = loads(fp.read())
+        payload.profile.short_name_top = "abcdefghij"
+        try:
+            loads(dumps(payload, validate_=False))
+        except A7PValidationError as err:
+            error = err
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ValidationCache(Path(tmp) / "validation.sqlite3")
+            self.assertIsNone(cache.get("0" * 32))
+            cache.put("0" * 32, None)
+            cache.put("1" * 32, error)
+            self.assertTrue(cache.get("0" * 32).valid)
+            self.assertIsNone(cache.get("0" * 32, fail_fast=True))
+
+            verdict = cache.get("1" * 32)
+            self.assertFalse(verdict.valid)
+            self.assertIs(type(error), type(verdict.error))
+            self.assertEqual(error.args, verdict.error.args)
+            self.assertEqual([v.format() for v in error.all_violations],
+                             [v.format() for v in verdict.error.all_violations])
+
+            proto_error = A7PProtoValidationError("Proto", payload, expression_pb2.Violations(
+                violations=[expression_pb2.Violation(field_path="profile.zero_x", message="out of range")]))
+            spec_error = A7PSpecValidationError("Spec", payload, [SpecViolation(Path("~/profile/zero_x"), 1, "bad")])
+            for md5_hash, expected in (("2" * 32, proto_error), ("3" * 32, spec_error)):
+                cache.put(md5_hash, expected)
+                restored = cache.get(md5_hash).error
+                self.assertIs(type(expected), type(restored))
+                self.assertEqual(expected.args, restored.args)
+                self.assertEqual(expected.all_violations, restored.all_violations)
+                self.assertIsNone(restored.payload)
+
+            self.assertEqual(0, cache.prune())
+            self.assertEqual(4, cache.prune(everything=True))
+            cache.close()
+
+    def testAccessTime(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ValidationCache(Path(tmp) / "validation.sqlite3")
+            self.assertEqual("wal", cache._conn.execute("PRAGMA journal_mode").fetchone()[0])
+            cache.put("0" * 32, None)
+            with cache._conn:
+                cache._conn.execute("UPDATE verdicts SET accessed = 100")
+            self.assertTrue(cache.get("0" * 32).valid)
+            accessed = cache._conn.execute("SELECT accessed FROM verdicts").fetchone()[0]
+            self.assertGreater(accessed, 100)
+
+            changes = cache._conn.total_changes
+            self.assertTrue(cache.get("0" * 32).valid)
+            self.assertEqual(changes, cache._conn.total_changes)
+            cache.close()
+
+    def testDatabaseError(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ValidationCache(Path(tmp) / "validation.sqlite3")
+            cache.put("0" * 32, None)
+            with mock.patch.object(cache, '_conn', mock.MagicMock()) as conn:
+                conn.execute.side_effect = sqlite3.OperationalError("database is locked")
+                self.assertIsNone(cache.get("0" * 32))
+                cache.put("1" * 32, None)
+            self.assertTrue(cache.get("0" * 32).valid)
+            self.assertIsNone(cache.get("1" * 32))
+            cache.close()
+
+    def testFingerprint(self):
+        criterion = spec_validator._default_validator.criteria['zero_x']
+        fingerprints = set()
+        for func in (lambda x, *args, **kwargs: (min(x, 50) == x, ""),
+                     lambda x, *args, **kwargs: (min(x, 60) == x, ""),
+                     spec_validator.single_assertion(spec_validator.assert_float_range, -100.0, 100.0)(criterion.validation_func),
+                     spec_validator.single_assertion(spec_validator.assert_float_range, -150.0, 150.0)(criterion.validation_func)):
+            with mock.patch.object(criterion, 'validation_func', func):
+                fingerprints.add(rules_fingerprint())
+        fingerprints.add(rules_fingerprint())
+        self.assertEqual(5, len(fingerprints))
@@ -0,0 +1,73 @@
+import asyncio
+import contextlib
+import io
+import random
+from pathlib import Path
+from unittest import TestCase, mock
+
+from a7p import __main__ as cli
+from a7p.__main__ import command_parser, process_directory, split_chunks, stream_results
+
+
+class TestStreamResults(TestCase):
+
+    def testBoundedStream(self):
+        pulled = 0
+
+        def files():
+            nonlocal pulled
+            for item in range(100):
+                pulled += 1
+                yield item
+
+        chunks = split_chunks(files(), 1)
+        running = 0
+        peak = 0
+
+        async def run(chunk):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(random.random() / 1000)
+            running -= 1
+            return [item * 2 for item in chunk]
+
+        async def collect():
+            results = []
+            async for result in stream_results(chunks, run, 4):
+                # files are only taken from the walker when a slot is free
+                self.assertLessEqual(pulled, len(results) + 5)
+                results.append(result)
+            return results
+
+        results = asyncio.run(collect())
+        self.assertEqual(sorted(range(0, 200, 2)), sorted(results))
+        self.assertLessEqual(peak, 4)
+
+    def testChunks(self):
+        files = list(range(1000))
+        chunks = list(split_chunks(iter(files), 4))
+        self.assertEqual(files, [item for chunk in chunks for item in chunk])
+        self.assertEqual([1, 1, 1, 1, 2], [len(chunk) for chunk in chunks[:5]])
+        self.assertEqual(32, max(map(len, chunks)))
+        self.assertEqual({1}, set(map(len, split_chunks(range(10), 1))))
+
+
+class TestProcessDirectory(TestCase):
+
+    def testProgress(self):
+        files = sorted((Path(__file__).parent.parent / "gallery").rglob("*.a7p"))[:5]
+        updates = []
+        with mock.patch.object(cli.tqdm, 'update', lambda bar, n=1: updates.append(n)), \
+                contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            asyncio.run(process_directory(iter(files), (True, None, None, None, None)))
+        self.assertEqual([1] * len(files), updates)
+
+
+class TestCommands(TestCase):
+
+    def testCachePrune(self):
+        args = command_parser.parse_args(['cache', 'prune', '--all', '--max-age', '7'])
+        self.assertEqual(('cache', 'prune', True, 7), (args.command, args.cache_command, args.everything, args.max_age))
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            command_parser.parse_args(['cache', 'unknown'])
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase, mock, skipUnless
+
+from a7p import profedit_pb2, protovalidate, validation_plan
+from a7p.protovalidate.internal import compile_cache
+from a7p.protovalidate.internal.compile_cache import STALE_AGE, CompileCache
+
+
+class TestCompileCache(TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "cel-test.pickle"
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def testRoundTrip(self):
+        cache = CompileCache(self.path)
+        env = cache.environment()
+        ast = cache.compile(env, "this > rules.gt")
+        self.assertIs(ast, cache.compile(env, "this > rules.gt"))
+        cache.save()
+        self.assertTrue(self.path.exists())
+
+        loaded = CompileCache(self.path)
+        env = loaded.environment()
+        self.assertEqual(ast, loaded.compile(env, "this > rules.gt"))
+        mtime = self.path.stat().st_mtime_ns
+        loaded.save()
+        self.assertEqual(mtime, self.path.stat().st_mtime_ns)
+
+    def testBrokenFile(self):
+        self.path.write_bytes(b"not a pickle")
+        cache = CompileCache(self.path)
+        env = cache.environment()
+        self.assertIsNotNone(cache.compile(env, "size(this) < 5"))
+        cache.save()
+        mtime = self.path.stat().st_mtime_ns
+        loaded = CompileCache(self.path)
+        loaded.compile(loaded.environment(), "size(this) < 5")
+        loaded.save()
+        self.assertEqual(mtime, self.path.stat().st_mtime_ns)
+
+    @skipUnless(hasattr(os, "getuid"), "files have no POSIX owner")
+    def testUntrustedFile(self):
+        cache = CompileCache(self.path)
+        cache.compile(cache.environment(), "this > rules.gt")
+        cache.save()
+        self.assertEqual(0, self.path.stat().st_mode & 0o077)
+
+        def loaded_asts():
+            loaded = CompileCache(self.path)
+            loaded.load()
+            return loaded._asts
+
+        self.assertTrue(loaded_asts())
+        os.chmod(self.path, 0o620)
+        self.assertFalse(loaded_asts())
+        os.chmod(self.path, 0o602)
+        self.assertFalse(loaded_asts())
+        os.chmod(self.path, 0o644)
+        self.assertTrue(loaded_asts())
+        with mock.patch.object(compile_cache.os, "getuid", return_value=os.getuid() + 1):
+            self.assertFalse(loaded_asts())
+
+    def testStaleFiles(self):
+        other = self.path.with_name("cel-other.pickle")
+        stale = self.path.with_name("cel-stale.pickle")
+        other.write_bytes(b"")
+        stale.write_bytes(b"")
+        expired = time.time() - 2 * STALE_AGE
+        os.utime(stale, (expired, expired))
+
+        cache = CompileCache(self.path)
+        cache.compile(cache.environment(), "this > rules.gt")
+        cache.save()
+        # another interpreter may be using the recent file
+        self.assertTrue(other.exists())
+        self.assertFalse(stale.exists())
+
+    def testWarmup(self):
+        protovalidate.warmup()
+        self.assertIn(profedit_pb2.Payload.DESCRIPTOR, validation_plan._plans)
+
+        env = dict(os.environ, A7P_CACHE_DIR=self.dir.name)
+        subprocess.run([sys.executable, "-c", "from a7p import protovalidate; protovalidate.warmup()"],
+                       env=env, check=True)
+        self.assertEqual(1, len(list(Path(self.dir.name).glob("cel-*.pickle"))))
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Keep the persistent caches written by the tests out of the user cache directory
+_cache_dir = tempfile.TemporaryDirectory(prefix="a7p-cache-")
+os.environ["A7P_CACHE_DIR"] = _cache_dir.name
@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+from unittest import TestCase
+
+from google.protobuf.json_format import MessageToDict, MessageToJson, Parse, ParseDict, ParseError
+
+from a7p import loads, profedit_pb2, to_dict, from_dict, from_dicts
+from a7p.buf.validate import validate_pb2
+from a7p.convert import dict_to_message, message_to_dict, message_to_json
+
+
+class TestConvert(TestCase):
+
+    def testGallery(self):
+        files = sorted((Path(__file__).parent.parent / "gallery").rglob("*.a7p"))
+        self.assertTrue(files)
+        for path in files:
+            with self.subTest(path=path.name):
+                payload = loads(path.read_bytes(), validate_=False)
+                self.assertEqual(
+                    MessageToJson(payload, including_default_value_fields=True, preserving_proto_field_name=True),
+                    message_to_json(payload)
+                )
+
+    def testDefaults(self):
+        for message in (profedit_pb2.Payload(), profedit_pb2.Profile(), profedit_pb2.CoefRow()):
+            self.assertEqual(
+                list(MessageToDict(message, including_default_value_fields=True,
+                                   preserving_proto_field_name=True).items()),
+                list(message_to_dict(message).items())
+            )
+
+    def testFromDict(self):
+        files = sorted((Path(__file__).parent.parent / "gallery").rglob("*.a7p"))
+        dicts = [to_dict(loads(path.read_bytes(), validate_=False)) for path in files]
+        payloads = from_dicts(dicts)
+        for data, payload in zip(dicts, payloads):
+            self.assertEqual(Parse(json.dumps(data), profedit_pb2.Payload()), payload)
+
+        data = {'profile': {'profileName': 'test', 'bc_type': 'G1', 'twistDir': 1, 'zero_x': '-100',
+                            'distances': [100, '200'], 'c_zero_distance_idx': 1.0,
+                            'coefRows': [{'bc_cd': '1', 'mv': 0}]}}
+        self.assertEqual(Parse(json.dumps(data), profedit_pb2.Payload()), from_dict(data))
+
+        for data in ({'profile': {'unknown': 1}}, {'profile': {'zero_x': 1.5}},
+                     {'profile': {'bc_type': 'G2'}}, {'profile': {'distances': [1, None]}},
+                     {'profile': {'zero_x': 2 ** 40}}, {'profile': {'zero_x': '1 0'}},
+                     {'profile': {'zero_x': True}}, {'profile': {'zero_x': 'abc'}}, {'profile': {'bc_type': 'x'}},
+                     {'profile': {'profile_name': 5}}, {'profile': {'profile_name': '\ud800'}},
+                     {'profile': {'distances': ['1.5']}}, {'profile': {'zero_x': [1]}}):
+            with self.assertRaises(ParseError) as expected:
+                Parse(json.dumps(data), profedit_pb2.Payload())
+            with self.assertRaises(ParseError) as actual:
+                from_dict(data)
+            self.assertEqual(str(expected.exception), str(actual.exception))
+
+    def testScalarTypes(self):
+        cases = (
+            (validate_pb2.FloatRules, ({'const': 1.5}, {'const': '2.5'}, {'const': 'Infinity'}, {'const': 'NaN'},
+                                       {'lt': 3}, {'const': 1e39}, {'const': -1e39}, {'const': float('nan')},
+                                       {'const': float('-inf')}, {'const': 'nan'}, {'const': 'x'}, {'const': True})),
+            (validate_pb2.DoubleRules, ({'const': 1e39}, {'const': '-Infinity'}, {'const': float('inf')})),
+            (validate_pb2.BoolRules, ({'const': True}, {'const': 'true'}, {'const': 1})),
+            (validate_pb2.BytesRules, ({'const': 'YWJj'}, {'const': 'YWJjZA'}, {'const': '-_8'}, {'const': 'Y'},
+                                       {'len': '3'})),
+        )
+        for message_type, dicts in cases:
+            for data in dicts:
+                with self.subTest(message=message_type.__name__, data=data):
+                    try:
+                        expected = ParseDict(data, message_type())
+                    except ParseError as err:
+                        with self.assertRaises(ParseError) as actual:
+                            dict_to_message(data, message_type())
+                        self.assertEqual(str(err), str(actual.exception))
+                    else:
+                        actual = dict_to_message(data, message_type())
+                        self.assertEqual(expected.SerializeToString(), actual.SerializeToString())
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+# Modules of the validation, JSON and recover subsystems, loaded on first use only
+LAZY_MODULES = (
+    'celpy',
+    'lark',
+    'google.protobuf.json_format',
+    'a7p.protovalidate',
+    'a7p.spec_validator',
+    'a7p.validation_plan',
+    'a7p.scheduling',
+    'a7p.convert',
+    'a7p.batch',
+    'a7p.vectorized',
+    'a7p.recover',
+)
+
+# Upper bound of the import time in seconds, several times the expected one
+IMPORT_BUDGET = 0.5
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import a7p
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(' '.join(name for name in sys.argv[1:] if name in sys.modules))
+"""
+
+
+class TestImport(TestCase):
+
+    def importA7P(self):
+        output = subprocess.run([sys.executable, '-c', SCRIPT, *LAZY_MODULES],
+                                capture_output=True, text=True, check=True).stdout.splitlines()
+        return float(output[0]), output[1].split()
+
+    def testLazyModules(self):
+        _, loaded = self.importA7P()
+        self.assertEqual([], loaded)
+
+    def testImportTime(self):
+        elapsed = min(self.importA7P()[0] for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET)
+
+    def testLazyNames(self):
+        import a7p
+        self.assertIs(a7p.validate_batch, a7p.vectorized.validate_batch)
+        self.assertIs(a7p.load_many, a7p.batch.load_many)
+        self.assertIn('spec_validator', dir(a7p))
+        with self.assertRaises(AttributeError):
+            a7p.unknown_name
@@ -0,0 +1,32 @@
+from pathlib import Path
+from unittest import TestCase
+
+from a7p import loads
+from a7p.exceptions import A7PChecksumError
+from a7p.lazy import ProfileView
+
+
+class TestProfileView(TestCase):
+
+    def setUp(self) -> None:
+        with open(Path(__file__).parent / "test.a7p", 'rb') as fp:
+            self.test_data = fp.read()
+
+    def testFields(self):
+        profile = loads(self.test_data).profile
+        view = ProfileView(self.test_data)
+        for field in profile.DESCRIPTOR.fields:
+            value = getattr(profile, field.name)
+            if field.label == field.LABEL_REPEATED:
+                value = tuple(value)
+            self.assertEqual(value, getattr(view, field.name), field.name)
+
+    def testToPayload(self):
+        view = ProfileView(self.test_data)
+        self.assertEqual(loads(self.test_data), view.to_payload(validate_=True))
+
+    def testErrors(self):
+        with self.assertRaises(A7PChecksumError):
+            ProfileView(self.test_data[:-1])
+        with self.assertRaises(AttributeError):
+            ProfileView(self.test_data).unknown_field
@@ -0,0 +1,97 @@
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from a7p import loads
+from a7p.protovalidate import Validator
+from a7p.protovalidate.internal import native
+
+
+def mutations(payload):
+    """Yield copies of the payload breaking range, length and item count rules."""
+    profile = payload.profile
+    for field, value in (('zero_x', -600001), ('zero_y', 600001), ('c_muzzle_velocity', 0),
+                         ('b_weight', -1), ('r_twist', 10 ** 6), ('profile_name', 'x' * 51),
+                         ('user_note', 'я' * 1025), ('c_zero_distance_idx', 300)):
+        mutated = payload.__class__()
+        mutated.CopyFrom(payload)
+        setattr(mutated.profile, field, value)
+        yield mutated
+    for field, values in (('distances', []), ('distances', list(profile.distances) * 60),
+                          ('coef_rows', [])):
+        mutated = payload.__class__()
+        mutated.CopyFrom(payload)
+        del getattr(mutated.profile, field)[:]
+        getattr(mutated.profile, field).extend(values)
+        yield mutated
+
+
+class TestNativeChecks(TestCase):
+
+    def testViolationsMatchCel(self):
+        with patch.object(native, 'native_check', return_value=None):
+            cel_validator = Validator()
+            cel_validator.collect_violations(loads((Path(__file__).parent / "test.a7p").read_bytes(), False))
+        native_validator = Validator()
+
+        files = sorted((Path(__file__).parent.parent / "gallery").rglob("*.a7p"))[:4]
+        for path in files:
+            payload = loads(path.read_bytes(), validate_=False)
+            for message in (payload, *mutations(payload)):
+                with self.subTest(path=path.name):
+                    self.assertEqual(cel_validator.collect_violations(message),
+                                     native_validator.collect_violations(message))
+
+
+def items_message_class():
+    """Build a message type with rules on the items of repeated fields."""
+    from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+    from a7p.buf.validate import validate_pb2
+
+    pool = descriptor_pool.Default()
+    try:
+        return message_factory.GetMessageClass(pool.FindMessageTypeByName("a7p.test.Items"))
+    except KeyError:
+        pass
+    file_proto = descriptor_pb2.FileDescriptorProto(name="a7p_test_items.proto", package="a7p.test", syntax="proto3",
+                                                    dependency=[validate_pb2.DESCRIPTOR.name])
+    field_type = descriptor_pb2.FieldDescriptorProto
+    row = file_proto.message_type.add(name="Row")
+    a = row.field.add(name="a", number=1, type=field_type.TYPE_INT32, label=field_type.LABEL_OPTIONAL)
+    a.options.Extensions[validate_pb2.field].int32.gte = 0
+    a.options.Extensions[validate_pb2.field].int32.lte = 10
+    name = row.field.add(name="name", number=2, type=field_type.TYPE_STRING, label=field_type.LABEL_OPTIONAL)
+    name.options.Extensions[validate_pb2.field].string.max_len = 3
+
+    items = file_proto.message_type.add(name="Items")
+    values = items.field.add(name="values", number=1, type=field_type.TYPE_INT32, label=field_type.LABEL_REPEATED)
+    values.options.Extensions[validate_pb2.field].repeated.items.int32.gte = 0
+    values.options.Extensions[validate_pb2.field].repeated.items.int32.lte = 10
+    ratios = items.field.add(name="ratios", number=2, type=field_type.TYPE_DOUBLE, label=field_type.LABEL_REPEATED)
+    ratios.options.Extensions[validate_pb2.field].repeated.items.double.gt = 0
+    ratios.options.Extensions[validate_pb2.field].repeated.items.double.lt = 1
+    items.field.add(name="rows", number=3, type=field_type.TYPE_MESSAGE, label=field_type.LABEL_REPEATED,
+                    type_name=".a7p.test.Row")
+    pool.Add(file_proto)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName("a7p.test.Items"))
+
+
+class TestRepeatedItems(TestCase):
+
+    def testFailingItemsOnly(self):
+        items_class = items_message_class()
+        with patch.object(native, 'native_check', return_value=None):
+            cel_validator = Validator()
+            cel_validator.collect_violations(items_class())
+        native_validator = Validator()
+
+        messages = [
+            items_class(values=[1, 5, 10, 0], ratios=[0.5, 0.25], rows=[{'a': 1, 'name': 'ab'}, {'a': 10}]),
+            items_class(values=[1, -1, 5, 11, 10, 0], ratios=[0.5, float('nan'), 1.0],
+                        rows=[{'a': 1, 'name': 'ab'}, {'a': -1, 'name': 'abcd'}, {'a': 5}]),
+        ]
+        expected = [[], ['values[1]', 'values[3]', 'ratios[1]', 'ratios[2]', 'rows[1].a', 'rows[1].name']]
+        for message, paths in zip(messages, expected):
+            violations = native_validator.collect_violations(message)
+            self.assertEqual(cel_validator.collect_violations(message), violations)
+            self.assertEqual(paths, [violation.field_path for violation in violations.violations])
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from a7p import GType, dumps, loads, validate
+from a7p.exceptions import A7PValidationError
+from a7p.recover import recover_plan, recover_proto
+
+
+class TestRecoverPlan(TestCase):
+
+    def setUp(self) -> None:
+        self.data = (Path(__file__).parent / "test.a7p").read_bytes()
+
+    def _error(self, payload) -> A7PValidationError:
+        with self.assertRaises(A7PValidationError) as err:
+            validate(payload)
+        return err.exception
+
+    def testRecover(self):
+        payload = loads(self.data)
+        profile = payload.profile
+        profile.profile_name = 'x' * 60
+        profile.c_zero_distance_idx = 250
+        profile.distances[:] = [1]
+        profile.bc_type = GType.CUSTOM
+        profile.coef_rows[0].mv = -5
+        profile.c_zero_air_humidity = 500
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan, results, err = recover_plan.recover(self._error(payload))
+        self.assertIsNone(err)
+        validate(payload)
+
+        paths = [str(fix.path) for fix in plan.fixes]
+        # one fix per field, the distances replaced before the zero distance index is reset
+        self.assertEqual(len(set(paths)), len(paths))
+        self.assertLess(paths.index('~/profile/distances'), paths.index('~/profile/c_zero_distance_idx'))
+        self.assertIn('~/profile/coef_rows', paths)
+        self.assertEqual(0, profile.c_zero_air_humidity)
+        self.assertTrue(all(result.recovered for result in results[:len(plan.fixes)]))
+
+    def testViolationsLeft(self):
+        payload = loads(self.data)
+        payload.profile.zero_x = 10 ** 8
+        # the zero distance index out of a short table has no fix
+        payload.profile.distances[:] = [10000, 20000, 30000, 40000]
+        payload.profile.c_zero_distance_idx = 10
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, err = recover_plan.recover(self._error(payload))
+        expected = self._error(payload)
+        self.assertIsNotNone(err)
+        self.assertEqual(expected.all_violations, err.all_violations)
+
+    def testBothRegistries(self):
+        payload = loads(self.data)
+        # the spec fix cuts the note to the spec bound, longer than the proto one
+        payload.profile.user_note = 'x' * 2000
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan, _, err = recover_plan.recover(self._error(payload))
+        self.assertIsNone(err)
+        validate(payload)
+        self.assertEqual(['~/profile/user_note', 'profile.user_note'], [str(fix.path) for fix in plan.fixes])
+
+    def testSnapshots(self):
+        payload = loads(self.data)
+        profile = payload.profile
+        profile.distances[:] = [1]
+        rows = tuple((row.bc_cd, row.mv) for row in profile.coef_rows)
+
+        result = recover_proto.apply(payload, "profile.distances")
+        self.assertEqual((1,), result.old_value)
+        self.assertEqual(tuple(profile.distances), result.new_value)
+        self.assertEqual(rows, recover_proto.get_value_by_path(payload, "profile.coef_rows"))
+        self.assertEqual(profile.zero_x, recover_proto.get_value_by_path(payload, "profile.zero_x"))
+
+
+class TestBulkRecover(TestCase):
+
+    def testRecoverDirectory(self):
+        data = (Path(__file__).parent / "test.a7p").read_bytes()
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "sub").mkdir()
+            (root / "valid.a7p").write_bytes(data)
+            for path, name, value in ((root / "zero.a7p", 'zero_x', 10 ** 8),
+                                      (root / "sub" / "name.a7p", 'profile_name', 'x' * 80),
+                                      (root / "sub" / "note.a7p", 'user_note', 'x' * 2000)):
+                payload = loads(data)
+                setattr(payload.profile, name, value)
+                path.write_bytes(dumps(payload, validate_=False))
+
+            env = dict(os.environ, A7P_CACHE_DIR=str(root / "cache"))
+            process = subprocess.run([sys.executable, "-m", "a7p", str(root), "-r", "--recover", "-F", "-j", "2"],
+                                     capture_output=True, text=True, env=env)
+            self.assertEqual(0, process.returncode, process.stderr)
+            self.assertIn("profile.zero_x", process.stdout)
+            self.assertIn("Recovered: 3", process.stdout)
+
+            self.assertFalse((root / "valid_recovered.a7p").exists())
+            for path in (root / "zero_recovered.a7p", root / "sub" / "name_recovered.a7p",
+                         root / "sub" / "note_recovered.a7p"):
+                validate(loads(path.read_bytes()))
+            self.assertEqual(0, loads((root / "zero_recovered.a7p").read_bytes()).profile.zero_x)
@@ -0,0 +1,52 @@
+from pathlib import Path
+from unittest import TestCase
+
+from a7p import loads, validate, scheduling
+from a7p.exceptions import A7PValidationError
+from a7p.profedit_pb2 import Payload
+
+
+class TestScheduling(TestCase):
+
+    def setUp(self) -> None:
+        self.data = (Path(__file__).parent / "test.a7p").read_bytes()
+
+    def tearDown(self) -> None:
+        scheduling.seed_rules(Payload.DESCRIPTOR, {})
+
+    def testFirstViolation(self):
+        payload = loads(self.data)
+        validate(payload, fail_fast=True)
+        payload.profile.zero_x = 10 ** 7
+        payload.profile.c_zero_distance_idx = 250
+        with self.assertRaises(A7PValidationError) as full:
+            validate(payload)
+        with self.assertRaises(A7PValidationError) as err:
+            validate(payload, fail_fast=True)
+        violations = err.exception.proto_violations + err.exception.spec_violations
+        self.assertEqual(1, len(violations))
+        self.assertIn(violations[0].format(),
+                      [v.format() for v in full.exception.proto_violations + full.exception.spec_violations])
+
+    def testProfileRules(self):
+        payloads = []
+        for _ in range(5):
+            payload = loads(self.data)
+            del payload.profile.distances[:]
+            payloads.append(payload)
+        seeded = self.position('profile.distances:proto')
+        stats = scheduling.profile_rules(payloads)
+        self.assertTrue(all(rule_stats.runs == 5 for rule_stats in stats.values()))
+        self.assertEqual(5, stats['profile.distances:proto'].failures)
+        self.assertEqual(0, stats['profile.zero_x:proto'].failures)
+        self.assertLess(self.position('profile.distances:proto'), seeded)
+
+        scheduling.seed_rules(Payload.DESCRIPTOR, {})
+        self.assertEqual(seeded, self.position('profile.distances:proto'))
+        scheduling.seed_rules(Payload.DESCRIPTOR, {'profile.b_length:proto': {'runs': 2, 'seconds': 1e-7, 'failures': 1}})
+        self.assertEqual(0, self.position('profile.b_length:proto'))
+
+    @staticmethod
+    def position(name):
+        rules = scheduling._get_schedule(Payload.DESCRIPTOR).rules
+        return [rule.name for rule in rules].index(name)
@@ -1,6 +1,11 @@
-from a7p import exceptions, load
+from pathlib import Path
+from unittest import TestCase
+
+from a7p import TrackedPayload, exceptions, load, loads, to_dict, validate, validate_batch, profedit_pb2
+from a7p.exceptions import A7PValidationError
 from a7p.logger import color_print, logger
 from a7p.recover.recover_process import attempt_to_recover
+from a7p.spec_validator import SpecValidator, _default_validator
 
 
 def _example():
@@ -20,9 +25,94 @@ def _example():
     except IOError as e:
         print("Error: %s" % e)
 
-if __name__ == '__main__':
-    _example()
+
+def spec_mutations(payload):
+    """Yield copies of the payload breaking spec rules."""
+    yield payload
+    yield profedit_pb2.Payload()
+    for changes in ({'profile_name': 'x' * 60, 'bc_type': 9}, {'c_zero_distance_idx': 250, 'twist_dir': 5}):
+        mutated = profedit_pb2.Payload()
+        mutated.CopyFrom(payload)
+        for name, value in changes.items():
+            setattr(mutated.profile, name, value)
+        yield mutated
+    mutated = profedit_pb2.Payload()
+    mutated.CopyFrom(payload)
+    mutated.profile.distances.extend(range(-5, 300))
+    del mutated.profile.switches[1:]
+    mutated.profile.switches[0].distance_from = 7
+    for _ in range(6):
+        mutated.profile.coef_rows.add(bc_cd=200000, mv=0)
+    yield mutated
+
+
+class TestRegistration(TestCase):
+
+    def setUp(self) -> None:
+        self.data = (Path(__file__).parent / "test.a7p").read_bytes()
+
+    def testRegisterAfterValidation(self):
+        payload = loads(self.data)
+        tracked = TrackedPayload(loads(self.data), validated=True)
+        tracked.profile.user_note = "changed"
+        validate(payload)
+        validate(payload, fail_fast=True)
+        self.assertTrue(validate_batch([payload])[0].ok)
+
+        original = _default_validator.criteria["user_note"].validation_func
+        _default_validator.unregister("user_note")
+        _default_validator.register("user_note", lambda x, *args, **kwargs: (False, "rejected"))
+        try:
+            for fail_fast in (False, True):
+                with self.subTest(fail_fast=fail_fast), self.assertRaises(A7PValidationError):
+                    validate(payload, fail_fast)
+            self.assertRaises(A7PValidationError, validate, tracked)
+            self.assertFalse(validate_batch([payload])[0].ok)
+        finally:
+            _default_validator.unregister("user_note")
+            _default_validator.register("user_note", original)
+        validate(payload)
 
 
+class TestValidateMessage(TestCase):
 
+    def testSameViolations(self):
+        custom = SpecValidator()
+        custom.register("~/profile/distances/[3]", lambda x, *args: (x < 1000, "expected shorter distance"))
+        custom.register("switches", lambda x, *args: (len(x) > 10, f"got {x[:1]}"))
+        custom.register("mv", lambda x, *args: (x < 500, "expected lower mv"))
+        files = sorted((Path(__file__).parent.parent / "gallery").rglob("*.a7p"))[:5]
+        for path in files:
+            for payload in spec_mutations(loads(path.read_bytes(), validate_=False)):
+                for validator in (_default_validator, custom):
+                    with self.subTest(path=path.name):
+                        self.assertEqual(validator.validate(to_dict(payload)), validator.validate_message(payload))
 
+
+class TestCriteriaIndex(TestCase):
+
+    def testWildcard(self):
+        validator = SpecValidator()
+        validator.register("~/profile/distances/[*]", lambda x, *args: (x < 20000, "expected shorter distance"))
+        payload = loads((Path(__file__).parent / "test.a7p").read_bytes())
+        data = to_dict(payload)
+        _, violations = validator.validate(data)
+        far = [i for i, d in enumerate(data['profile']['distances']) if d >= 20000]
+        self.assertTrue(far)
+        self.assertEqual([f"~/profile/distances/[{i}]" for i in far], [str(v.path) for v in violations])
+        self.assertEqual(violations, validator.validate_message(payload)[1])
+
+        validator.register("[*]", lambda x, *args: (True, ""))
+        self.assertIs(validator.criteria["[*]"], validator.get_criteria(Path("~/profile/distances/[3]")))
+        self.assertIsNone(validator.get_criteria(Path("~/profile/distances")))
+
+    def testPruning(self):
+        visited = []
+        validator = SpecValidator()
+        validator.register("~/profile/zero_x", lambda x, *args: (visited.append(x) or True, ""))
+        validator.validate({'profile': {'zero_x': 1, 'distances': [{'zero_x': 2}], 'rows': [{'mv': 3}]}})
+        self.assertEqual([1], visited)
+
+
+if __name__ == '__main__':
+    _example()
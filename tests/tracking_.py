@@ -0,0 +1,59 @@
+from pathlib import Path
+from unittest import TestCase
+
+from a7p import TrackedPayload, dumps, loads, validate
+from a7p.exceptions import A7PValidationError
+
+
+class TestTrackedPayload(TestCase):
+
+    def setUp(self) -> None:
+        self.data = (Path(__file__).parent / "test.a7p").read_bytes()
+        self.tracked = TrackedPayload(loads(self.data), validated=True)
+
+    def testDirty(self):
+        tracked = self.tracked
+        self.assertEqual(frozenset(), tracked.dirty)
+        tracked.profile.zero_x = tracked.profile.zero_x
+        self.assertEqual(frozenset(), tracked.dirty)
+        tracked.profile.zero_x += 1000
+        distances = tracked.profile.distances
+        self.assertEqual({'zero_x'}, tracked.dirty)
+        distances.append(distances[-1] + 100)
+        self.assertEqual({'zero_x', 'distances'}, tracked.dirty)
+        tracked.mark_dirty('user_note')
+        self.assertIn('user_note', tracked.dirty)
+        self.assertRaises(KeyError, tracked.mark_dirty, 'unknown')
+
+        self.assertEqual(dumps(tracked.payload), dumps(tracked))
+        self.assertEqual(frozenset(), tracked.dirty)
+
+    def testInvalidChanges(self):
+        for name, value in (('zero_x', 10 ** 7), ('c_zero_distance_idx', 250), ('profile_name', 'x' * 60)):
+            with self.subTest(name=name):
+                tracked = TrackedPayload(loads(self.data), validated=True)
+                setattr(tracked.profile, name, value)
+                with self.assertRaises(A7PValidationError) as expected:
+                    validate(tracked.payload)
+                with self.assertRaises(A7PValidationError) as err:
+                    validate(tracked)
+                self.assertEqual(expected.exception.violations, err.exception.violations)
+                self.assertFalse(tracked.validated and not tracked.dirty)
+
+    def testMethods(self):
+        tracked = self.tracked
+        for name in ('ClearField', 'MergeFrom', 'CopyFrom', 'ParseFromString'):
+            with self.subTest(name=name):
+                self.assertRaises(AttributeError, getattr, tracked.profile, name)
+        self.assertRaises(AttributeError, setattr, tracked.profile, 'unknown', 1)
+
+        tracked.payload.profile.MergeFrom(type(tracked.payload.profile)(zero_x=10 ** 8))
+        self.assertRaises(A7PValidationError, validate, tracked)
+
+    def testPayloadAccess(self):
+        tracked = self.tracked
+        dumps(tracked)
+        self.assertTrue(tracked.validated)
+        tracked.payload.profile.user_note = "x" * 2000
+        self.assertFalse(tracked.validated)
+        self.assertRaises(A7PValidationError, dumps, tracked)
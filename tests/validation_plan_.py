@@ -0,0 +1,40 @@
+from pathlib import Path
+from unittest import TestCase
+
+from a7p import loads, to_dict, profedit_pb2
+from a7p import protovalidate
+from a7p.spec_validator import _default_validator
+from a7p.validation_plan import check
+
+
+def mutations(payload):
+    """Yield copies of the payload breaking proto and spec rules."""
+    yield payload
+    yield profedit_pb2.Payload()
+    for changes in ({'zero_x': 250000, 'profile_name': 'x' * 60}, {'bc_type': 9, 'twist_dir': 5},
+                    {'c_zero_distance_idx': 250, 'b_weight': 0}, {'user_note': 'y' * 1100, 'zero_y': -10 ** 6}):
+        mutated = profedit_pb2.Payload()
+        mutated.CopyFrom(payload)
+        for name, value in changes.items():
+            setattr(mutated.profile, name, value)
+        yield mutated
+    mutated = profedit_pb2.Payload()
+    mutated.CopyFrom(payload)
+    mutated.profile.distances.extend(range(-5, 300))
+    del mutated.profile.switches[1:]
+    mutated.profile.switches[0].distance_from = 7
+    for _ in range(6):
+        mutated.profile.coef_rows.add(bc_cd=200000, mv=0)
+    yield mutated
+
+
+class TestValidationPlan(TestCase):
+
+    def testSameViolations(self):
+        files = sorted((Path(__file__).parent.parent / "gallery").rglob("*.a7p"))[:5]
+        for path in files:
+            for payload in mutations(loads(path.read_bytes(), validate_=False)):
+                with self.subTest(path=path.name):
+                    expected = (protovalidate.collect_violations(payload),
+                                _default_validator.validate(to_dict(payload))[1])
+                    self.assertEqual(expected, check(payload))
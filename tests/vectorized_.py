@@ -0,0 +1,95 @@
+import time
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from a7p import loads, validate, validate_batch, vectorized
+from a7p.exceptions import A7PValidationError
+
+# Lower bound of the speedup of validate_batch over validate with NumPy, several times below the expected one
+SPEEDUP = 1.5
+
+# Changes of the profile fields, each failing a check of the batch
+SCALAR_CHANGES = (
+    {'c_muzzle_velocity': -1}, {'profile_name': 'x' * 60}, {'zero_x': 600001}, {'twist_dir': 5},
+    {'c_zero_distance_idx': 250}, {'user_note': 'ü' * 1100}, {'bc_type': 9}, {'c_zero_distance_idx': 199},
+)
+
+
+def _errors(payloads):
+    """Returns the violations validate reports for every payload, None for the valid ones."""
+    errors = []
+    for payload in payloads:
+        try:
+            validate(payload)
+            errors.append(None)
+        except A7PValidationError as err:
+            errors.append((err.violations, getattr(err, 'proto_violations', None)))
+    return errors
+
+
+class TestValidateBatch(TestCase):
+
+    def setUp(self) -> None:
+        self.path = Path(__file__).parent / "test.a7p"
+        self.payload = loads(self.path.read_bytes())
+        files = sorted((Path(__file__).parent.parent / "gallery").rglob("*.a7p"))
+        self.gallery = [loads(file.read_bytes()) for file in files]
+
+    def invalidPayloads(self):
+        payloads = []
+        for changes in SCALAR_CHANGES:
+            payload = loads(self.path.read_bytes())
+            for name, value in changes.items():
+                setattr(payload.profile, name, value)
+            payloads.append(payload)
+
+        def changed(change):
+            payload = loads(self.path.read_bytes())
+            change(payload.profile)
+            payloads.append(payload)
+
+        changed(lambda profile: profile.distances.__delitem__(slice(None)))
+        changed(lambda profile: profile.distances.__setitem__(-1, 400000))
+        changed(lambda profile: profile.switches.__delitem__(0))
+        changed(lambda profile: setattr(profile.switches[1], 'c_idx', 201))
+        changed(lambda profile: setattr(profile.switches[2], 'zoom', 7))
+        changed(lambda profile: setattr(profile.switches[3], 'distance_from', 7))
+        changed(lambda profile: setattr(profile.coef_rows[0], 'bc_cd', 200000))
+        changed(lambda profile: setattr(profile.coef_rows[0], 'mv', -1))
+        changed(lambda profile: profile.coef_rows.__delitem__(slice(None)))
+        changed(lambda profile: profile.coef_rows.extend(profile.coef_rows[:1] * 5))
+        return payloads
+
+    def testParity(self):
+        invalid = self.invalidPayloads()
+        custom = loads(self.path.read_bytes())
+        custom.profile.bc_type = 2
+        custom.profile.coef_rows.extend(custom.profile.coef_rows[:1] * 5)
+        payloads = self.gallery + [custom] + invalid
+        expected = _errors(payloads)
+        self.assertTrue(all(expected[-len(invalid):]))
+
+        validate_batch(payloads[:1])
+        for use_numpy in (True, False):
+            with self.subTest(numpy=use_numpy), patch.object(vectorized, 'np', vectorized.np if use_numpy else None):
+                results = validate_batch(payloads)
+                self.assertEqual(list(range(len(payloads))), [result.source for result in results])
+                self.assertEqual(expected, [result.error and (result.error.violations,
+                                                              getattr(result.error, 'proto_violations', None))
+                                            for result in results])
+
+    def testSpeedup(self):
+        validate_batch(self.gallery[:1])
+        if vectorized.np is None:
+            self.skipTest("NumPy is not installed")
+        payloads = self.gallery * 4
+        batch = loop = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            validate_batch(payloads)
+            batch = min(batch, time.perf_counter() - start)
+            start = time.perf_counter()
+            _errors(payloads)
+            loop = min(loop, time.perf_counter() - start)
+        self.assertLess(batch * SPEEDUP, loop)
@@ -0,0 +1,45 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from a7p.walk import iter_profiles
+
+
+class TestIterProfiles(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for name in ("a.a7p", "b.txt", ".a7p", "sub/c.a7p", "sub/c_recovered.a7p", "sub/deep/d.a7p",
+                     "skip/e.a7p", "dir.a7p/f.a7p"):
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"")
+        try:
+            os.symlink(self.root / "sub", self.root / "link")
+        except OSError:
+            pass
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def walk(self, *args, **kwargs) -> set[str]:
+        return {path.relative_to(self.root).as_posix() for path in iter_profiles(self.root, *args, **kwargs)}
+
+    def testWalk(self):
+        self.assertEqual({"a.a7p"}, self.walk())
+        self.assertEqual({"a.a7p", "sub/c.a7p", "sub/c_recovered.a7p", "sub/deep/d.a7p", "skip/e.a7p",
+                          "dir.a7p/f.a7p"}, self.walk(recursive=True))
+
+    def testPatterns(self):
+        self.assertEqual({"a.a7p", "sub/c.a7p", "sub/deep/d.a7p", "dir.a7p/f.a7p"},
+                         self.walk(recursive=True, exclude=["skip", "*_recovered.a7p"]))
+        self.assertEqual({"sub/c.a7p", "sub/c_recovered.a7p", "sub/deep/d.a7p"},
+                         self.walk(recursive=True, include=["sub/*"]))
+        self.assertEqual({"sub/deep/d.a7p"}, self.walk(recursive=True, include=["d.a7p", "e.a7p"], exclude=["skip/"]))
+        self.assertEqual({"sub/c.a7p"}, self.walk(recursive=True, include=["c*"], exclude=["deep", "*_recovered*"]))
+
+    def testLazy(self):
+        walker = iter_profiles(self.root, recursive=True)
+        self.assertIsInstance(next(walker), Path)